@@ -0,0 +1,190 @@
+"""Benchmark sessions of the whole watch UI on the host emulator.
+
+    python host/bench.py                  # every session, one table
+    python host/bench.py clock matrix     # some of them
+    python host/bench.py --list
+    python host/bench.py clock --record clock.trace
+    python host/bench.py --trace clock.trace [--fast]
+
+Each session boots main.main() in a fresh interpreter, presses buttons from a script and
+runs for a fixed virtual time. Reported per session: frames (SSD1306.show calls) per
+virtual second, I2C bytes and transactions per second, Python calls into the watch code
+per frame, time blocked in utime.sleep*, NeoPixel writes and the host CPU time the run
+took. Figures are for comparing changes, the host is not an RP2040.
+
+--trace replays an input trace (recorded here with --record or on the watch with
+INPUT_TRACE_MODE = "record") through main.main() and adds the replay's press to frame
+latency; the same trace gives the same workload on every build.
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+HOST_DIR = os.path.dirname(os.path.abspath(__file__))
+BOOT_MS = 3000  # scripts start once main.main() has shown the launcher
+
+# launcher order: Music 0, Coin Flip 1, Temperature 2, Matrix 3, Clock 4, Telephone 5, Settings 6
+SESSIONS = {
+    "launcher": ("down,down,down,down,up,up,up,up,w5000", 15_000),
+    "music": ("ok,ok,w12000,ok,w2000", 20_000),
+    "coin": ("down,ok,ok,w3000,ok,w3000", 12_000),
+    "temperature": ("down,down,ok,w10000,up,w10000,down,up", 30_000),
+    "matrix": ("down,down,down,ok,ok,w16000,ok,down,ok,w12000", 40_000),
+    "clock": ("down,down,down,down,ok,ok,w20000", 30_000),
+    "telephone": ("up,up,ok,down,ok" + ",up,ok" * 9 + ",ok,w3000", 25_000),
+    "settings": ("up,ok,ok,ok,ok,w5000,down,ok,w2000", 15_000),
+}
+
+COLUMNS = (("session", 12, "s"), ("fps", 7, ".1f"), ("i2c B/s", 9, ".0f"), ("tx/s", 7, ".1f"),
+           ("calls/fr", 9, ".0f"), ("blocked", 8, ".0f"), ("leds", 6, "d"), ("host ms", 8, ".0f"))
+
+
+def format_row(values):
+    return "".join(("{:<%d%s}" if i == 0 else "{:>%d%s}") % (width, spec) for i, (_, width, spec) in enumerate(COLUMNS)).format(*values)
+
+
+def run_session(name, trace=None, fast=False, record=None):
+    """Runs in the child interpreter, returns the figures of one session"""
+    import emulator
+    flash_dir = tempfile.mkdtemp(prefix="coolwatch-flash-")
+    emulator.install(flash_dir)
+    import machine
+    import neopixel
+    import utime
+    import src.constants as constants
+    import src.input_trace as input_trace
+    from src.ssd1306 import SSD1306
+
+    replayers = []
+    if trace is not None:
+        shutil.copy(trace, constants.INPUT_TRACE_FILE)
+        constants.INPUT_TRACE_MODE = "replay_fast" if fast else "replay"
+        script, duration_ms = "", trace_duration_ms(trace, fast)
+        init = input_trace.TraceReplayer.__init__
+
+        def registered_init(self, *args, **kwargs):
+            init(self, *args, **kwargs)
+            replayers.append(self)
+        input_trace.TraceReplayer.__init__ = registered_init
+    else:
+        script, duration_ms = SESSIONS[name]
+        if record is not None:
+            constants.INPUT_TRACE_MODE = "record"
+
+    frames = [0]
+    show = SSD1306.show
+
+    def counted_show(self):
+        frames[0] += 1
+        show(self)
+    SSD1306.show = counted_show
+
+    calls = [0]
+    repo_dir = emulator.REPO_DIR + os.sep
+
+    def profile(frame, event, arg):
+        if event == "call":
+            filename = frame.f_code.co_filename
+            if filename.startswith(repo_dir) and not filename.startswith(HOST_DIR):
+                calls[0] += 1
+
+    emulator.ButtonScript(script, start_ms=BOOT_MS).start()
+    start = time.process_time()
+    sys.setprofile(profile)
+    try:
+        emulator.run_main(duration_ms)
+    finally:
+        sys.setprofile(None)
+    host_ms = (time.process_time() - start) * 1000
+    if record is not None:
+        shutil.copy(constants.INPUT_TRACE_FILE, record)
+    i2c = machine.I2C.instances[0]
+    seconds = duration_ms / 1000
+    strip = neopixel.NeoPixel.last
+    row = {
+        "session": name,
+        "fps": frames[0] / seconds,
+        "i2c B/s": i2c.bytes / seconds,
+        "tx/s": i2c.tx / seconds,
+        "calls/fr": calls[0] / frames[0] if frames[0] else 0,
+        "blocked": utime.blocked_ms[0],
+        "leds": strip.writes if strip is not None else 0,
+        "host ms": host_ms,
+    }
+    if replayers:
+        r = replayers[0]
+        lat = r.latency
+        row["replay"] = {"done": r.done, "presses": r.presses, "ms": r.duration_ms, "drew": lat.count,
+                         "avg": lat.avg(), "p95": lat.percentile(95), "max": lat.max}
+    return row
+
+
+def trace_duration_ms(path, fast):
+    """Virtual time a replay of path needs: boot, the start delay, the edges and a margin"""
+    sys.path.insert(1, os.path.dirname(HOST_DIR))
+    from src.constants import INPUT_TRACE_REPLAY_DELAY_MS, INPUT_TRACE_SAVE_MS
+    from src.input_trace import FAST_GAP_MS, read_trace
+    _, records = read_trace(path)
+    edges_ms = sum(min(delta, FAST_GAP_MS) if fast else delta for delta, _, _ in records)
+    return BOOT_MS + INPUT_TRACE_REPLAY_DELAY_MS + edges_ms + INPUT_TRACE_SAVE_MS + 1000
+
+
+def run_child(name, args):
+    cmd = [sys.executable, os.path.abspath(__file__), "--session", name]
+    if args.trace:
+        cmd += ["--trace", args.trace] + (["--fast"] if args.fast else [])
+    if args.record:
+        cmd += ["--record", args.record]
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    if result.returncode != 0:
+        print("{:<12} failed:\n{}".format(name, result.stderr.strip()))
+        return False
+    row = json.loads(result.stdout.strip().splitlines()[-1])
+    print(format_row([row[title] for title, _, _ in COLUMNS]))
+    replay = row.get("replay")
+    if replay:
+        print("  replay{}: {} presses in {} ms, press to frame avg {} p95 {} max {} us ({} drew)".format(
+            "" if replay["done"] else " (cut short)", replay["presses"], replay["ms"], replay["avg"],
+            replay["p95"], replay["max"], replay["drew"]))
+    return True
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Benchmark sessions of the watch UI on the host emulator")
+    parser.add_argument("sessions", nargs="*", help="sessions to run, all by default")
+    parser.add_argument("--list", action="store_true", help="show the sessions and their scripts")
+    parser.add_argument("--trace", help="replay this input trace instead of running sessions")
+    parser.add_argument("--fast", action="store_true", help="replay with gaps cut to the debounce time")
+    parser.add_argument("--record", help="save the input of the (single) session as a trace")
+    parser.add_argument("--session", help=argparse.SUPPRESS)  # child process
+    args = parser.parse_args(argv)
+    if args.session:
+        print(json.dumps(run_session(args.session, args.trace, args.fast, args.record)))
+        return 0
+    if args.list:
+        for name, (script, duration_ms) in SESSIONS.items():
+            print("{:<12}{:>7} ms  {}".format(name, duration_ms, script))
+        return 0
+    names = ["trace"] if args.trace else (args.sessions or list(SESSIONS))
+    if args.record and len(names) != 1:
+        parser.error("--record needs exactly one session")
+    print("".join(("{:<%d}" if i == 0 else "{:>%d}") % width for i, (_, width, _) in enumerate(COLUMNS))
+          .format(*(title for title, _, _ in COLUMNS)))
+    failed = 0
+    for name in names:
+        if name not in SESSIONS and not args.trace:
+            print("unknown session: {}".format(name))
+            failed += 1
+        elif not run_child(name, args):
+            failed += 1
+    print("blocked: ms in utime.sleep*, leds: NeoPixel writes, virtual time except host ms")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,90 @@
+"""Runs the watch code on CPython against the stand-in modules in this directory.
+
+    import emulator
+    emulator.install(flash_dir)          # before anything from src is imported
+    emulator.ButtonScript("down,ok,w500,ok").start()
+    emulator.run_main(duration_ms=20_000)
+
+install() puts the repository on sys.path, points the flash paths of src.constants into
+flash_dir, adds gc.mem_free()/mem_alloc() and hides _thread, so the CoreWorker runs as a
+uasyncio task on the virtual clock.
+"""
+import gc
+import os
+import sys
+
+import machine
+import utime
+import uasyncio
+
+HOST_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(HOST_DIR)
+HEAP_SIZE = 192 * 1024  # roughly what an RP2040 has free after boot
+
+PIN_BY_BUTTON = {}  # 'up'/'down'/'ok' -> pin number, filled by install()
+PRESS_MS = 120  # a scripted press holds the button this long
+PRESS_GAP_MS = 300  # and leaves this much time before the next step
+
+
+def install(flash_dir):
+    """Prepare the interpreter to import main.py and src, with flash files under flash_dir"""
+    if REPO_DIR not in sys.path:
+        sys.path.insert(1, REPO_DIR)
+    sys.modules["_thread"] = None  # CoreWorker falls back to a uasyncio task
+    if not hasattr(gc, "mem_free"):
+        gc.mem_free = lambda: HEAP_SIZE - _heap_alloc()
+        gc.mem_alloc = _heap_alloc
+    os.makedirs(flash_dir, exist_ok=True)
+    import src.constants as constants
+    constants.LOG_DIR = os.path.join(flash_dir, "log")
+    constants.SETTINGS_FILE = os.path.join(flash_dir, "settings.bin")
+    constants.SONGS_DIR = os.path.join(REPO_DIR, "songs")
+    constants.INPUT_TRACE_FILE = os.path.join(flash_dir, "input.trace")
+    PIN_BY_BUTTON.update(up=constants.BUTTON_UP_PIN_NUM, down=constants.BUTTON_DOWN_PIN_NUM,
+                         ok=constants.BUTTON_OK_PIN_NUM)
+
+
+def _heap_alloc():
+    # CPython has no MicroPython heap, report the traced size when tracemalloc is on
+    import tracemalloc
+    return tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else 0
+
+
+class ButtonScript:
+    """Presses buttons at set virtual times through one-shot machine.Timers.
+
+    Steps are 'up', 'down', 'ok' (a press of PRESS_MS followed by PRESS_GAP_MS) or 'w<ms>'
+    to wait, separated by commas. Pin changes run the registered IRQ handlers, exactly as
+    a real button edge would.
+    """
+
+    def __init__(self, script, start_ms=1500):
+        self.steps = [s for s in script.split(",") if s]
+        self.start_ms = start_ms
+        self.presses = 0
+
+    def start(self):
+        t = self.start_ms
+        for step in self.steps:
+            if step.startswith("w"):
+                t += int(step[1:])
+                continue
+            pin = machine.Pin(PIN_BY_BUTTON[step])
+            self._at(t, pin, 0)
+            self._at(t + PRESS_MS, pin, 1)
+            t += PRESS_MS + PRESS_GAP_MS
+        return t  # virtual ms at which the script is done
+
+    def _at(self, t, pin, level):
+        def fire(_timer):
+            pin.value(level)
+            if level == 0:
+                self.presses += 1
+        machine.Timer(mode=machine.Timer.ONE_SHOT, period=t - utime._now[0], callback=fire)
+
+
+def run_main(duration_ms):
+    """Run main.main() until the virtual clock reaches duration_ms"""
+    uasyncio._limit[0] = duration_ms
+    import main
+    main.main()
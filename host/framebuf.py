@@ -0,0 +1,101 @@
+"""framebuf stand-in for the mono formats the display code uses.
+
+Pixels are laid out exactly as on the device (MONO_VLSB for the SSD1306, MONO_HLSB and
+MONO_HMSB for glyphs), so frame diffs and I2C byte counts match. text() draws a made up
+8x8 pattern per character, not the real font.
+"""
+
+MONO_VLSB = 0
+MONO_HLSB = 3
+MONO_HMSB = 4
+
+
+class FrameBuffer:
+    def __init__(self, buf, width, height, fmt, stride=None):
+        self.buf = buf
+        self.width = width
+        self.height = height
+        self.fmt = fmt
+        self.stride = stride or width
+
+    def _index(self, x, y):
+        if self.fmt == MONO_VLSB:
+            return (y >> 3) * self.stride + x, y & 7
+        row_bytes = (self.stride + 7) // 8
+        if self.fmt == MONO_HLSB:
+            return y * row_bytes + (x >> 3), 7 - (x & 7)
+        return y * row_bytes + (x >> 3), x & 7
+
+    def pixel(self, x, y, c=None):
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            return None
+        i, bit = self._index(x, y)
+        if c is None:
+            return (self.buf[i] >> bit) & 1
+        if c:
+            self.buf[i] |= 1 << bit
+        else:
+            self.buf[i] &= ~(1 << bit) & 0xFF
+
+    def fill(self, c):
+        value = 0xFF if c else 0
+        for i in range(len(self.buf)):
+            self.buf[i] = value
+
+    def fill_rect(self, x, y, w, h, c):
+        for yy in range(max(0, y), min(self.height, y + h)):
+            for xx in range(max(0, x), min(self.width, x + w)):
+                self.pixel(xx, yy, c)
+
+    def rect(self, x, y, w, h, c, fill=False):
+        if fill:
+            self.fill_rect(x, y, w, h, c)
+            return
+        self.hline(x, y, w, c)
+        self.hline(x, y + h - 1, w, c)
+        self.vline(x, y, h, c)
+        self.vline(x + w - 1, y, h, c)
+
+    def hline(self, x, y, w, c):
+        self.fill_rect(x, y, w, 1, c)
+
+    def vline(self, x, y, h, c):
+        self.fill_rect(x, y, 1, h, c)
+
+    def line(self, x0, y0, x1, y1, c):
+        dx = abs(x1 - x0)
+        dy = -abs(y1 - y0)
+        sx = 1 if x0 < x1 else -1
+        sy = 1 if y0 < y1 else -1
+        err = dx + dy
+        while True:
+            self.pixel(x0, y0, c)
+            if x0 == x1 and y0 == y1:
+                break
+            e2 = 2 * err
+            if e2 >= dy:
+                err += dy
+                x0 += sx
+            if e2 <= dx:
+                err += dx
+                y0 += sy
+
+    def text(self, s, x, y, c=1):
+        for ch in s:
+            o = ord(ch)
+            for col in range(7):
+                bits = 0 if ch == ' ' else ((o * (col + 3)) ^ (o >> 1)) & 0x7F
+                for row in range(8):
+                    if bits >> row & 1:
+                        self.pixel(x + col, y + row, c)
+            x += 8
+
+    def blit(self, src, x, y, key=-1, palette=None):
+        for yy in range(src.height):
+            for xx in range(src.width):
+                v = src.pixel(xx, yy)
+                if v != key:
+                    self.pixel(x + xx, y + yy, v)
+
+    def scroll(self, dx, dy):
+        pass
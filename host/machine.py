@@ -0,0 +1,156 @@
+"""machine stand-in: pins with IRQs, counting I2C, PWM, ADC, Timer and RTC on the virtual clock"""
+import utime
+
+
+class Pin:
+    IN = 0
+    OUT = 1
+    PULL_UP = 1
+    PULL_DOWN = 2
+    IRQ_FALLING = 4
+    IRQ_RISING = 8
+
+    _levels = {}  # pin id -> level, pulled up unless driven
+    _handlers = {}  # pin id -> IRQ handler
+
+    def __init__(self, pin_id, mode=-1, pull=-1, value=None):
+        self.id = pin_id
+        Pin._levels.setdefault(pin_id, 1)
+
+    def value(self, v=None):
+        """Read the level, or drive it and run the IRQ handler on a change like a button would"""
+        if v is None:
+            return Pin._levels[self.id]
+        old = Pin._levels[self.id]
+        Pin._levels[self.id] = v
+        handler = Pin._handlers.get(self.id)
+        if handler is not None and old != v:
+            handler(self)
+
+    def __call__(self, v=None):
+        return self.value(v)
+
+    def irq(self, handler=None, trigger=IRQ_FALLING | IRQ_RISING, hard=False, wake=None):
+        Pin._handlers[self.id] = handler
+
+    def init(self, *args, **kwargs):
+        pass
+
+
+class I2C:
+    """Counts bytes and transactions instead of talking to a device"""
+    instances = []
+
+    def __init__(self, *args, **kwargs):
+        self.bytes = 0
+        self.tx = 0
+        I2C.instances.append(self)
+
+    def writeto(self, addr, buf):
+        self.bytes += len(buf)
+        self.tx += 1
+
+    def writevto(self, addr, bufs):
+        self.bytes += sum(len(b) for b in bufs)
+        self.tx += 1
+
+
+class PWM:
+    def __init__(self, pin):
+        self._freq = 0
+        self._duty = 0
+
+    def freq(self, f=None):
+        if f is None:
+            return self._freq
+        self._freq = f
+
+    def duty_u16(self, d=None):
+        if d is None:
+            return self._duty
+        self._duty = d
+
+    def deinit(self):
+        self._duty = 0
+
+
+class ADC:
+    """Reads a slowly wandering value, about 13-14 C through the temperature sensor formula"""
+
+    def __init__(self, channel):
+        self.channel = channel
+
+    def read_u16(self):
+        return 14000 + (utime.ticks_ms() // 1000 * 37) % 300
+
+
+class Timer:
+    ONE_SHOT = 0
+    PERIODIC = 1
+
+    def __init__(self, timer_id=-1, **kwargs):
+        self.cb = None
+        self.mode = Timer.ONE_SHOT
+        self.period = 0
+        self.due = 0
+        utime._timers.append(self)
+        if kwargs:
+            self.init(**kwargs)
+
+    def init(self, mode=PERIODIC, period=-1, freq=-1, callback=None, hard=None):
+        if freq and freq > 0:
+            period = 1000 / freq
+        self.cb = callback
+        self.period = period
+        self.mode = mode
+        self.due = utime._now[0] + period
+
+    def deinit(self):
+        self.cb = None
+
+
+class RTC:
+    """Time of day on the virtual clock, the date stays 2000-01-01"""
+    _base = [0, 0.0]  # seconds of day set, virtual ms when set
+
+    def datetime(self, t=None):
+        if t is not None:
+            RTC._base = [t[4] * 3600 + t[5] * 60 + t[6], utime._now[0]]
+            return None
+        s = int(RTC._base[0] + (utime._now[0] - RTC._base[1]) // 1000) % 86400
+        return (2000, 1, 1, 5, s // 3600, (s // 60) % 60, s % 60, 0)
+
+
+_freq = [125_000_000]
+lightsleep_ms = [0.0]  # time spent in lightsleep(), not counted as blocked
+
+
+def freq(f=None):
+    if f is None:
+        return _freq[0]
+    _freq[0] = f
+
+
+def lightsleep(ms=None):
+    lightsleep_ms[0] += ms or 0
+    utime._advance(ms or 0)
+
+
+def deepsleep(ms=None):
+    pass
+
+
+def disable_irq():
+    return 0
+
+
+def enable_irq(state):
+    pass
+
+
+def idle():
+    pass
+
+
+def reset():
+    raise SystemExit("machine.reset()")
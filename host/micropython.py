@@ -0,0 +1,31 @@
+"""micropython module stand-in: decorators are no-ops, schedule() calls at once"""
+import builtins
+
+# viper's pointer and integer annotation types are builtins on the firmware
+for _name in ("ptr", "ptr8", "ptr16", "ptr32", "uint"):
+    if not hasattr(builtins, _name):
+        setattr(builtins, _name, int)
+
+
+def const(x):
+    return x
+
+
+def native(f):
+    return f
+
+
+def viper(f):
+    return f
+
+
+def alloc_emergency_exception_buf(size):
+    pass
+
+
+def schedule(func, arg):
+    func(arg)
+
+
+def mem_info(verbose=None):
+    pass
@@ -0,0 +1,42 @@
+"""NeoPixel stand-in that records what is written to the strip"""
+import utime
+
+RECORD_FRAMES = 64  # most recent frames kept in frames
+
+
+class NeoPixel:
+    ORDER = (1, 0, 2, 3)
+
+    def __init__(self, pin, n, bpp=3, timing=1):
+        self.pin = pin
+        self.n = n
+        self.bpp = bpp
+        self.buf = bytearray(n * bpp)
+        self.writes = 0
+        self.frames = []  # (ticks_ms, bytes(buf)) per write(), newest last
+        NeoPixel.last = self
+
+    def __setitem__(self, i, value):
+        offset = i * self.bpp
+        for j in range(self.bpp):
+            self.buf[offset + self.ORDER[j]] = value[j]
+
+    def __getitem__(self, i):
+        offset = i * self.bpp
+        return tuple(self.buf[offset + self.ORDER[j]] for j in range(self.bpp))
+
+    def __len__(self):
+        return self.n
+
+    def fill(self, value):
+        for i in range(self.n):
+            self[i] = value
+
+    def write(self):
+        self.writes += 1
+        self.frames.append((utime.ticks_ms(), bytes(self.buf)))
+        if len(self.frames) > RECORD_FRAMES:
+            del self.frames[0]
+
+
+NeoPixel.last = None  # most recently created strip
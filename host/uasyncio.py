@@ -0,0 +1,162 @@
+"""Single threaded uasyncio stand-in on the virtual clock.
+
+Tasks wait on a heap of (due, seq, task, epoch); when nothing is ready the clock jumps to
+the next task or machine.Timer due time, so idle time costs nothing on the host. run() stops once the clock
+would pass _limit[0] ms, which is how sessions of a never ending main loop are bounded.
+"""
+import heapq
+
+import utime
+
+_queue = []
+_seq = [0]
+_limit = [None]
+
+
+class TimeoutError(Exception):
+    pass
+
+
+class _Sleep:
+    def __init__(self, ms):
+        self.ms = ms
+
+    def __await__(self):
+        yield ('sleep', self.ms)
+
+
+def sleep_ms(ms):
+    return _Sleep(ms)
+
+
+def sleep(seconds):
+    return _Sleep(seconds * 1000)
+
+
+class Task:
+    def __init__(self, coro):
+        self.coro = coro
+        self.done = False
+        self.epoch = 0  # bumped on every resume, stale heap entries are skipped
+        self.waiting_on = None
+
+    def cancel(self):
+        self.done = True
+
+
+def _push(due, task):
+    _seq[0] += 1
+    heapq.heappush(_queue, (due, _seq[0], task, task.epoch))
+
+
+def create_task(coro):
+    task = Task(coro)
+    _push(utime._now[0], task)
+    return task
+
+
+class Event:
+    def __init__(self):
+        self._set = False
+        self.waiting = []
+
+    def set(self):
+        self._set = True
+        for task in self.waiting:
+            _push(utime._now[0], task)
+        self.waiting = []
+
+    def clear(self):
+        self._set = False
+
+    def is_set(self):
+        return self._set
+
+    def wait(self):
+        return _Wait(self)
+
+
+class ThreadSafeFlag(Event):
+    def wait(self):
+        return _Wait(self, auto_clear=True)
+
+
+class _Wait:
+    def __init__(self, event, auto_clear=False):
+        self.event = event
+        self.auto_clear = auto_clear
+
+    def __await__(self):
+        if not self.event._set:
+            yield ('wait', self.event)
+        if self.auto_clear:
+            self.event._set = False
+
+
+class _WaitFor:
+    def __init__(self, event, ms):
+        self.event = event
+        self.ms = ms
+
+    def __await__(self):
+        if not self.event._set:
+            yield ('wait_for', self.event, self.ms)
+            if not self.event._set:
+                raise TimeoutError
+        self.event._set = False
+
+
+def wait_for_ms(awaitable, ms):
+    """Only Event.wait() / ThreadSafeFlag.wait() can be waited for, which is all the watch uses"""
+    return _WaitFor(awaitable.event, ms)
+
+
+def _resume(task):
+    task.epoch += 1
+    if task.waiting_on is not None:
+        if task in task.waiting_on.waiting:
+            task.waiting_on.waiting.remove(task)
+        task.waiting_on = None
+    try:
+        request = task.coro.send(None)
+    except StopIteration:
+        task.done = True
+        return
+    if request[0] == 'sleep':
+        _push(utime._now[0] + max(request[1], 0), task)
+    else:
+        request[1].waiting.append(task)
+        task.waiting_on = request[1]
+        if request[0] == 'wait_for':
+            _push(utime._now[0] + max(request[2], 0), task)
+
+
+def run(coro):
+    create_task(coro)
+    limit = _limit[0]
+    while True:
+        timer_due = utime._next_timer_due()
+        due = _queue[0][0] if _queue else None
+        if due is None and timer_due is None:
+            return
+        if timer_due is not None and (due is None or timer_due < due):
+            # stop at every timer, its callback (an IRQ on the device) may wake a task
+            if limit is not None and timer_due > limit:
+                utime._advance(limit - utime._now[0])
+                return
+            utime._advance(max(timer_due - utime._now[0], 0))
+            continue
+        due, _, task, epoch = heapq.heappop(_queue)
+        if task.done or epoch != task.epoch:
+            continue
+        if limit is not None and due > limit:
+            utime._advance(limit - utime._now[0])
+            return
+        if due > utime._now[0]:
+            utime._advance(due - utime._now[0])
+        _resume(task)
+
+
+def reset():
+    del _queue[:]
+    _limit[0] = None
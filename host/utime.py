@@ -0,0 +1,83 @@
+"""Virtual clock standing in for MicroPython's utime.
+
+Time only moves when something sleeps or the uasyncio stand-in waits, so a session runs
+as fast as the host allows and is repeatable. machine.Timer callbacks fire from _advance()
+at their due time. Blocking sleeps are added up in blocked_ms.
+"""
+import time as _time
+
+_TICKS_MASK = 0x3FFFFFFF
+_TICKS_HALF = 0x20000000
+EPOCH_OFFSET = 946684800  # utime.time() counts from 2000-01-01
+
+_now = [0.0]  # virtual ms since start, a float so sleep_us() adds up
+_timers = []  # machine.Timer stand-ins, fired by _advance()
+blocked_ms = [0.0]  # time spent in sleep(), sleep_ms() and sleep_us()
+
+
+def ticks_ms():
+    return int(_now[0]) & _TICKS_MASK
+
+
+def ticks_us():
+    return int(_now[0] * 1000) & _TICKS_MASK
+
+
+def ticks_add(ticks, delta):
+    return (ticks + delta) & _TICKS_MASK
+
+
+def ticks_diff(a, b):
+    d = (a - b) & _TICKS_MASK
+    return d - _TICKS_MASK - 1 if d & _TICKS_HALF else d
+
+
+def _advance(ms):
+    """Move the clock on by ms, firing the timers that fall due on the way"""
+    end = _now[0] + ms
+    while True:
+        due = [t for t in _timers if t.cb is not None and t.due <= end]
+        if not due:
+            break
+        timer = min(due, key=lambda t: t.due)
+        _now[0] = max(_now[0], timer.due)
+        cb = timer.cb
+        if timer.mode == timer.ONE_SHOT:
+            timer.cb = None
+        else:
+            timer.due += timer.period
+        cb(timer)
+    _now[0] = max(_now[0], end)
+
+
+def _next_timer_due():
+    """Virtual ms of the next timer callback, None if no timer is armed"""
+    due = [t.due for t in _timers if t.cb is not None]
+    return min(due) if due else None
+
+
+def sleep_ms(ms):
+    blocked_ms[0] += ms
+    _advance(ms)
+
+
+def sleep_us(us):
+    sleep_ms(us / 1000)
+
+
+def sleep(seconds):
+    sleep_ms(seconds * 1000)
+
+
+def time():
+    return EPOCH_OFFSET + int(_now[0] // 1000)
+
+
+def localtime(secs=None):
+    return _time.gmtime(secs if secs is not None else time())[:8]
+
+
+def reset():
+    _now[0] = 0.0
+    blocked_ms[0] = 0.0
+    del _timers[:]
@@ -1,20 +1,23 @@
 
 import utime
 import machine
+import micropython
 
 
-from src.apps.clock_app import ClockApp
-from src.apps.telephone_app import TelephoneApp
+from src.app_registry import AppRegistry
 from src.apps.app import App
-from src.apps.matrix_app import MatrixEffectsApp
-from src.apps.music_app import MusicApp
-from src.apps.temperature_app import TemperatureApp
+from src.apps.launcher_app import LauncherApp
 from src.buzzer_controller import BuzzerController
-from src.apps.coin_flip_app import CoinFlipApp
+from src.core_worker import CoreWorker
 from src.display_manager import DisplayManager
-from src.apps.settings_app import SettingsApp
 from src.ssd1306 import SSD1306_I2C
 from src.sleep_manager import SleepManager
+from src.temp_sampler import TemperatureSampler
+from src.time_service import TimeService
+from src.runtime import AppRuntime
+from src.sensor_log import SensorLog
+from src.settings_store import SettingsStore
+from src.memory_monitor import MemoryMonitor
 from src.button import Button
 from src.constants import (
     OLED_SDA_PIN_NUM,
@@ -27,11 +30,15 @@ from src.constants import (
     BUTTON_UP_PIN_NUM,
     BUTTON_DOWN_PIN_NUM,
     BUTTON_OK_PIN_NUM,
+    BUTTON_USE_IRQ,
+    INPUT_TRACE_MODE,
+    PROFILE_ENABLED,
     SLEEP_SWITCH_PIN_NUM,
 )
 
 
 def main():
+    micropython.alloc_emergency_exception_buf(100)  # report errors raised in button ISRs
     i2c = machine.I2C(OLED_I2C_ID, scl=machine.Pin(OLED_SCL_PIN_NUM), sda=machine.Pin(OLED_SDA_PIN_NUM))
     oled = SSD1306_I2C(OLED_WIDTH, OLED_HEIGHT, i2c, addr=OLED_I2C_ADDR)
     oled.fill(0)
@@ -47,69 +54,52 @@ def main():
     display = DisplayManager(oled)
     sleep_manager = SleepManager(SLEEP_SWITCH_PIN_NUM)
     buttons_map = {
-        'up': Button(BUTTON_UP_PIN_NUM),
-        "down": Button(BUTTON_DOWN_PIN_NUM),
-        "ok": Button(BUTTON_OK_PIN_NUM)
+        'up': Button(BUTTON_UP_PIN_NUM, use_irq=BUTTON_USE_IRQ),
+        "down": Button(BUTTON_DOWN_PIN_NUM, use_irq=BUTTON_USE_IRQ),
+        "ok": Button(BUTTON_OK_PIN_NUM, use_irq=BUTTON_USE_IRQ)
     }
-    buzzer = BuzzerController(BUZZER_PIN_NUM, App._menu_buzzer_enabled)
+    App.settings = SettingsStore()
+    App._menu_buzzer_enabled = App.settings.get("sounds", App._menu_buzzer_enabled)
+    buzzer = BuzzerController(BUZZER_PIN_NUM, True)  # the sounds setting only gates menu sounds
+
+    # app modules are only imported when first opened, see AppRegistry
+    registry = AppRegistry([
+        {"name": "Music Player", "module": "src.apps.music_app", "class": "MusicApp"},
+        {"name": "Coin Flip", "module": "src.apps.coin_flip_app", "class": "CoinFlipApp"},
+        {"name": "Temperature", "module": "src.apps.temperature_app", "class": "TemperatureApp"},
+        {"name": "Matrix", "module": "src.apps.matrix_app", "class": "MatrixEffectsApp", "keep": True},
+        {"name": "Clock", "module": "src.apps.clock_app", "class": "ClockApp"},
+        {"name": "Telephone", "module": "src.apps.telephone_app", "class": "TelephoneApp", "keep": True},
+        {"name": "Settings", "module": "src.apps.settings_app", "class": "SettingsApp"}
+    ])
 
-    apps_list = [
-        {"name": "Music Player", "app_class": MusicApp},
-        {"name": "Coin Flip", "app_class": CoinFlipApp},
-        {"name": "Temperature", "app_class": TemperatureApp},
-        {"name": "Matrix", "app_class": MatrixEffectsApp},
-        {"name": "Clock", "app_class": ClockApp},
-        {"name": "Telephone", "app_class": TelephoneApp},
-        {"name": "Settings", "app_class": SettingsApp}
-    ]
-
-    app_titles = [app["name"] for app in apps_list]
-    current_sel_main = 0
     display.show_message("Watch 2.0 Beta", title="Welcome!", duration_s=1)
 
-    while True:
-        if sleep_manager.should_sleep():
-            sleep_manager.try_enter_sleep_mode(display, buzzer)
-        else:
-            sleep_manager.try_exit_sleep_mode(display)
-
-        for btn in buttons_map.values():
-            btn.update()
-        display.draw_menu(app_titles, current_sel_main, title="MAIN MENU")
-
-        if buttons_map['up'].is_pressed():
-            current_sel_main = (current_sel_main - 1 + len(app_titles)) % len(app_titles)
-            if App._menu_buzzer_enabled:
-                buzzer.play_exit_sound()
-        elif buttons_map['down'].is_pressed():
-            current_sel_main = (current_sel_main + 1) % len(app_titles)
-            if App._menu_buzzer_enabled:
-                buzzer.play_exit_sound()
-        elif buttons_map['ok'].is_pressed():
-            if App._menu_buzzer_enabled:
-                buzzer.play_ok_sound()
-
-            selected_app_cfg = apps_list[current_sel_main]
-            app_cls = selected_app_cfg["app_class"]
-            display.show_message("Loading...", title=selected_app_cfg['name'], duration_s=0.2, clear_after=True)
-
-            # for _ in range(5):  # Debounce before app start
-            #     for btn in buttons_map.values():
-            #         btn.update()
-            #     utime.sleep_ms(10)
-
-            app_instance = app_cls(display, buttons_map, buzzer)
-            app_instance.run()
-
-            # for _ in range(5):  # Debounce after app exit
-            #     for btn in buttons_map.values():
-            #         btn.update()
-            #     utime.sleep_ms(10)
-
-            display.clear()
-            display.show()
-
-        utime.sleep_ms(50)
+    App.worker = CoreWorker()
+    App.time_service = TimeService(App.settings)
+    App.settings.time_service = App.time_service
+    log = SensorLog()
+    App.temp_sampler = TemperatureSampler()
+    App.temp_sampler.log = log
+    App.temp_sampler.start(App.time_service)
+    App.memory = MemoryMonitor()
+    runtime = AppRuntime(display, buttons_map, buzzer, sleep_manager, registry, worker=App.worker,
+                         time_service=App.time_service, log=log, settings=App.settings, memory=App.memory)
+    if PROFILE_ENABLED:
+        from src.profiler import Profiler  # not even imported unless enabled
+        App.profiler = Profiler()
+        App.profiler.instrument_display(display)
+        App.profiler.instrument_buzzer(buzzer)
+        App.profiler.instrument_runtime(runtime)
+    if INPUT_TRACE_MODE == "record":
+        from src.input_trace import TraceRecorder
+        TraceRecorder(buttons_map, App.time_service).start()
+    elif INPUT_TRACE_MODE in ("replay", "replay_fast"):
+        from src.input_trace import TraceReplayer
+        replayer = TraceReplayer(buttons_map, display, runtime.idle)
+        runtime.add_task(replayer.run(fast=INPUT_TRACE_MODE == "replay_fast"))
+    runtime.set_launcher(LauncherApp(display, buttons_map, buzzer, registry.entries, runtime.launch))
+    runtime.run()
 
 
 if __name__ == "__main__":
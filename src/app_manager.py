@@ -0,0 +1,66 @@
+from collections import OrderedDict
+import gc
+
+from src.constants import APP_MANAGER_MAX_LIVE, APP_REGISTRY_MIN_FREE
+
+
+class AppManager:
+    """Bounded LRU of live app instances built from an AppRegistry.
+
+    A closed app is only suspended (on_exit); opening it again calls on_enter on the same
+    instance, so its state and hardware setup are kept. When more than max_live apps are alive,
+    or free heap drops under min_free, the least recently used app that is not on screen is
+    destroyed (on_destroy) and its modules may then be dropped by the registry.
+    """
+
+    def __init__(self, registry, display_manager, buttons, buzzer_control,
+                 max_live=APP_MANAGER_MAX_LIVE, min_free=APP_REGISTRY_MIN_FREE):
+        self.registry = registry
+        self.display = display_manager
+        self.buttons = buttons
+        self.buzzer = buzzer_control
+        self.max_live = max_live
+        self.min_free = min_free
+        self._live = OrderedDict()  # entry name -> app, least recently used first
+
+    def get_live(self, entry):
+        """The suspended instance of entry, or None if it has to be built"""
+        return self._live.get(entry["name"])
+
+    def open(self, entry):
+        """Return the app for entry, reusing the live instance when there is one"""
+        name = entry["name"]
+        app = self._live.pop(name, None)
+        if app is None:
+            app_cls = self.registry.load(entry)
+            self._evict(self.max_live - 1)
+            app = app_cls(self.display, self.buttons, self.buzzer)
+        self._live[name] = app  # (re)insert as most recently used
+        return app
+
+    def _destroy(self, name):
+        app = self._live.pop(name)
+        try:
+            app.on_destroy()
+        except Exception as e:
+            print(f"App {name}: on_destroy error: {e}")
+        print(f"App {name}: destroyed")
+
+    def _evict(self, max_live, current=None):
+        for name in list(self._live):
+            if len(self._live) <= max_live:
+                break
+            if self._live[name] is not current:
+                self._destroy(name)
+
+    def trim(self, current=None):
+        """Destroy unused apps while the heap is low, then let the registry drop modules"""
+        gc.collect()
+        for name in list(self._live):
+            if gc.mem_free() >= self.min_free:
+                break
+            if self._live[name] is not current:
+                self._destroy(name)
+                gc.collect()
+        live_names = list(self._live)
+        self.registry.trim(keep=[entry for entry in self.registry.entries if entry["name"] in live_names])
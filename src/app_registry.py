@@ -0,0 +1,78 @@
+import gc
+import sys
+import utime
+
+from src.constants import APP_REGISTRY_MIN_FREE
+
+
+class AppRegistry:
+    """Apps by name and module path, each module is only imported when the app is first opened.
+
+    entries are dicts {"name", "module", "class"} and optionally "keep": True for apps that
+    hold state in class attributes, which must not be dropped. Import time and heap growth of
+    every import are printed and kept in the entry. trim() drops the module of least recently
+    used apps once gc.mem_free() falls under min_free. Helper modules an app imported stay
+    loaded, other apps may share them (src.songs, src.matrix_renderer, ...) and a second copy
+    would give them classes and state of their own.
+    """
+
+    def __init__(self, entries, min_free=APP_REGISTRY_MIN_FREE):
+        self.entries = entries
+        self.min_free = min_free
+        self._loaded = []  # least recently opened first
+
+    def titles(self):
+        return [entry["name"] for entry in self.entries]
+
+    def load(self, entry):
+        """Return the app class of entry, importing its module if needed"""
+        if "app_class" in entry:
+            self._touch(entry)
+            return entry["app_class"]
+        self.trim(keep=(entry,))
+        gc.collect()
+        before_alloc = gc.mem_alloc()
+        start = utime.ticks_ms()
+        __import__(entry["module"])
+        import_ms = utime.ticks_diff(utime.ticks_ms(), start)
+        gc.collect()
+        entry["import_ms"] = import_ms
+        entry["heap_delta"] = gc.mem_alloc() - before_alloc
+        entry["imported"] = True
+        entry["app_class"] = getattr(sys.modules[entry["module"]], entry["class"])
+        print(f"App {entry['name']}: import {import_ms} ms, heap +{entry['heap_delta']} B")
+        self._touch(entry)
+        return entry["app_class"]
+
+    def _touch(self, entry):
+        if entry in self._loaded:
+            self._loaded.remove(entry)
+        self._loaded.append(entry)
+
+    def unload(self, entry):
+        """Forget entry's class and drop its module, the next launch imports it again"""
+        if not entry.pop("imported", False):
+            return  # imported at boot, nothing to give back
+        name = entry["module"]
+        sys.modules.pop(name, None)
+        parent, _, child = name.rpartition(".")
+        if parent in sys.modules:
+            try:
+                delattr(sys.modules[parent], child)
+            except AttributeError:
+                pass
+        entry.pop("app_class", None)
+        if entry in self._loaded:
+            self._loaded.remove(entry)
+        print(f"App {entry['name']}: unloaded")
+
+    def trim(self, keep=()):
+        """Unload least recently used apps while free heap is below min_free, except those in keep"""
+        gc.collect()
+        for entry in list(self._loaded):
+            if gc.mem_free() >= self.min_free:
+                break
+            if entry in keep or entry.get("keep"):
+                continue
+            self.unload(entry)
+            gc.collect()
@@ -1,34 +1,124 @@
+import utime
+
 from src.constants import NOTES
 
 
 class App:
+    """Base class of the watch apps.
+
+    Apps no longer own a loop. AppRuntime calls the hooks from its event loop:
+    on_enter() when the app is opened, on_input(button) for every press of 'up', 'down'
+    or 'ok', on_tick(now_ms) when next_tick() is due, on_exit() when it is left. render()
+    is only called after invalidate(), so an idle screen costs nothing. Call stop() to go
+    back to the main menu. Instances are kept alive between on_exit() and the next
+    on_enter() until AppManager evicts them with on_destroy().
+
+    The runtime sleeps until the earliest deadline, so apps only ask for ticks while they
+    wait for something: set tick_ms to poll periodically, or override next_tick() to return
+    the exact ticks_ms of the next event.
+    """
     _menu_buzzer_enabled = True
+    worker = None  # shared CoreWorker for long running LED work, set up in main.py
+    time_service = None  # shared TimeService (RTC time and alarms), set up in main.py
+    temp_sampler = None  # shared background TemperatureSampler, set up in main.py
+    settings = None  # shared SettingsStore, values that survive a reset
+    profiler = None  # Profiler when PROFILE_ENABLED, shown in the Settings app
+    memory = None  # MemoryMonitor, shown in the Settings app
 
     def __init__(self, display_manager, buttons, buzzer_control):
         self.display = display_manager
         self.buttons = buttons
         self.buzzer = buzzer_control
+        self.tick_ms = None  # on_tick period, None while the app only reacts to input
         self._active = True
+        self._needs_render = True
+        self._toast_lines = None
+        self._toast_title = ""
+        self._toast_until = 0
+
+    def on_enter(self):
+        self._active = True
+        self.invalidate()
+
+    def on_input(self, button):
+        pass
+
+    def on_tick(self, now_ms):
+        pass
+
+    def next_tick(self, last_tick_ms):
+        """ticks_ms at which on_tick is next due, None if the app needs no tick"""
+        if self.tick_ms is None:
+            return None
+        return utime.ticks_add(last_tick_ms, self.tick_ms)
+
+    def on_exit(self):
+        if self.buzzer:
+            self.buzzer.stop_tone()  # Stop any continuous tones from the app
 
-    def run(self):
+    def on_destroy(self):
+        """The instance is dropped by AppManager, release hardware it set up"""
+        pass
+
+    def render(self):
         raise NotImplementedError
 
     def stop(self):
         self._active = False
-        if self.buzzer:
-            self.buzzer.stop_tone()  # Stop any continuous tones from the app
 
-    def _handle_input_for_menu(self, menu_items_count, current_selection):
-        if self.buttons['up'].is_pressed():
+    def is_active(self):
+        return self._active
+
+    def invalidate(self):
+        """Ask the runtime to call render() on its next frame"""
+        self._needs_render = True
+
+    def show_toast(self, message_lines, title="", duration_ms=1500):
+        """Show a message over the app for duration_ms, input and ticks are paused meanwhile"""
+        self._toast_lines = message_lines
+        self._toast_title = title
+        self._toast_until = utime.ticks_add(utime.ticks_ms(), duration_ms)
+        self.invalidate()
+
+    def toast_active(self, now_ms):
+        if self._toast_lines is None:
+            return False
+        if utime.ticks_diff(now_ms, self._toast_until) >= 0:
+            self._toast_lines = None
+            self.invalidate()
+            return False
+        return True
+
+    def toast_deadline(self):
+        """ticks_ms at which the toast shown ends, None without a toast"""
+        return self._toast_until if self._toast_lines is not None else None
+
+    def needs_render(self):
+        return self._needs_render
+
+    def render_frame(self, now_ms):
+        """Called by the runtime every frame, draws the toast or the app if something changed"""
+        toast = self.toast_active(now_ms)
+        if not self._needs_render:
+            return
+        self._needs_render = False
+        if toast:
+            self.display.show_message(self._toast_lines, title=self._toast_title)
+        else:
+            self.render()
+
+    def _handle_input_for_menu(self, button, menu_items_count, current_selection):
+        if button == 'up':
             current_selection = (current_selection - 1 + menu_items_count) % menu_items_count
             if App._menu_buzzer_enabled:
                 self.buzzer.play_tone(NOTES['C5'], 30, duty_u16=8000)
-        elif self.buttons['down'].is_pressed():
+        elif button == 'down':
             current_selection = (current_selection + 1) % menu_items_count
             if App._menu_buzzer_enabled:
                 self.buzzer.play_tone(NOTES['C5'], 30, duty_u16=8000)
-        elif self.buttons['ok'].is_pressed():
+        elif button == 'ok':
             if App._menu_buzzer_enabled:
                 self.buzzer.play_tone(NOTES['E5'], 50, duty_u16=10000)
             return current_selection, True
+        self.invalidate()
         return current_selection, False
@@ -0,0 +1,31 @@
+from src.apps.app import App
+
+
+class LauncherApp(App):
+    """Main menu, asks the runtime to open the selected app"""
+
+    def __init__(self, display_manager, buttons, buzzer_control, apps_list, on_launch):
+        super().__init__(display_manager, buttons, buzzer_control)
+        self.apps_list = apps_list
+        self.app_titles = [app["name"] for app in apps_list]
+        self.on_launch = on_launch
+        self.current_selection = 0
+
+    def on_input(self, button):
+        if button == 'up':
+            self.current_selection = (self.current_selection - 1 + len(self.app_titles)) % len(self.app_titles)
+            if App._menu_buzzer_enabled:
+                self.buzzer.play_exit_sound()
+            self.invalidate()
+        elif button == 'down':
+            self.current_selection = (self.current_selection + 1) % len(self.app_titles)
+            if App._menu_buzzer_enabled:
+                self.buzzer.play_exit_sound()
+            self.invalidate()
+        elif button == 'ok':
+            if App._menu_buzzer_enabled:
+                self.buzzer.play_ok_sound()
+            self.on_launch(self.apps_list[self.current_selection])
+
+    def render(self):
+        self.display.draw_menu(self.app_titles, self.current_selection, title="MAIN MENU")
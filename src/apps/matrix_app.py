@@ -1,163 +1,257 @@
 import utime
 import machine
-import math
 
 from neopixel import NeoPixel
 
 from src.apps.app import App
-from src.constants import (COLOR_BLACK, COLOR_ORANGE, COLOR_RED, COLOR_YELLOW, EXPLOSION_EFFECT, MATRIX_DEFAULT_BRIGHTNESS, MATRIX_DIGIT_PATTERNS,
-                           MATRIX_HEIGHT, MATRIX_NUM_PIXELS, MATRIX_PIN_NUM, MATRIX_WIDTH, NOTES, OLED_WIDTH)
+from src.constants import (APP_TICK_MS, COLOR_ORANGE, MATRIX_BRIGHTNESS_LEVELS, MATRIX_DEFAULT_BRIGHTNESS, MATRIX_HEIGHT, MATRIX_NUM_PIXELS,
+                           MATRIX_PIN_NUM, MATRIX_WIDTH, NOTES, OLED_WIDTH)
+from src.matrix_animation import AnimationPlayer
+from src.matrix_frames import BOOM_ANIMATION, COUNTDOWN_ANIMATION
+from src.matrix_jobs import AnimationJob, PlasmaJob
+from src.matrix_renderer import MatrixRenderer
+from src.plasma import PlasmaEngine
+from src.songs import EXPLOSION_EFFECT
 
 
 class MatrixEffectsApp(App):  # Functional sounds, menu sounds handled by base
 
     PLASMA_SOUND_FREQ = NOTES['C3']
+    PLASMA_DURATION_MS = 10000
+    END_WAIT_MS = 5000
+    _brightness = MATRIX_DEFAULT_BRIGHTNESS
 
     def __init__(self, display_manager, buttons, buzzer_control):
         super().__init__(display_manager, buttons, buzzer_control)
-        self.menu_items = ["9-0 Counter", "Plasma (10s)", "Back"]
+        if App.settings is not None:
+            level = App.settings.get("matrix.level", -1)
+            if 0 <= level < len(MATRIX_BRIGHTNESS_LEVELS):
+                MatrixEffectsApp._brightness = MATRIX_BRIGHTNESS_LEVELS[level]
+        self.menu_items = []
+        self._update_menu_text()
         self.current_selection = 0
         self.matrix = None
+        self.renderer = None
+        self.player = None
+        self.plasma = None
+        self._plasma_lut_version = 0
+        self.tick_ms = APP_TICK_MS
+        self.state = "MENU"
+        self._state_deadline = 0
+        self._countdown_value = 9
+        self._shown_fps = -1
+        self._end_lines = None
+        self.worker = App.worker
+        self._job = None
+        self._shown_frame = -1
         try:
             self.matrix = NeoPixel(machine.Pin(MATRIX_PIN_NUM), MATRIX_NUM_PIXELS)
+            self.renderer = MatrixRenderer(self.matrix, MatrixEffectsApp._brightness)
+            self.player = AnimationPlayer(self.renderer)
             self._clear_matrix()
         except Exception as e:
             print(f"Error initializing LED Matrix: {e}")
-            self.display.show_message(["Matrix Error!", "Check Pin/Lib"], title="ERROR", duration_s=3)
 
-    def _neo_set_grb(self, index, r, g, b):
-        if self.matrix:
-            br = int(r*MATRIX_DEFAULT_BRIGHTNESS)
-            bg = int(g*MATRIX_DEFAULT_BRIGHTNESS)
-            bb = int(b*MATRIX_DEFAULT_BRIGHTNESS)
-            self.matrix[index] = (max(0, min(255, bg)), max(0, min(255, br)), max(0, min(255, bb)))
+    def _update_menu_text(self):
+        self.menu_items = ["9-0 Counter", "Plasma (10s)", f"Bright: {int(MatrixEffectsApp._brightness * 100)}%", "Back"]
 
-    def _xy_to_neo(self, x, y): return y*MATRIX_WIDTH + x if 0 <= x < MATRIX_WIDTH and 0 <= y < MATRIX_HEIGHT else -1
+    def _cycle_brightness(self):
+        levels = MATRIX_BRIGHTNESS_LEVELS
+        idx = levels.index(MatrixEffectsApp._brightness) if MatrixEffectsApp._brightness in levels else -1
+        idx = (idx + 1) % len(levels)
+        MatrixEffectsApp._brightness = levels[idx]
+        self.renderer.set_brightness(MatrixEffectsApp._brightness)
+        if App.settings is not None:
+            App.settings.set("matrix.level", idx)  # the index, a float would not read back exactly
+        self._update_menu_text()
+        # preview the new level on the matrix
+        self.renderer.fill(*COLOR_ORANGE)
+        self.renderer.show()
 
     def _clear_matrix(self):
-        if self.matrix:
-            for i in range(MATRIX_NUM_PIXELS):
-                self._neo_set_grb(i, 0, 0, 0)
-            self.matrix.write()
+        if self.renderer:
+            self.renderer.clear()
+            self.renderer.show()
 
-    def _draw_digit(self, digit_val, color_rgb):
-        if not self.matrix:
-            return
-        for i in range(MATRIX_NUM_PIXELS):
-            self._neo_set_grb(i, *COLOR_BLACK)
-        pattern = MATRIX_DIGIT_PATTERNS.get(digit_val)
-        if pattern:
-            for y, row in enumerate(pattern):
-                for x, pixel_on in enumerate(row):
-                    if pixel_on:
-                        idx = self._xy_to_neo(x, y)
-                        if idx != -1:
-                            self._neo_set_grb(idx, *color_rgb)
-        self.matrix.write()
-
-    def _run_countdown(self):
+    def _on_countdown_frame(self, index):
+        self._countdown_value = 9 - index
+        self.invalidate()
+        self.buzzer.play_tone(NOTES['C5'], 150, duty_u16=16384)  # Functional sound
+
+    def _post(self, job):
+        """Hand job to the worker, the renderer belongs to it until job.is_done()"""
+        if not self.worker.post(job):
+            self.show_toast("Worker busy", title="Error", duration_ms=1000)
+            self._set_state("MENU")
+            return False
+        self._job = job
+        return True
+
+    def _cancel_job(self):
+        """Cancel the running job, True if the matrix can be drawn to right away.
+
+        A job cancelled on core 1 stops on the worker's next pass and clears the matrix
+        itself in finish(), so the caller must not draw until then.
+        """
+        job = self._job
+        self._job = None
+        if job is None:
+            return True
+        self.worker.cancel(job)
+        return job.is_done()
+
+    def _set_state(self, state, duration_ms=0):
+        self.state = state
+        self._state_deadline = utime.ticks_add(utime.ticks_ms(), duration_ms)
+        self.invalidate()
+
+    def _start_countdown(self):
         if not self.matrix:
-            self.display.show_message("Matrix N/A", title="Error", duration_s=2)
+            self.show_toast("Matrix N/A", title="Error", duration_ms=2000)
             return
-        self.display.show_message("Countdown!", title="Matrix FX", duration_s=1, clear_after=True)
-        for i in range(9, -1, -1):
-            self.display.clear()
-            self.display.text(f"Countdown: {i}", 20, 25)
-            self.display.show()
-            self._draw_digit(i, COLOR_RED)
-            self.buzzer.play_tone(NOTES['C5'], 150, duty_u16=16384)  # Functional sound
-            utime.sleep_ms(850)
-        self.buzzer._deinit_pwm()
-        self._clear_matrix()
-        self.display.clear()
-        self.display.text("BOOM!", (OLED_WIDTH-5*8)//2, 25)
-        self.display.show()
-        flash_colors = [COLOR_RED, COLOR_ORANGE, COLOR_YELLOW, COLOR_BLACK]
-        for _ in range(3):
-            for color_rgb in flash_colors:
-                if self.matrix:
-                    for k in range(MATRIX_NUM_PIXELS):
-                        self._neo_set_grb(k, *color_rgb)
-                    self.matrix.write()
-                utime.sleep_ms(100 if color_rgb != COLOR_BLACK else 70)
-        self.buzzer.play_song(EXPLOSION_EFFECT)
-        self._clear_matrix()
-        utime.sleep(1)
-        self.display.show_message("Press OK", title="Effect End", duration_s=0, clear_after=False)  # No auto clear
-        start_wait_time = utime.ticks_ms()
-        while utime.ticks_diff(utime.ticks_ms(), start_wait_time) < 5000:
-            self.buttons['ok'].update()
-            if self.buttons['ok'].is_pressed():
-                if App._menu_buzzer_enabled and self.buzzer:
-                    self.buzzer.play_tone(NOTES['E5'], 50, duty_u16=10000)
-                break
-            utime.sleep_ms(20)
-        self._clear_matrix()
+        self.show_toast("Countdown!", title="Matrix FX", duration_ms=1000)
+        self._set_state("COUNTDOWN_INTRO")
 
-    def _run_plasma(self):
+    def _start_plasma(self):
         if not self.matrix:
-            self.display.show_message("Matrix N/A", title="Error", duration_s=2)
+            self.show_toast("Matrix N/A", title="Error", duration_ms=2000)
             return
-        self.display.show_message("Plasma!", title="Matrix FX", duration_s=1.5, clear_after=True)
+        self.show_toast("Plasma!", title="Matrix FX", duration_ms=1500)
+        self._set_state("PLASMA_INTRO")
+
+    def _begin_plasma(self):
         self.buzzer.start_tone(self.PLASMA_SOUND_FREQ, duty_u16=8000)  # Functional sound
-        start_ms = utime.ticks_ms()
-        duration_ms = 10000
-        time_val = 0.0
-        sx, sy, sd, sp = 0.9, 0.9, 0.7, 0.15
-        while utime.ticks_diff(utime.ticks_ms(), start_ms) < duration_ms:
-            for y in range(MATRIX_HEIGHT):
-                for x in range(MATRIX_WIDTH):
-                    v = math.sin(x*sx+time_val) + math.sin(y*sy+time_val) + math.sin((x+y)*sd+time_val)
-                    r = int((math.sin(v*math.pi)+1)*127.5)
-                    g = int((math.sin(v*math.pi+2*math.pi/3)+1)*127.5)
-                    b = int((math.sin(v*math.pi+4*math.pi/3)+1)*127.5)
-                    idx = self._xy_to_neo(x, y)
-                    if idx != -1:
-                        self._neo_set_grb(idx, r, g, b)
-            self.matrix.write()
-            time_val += sp
-            utime.sleep_ms(40)
-            self.buttons['ok'].update()
-            if self.buttons['ok'].is_pressed():
-                if App._menu_buzzer_enabled and self.buzzer:
-                    self.buzzer.play_tone(NOTES['E5'], 50, duty_u16=10000)  # OK to exit plasma
-                break
+        if self.plasma is None:
+            self.plasma = PlasmaEngine(MATRIX_WIDTH, MATRIX_HEIGHT, self.renderer.lut)
+            self._plasma_lut_version = self.renderer.version
+        elif self._plasma_lut_version != self.renderer.version:
+            self.plasma.set_lut(self.renderer.lut)
+            self._plasma_lut_version = self.renderer.version
+        self._shown_fps = -1
+        if self._post(PlasmaJob(self.plasma, self.renderer, self.PLASMA_DURATION_MS)):
+            self._set_state("PLASMA")
+
+    def _end_plasma(self):
+        cleared = self._cancel_job()
         self.buzzer.stop_tone()
+        if cleared:
+            self._clear_matrix()
+        self._end_lines = ["Plasma End", "Press OK"]
+        self._set_state("END_WAIT", self.END_WAIT_MS)
+
+    def _back_to_menu(self):
         self._clear_matrix()
-        self.display.show_message(["Plasma End", "Press OK"], title="Effect End", duration_s=0, clear_after=False)  # No auto clear
-        start_wait_time = utime.ticks_ms()
-        while utime.ticks_diff(utime.ticks_ms(), start_wait_time) < 5000:
-            self.buttons['ok'].update()
-            if self.buttons['ok'].is_pressed():
-                if App._menu_buzzer_enabled and self.buzzer:
-                    self.buzzer.play_tone(NOTES['E5'], 50, duty_u16=10000)
-                break
-            utime.sleep_ms(20)
-        self._clear_matrix()
+        self._set_state("MENU")
 
-    def run(self):
-        self._active = True
+    def on_enter(self):
+        super().on_enter()
         if not self.matrix and self.menu_items[0] != "Back":
             self.menu_items = ["Matrix N/A", "Back"]
             self.current_selection = 0
-        while self._active:
-            for btn_obj in self.buttons.values():
-                btn_obj.update()
-            self.display.draw_menu(self.menu_items, self.current_selection, title="Matrix Effects")
-            new_selection, ok_pressed = self._handle_input_for_menu(len(self.menu_items), self.current_selection)
-            self.current_selection = new_selection
+            self.show_toast(["Matrix Error!", "Check Pin/Lib"], title="ERROR", duration_ms=3000)
+        self.state = "MENU"
+
+    def on_input(self, button):
+        if self.state == "MENU":
+            self.current_selection, ok_pressed = self._handle_input_for_menu(button, len(self.menu_items), self.current_selection)
             if ok_pressed:
                 selected_title = self.menu_items[self.current_selection]
                 if selected_title == "Back":
                     self.stop()
                 elif selected_title == "9-0 Counter":
-                    self._run_countdown()
+                    self._start_countdown()
                 elif selected_title == "Plasma (10s)":
-                    self._run_plasma()
+                    self._start_plasma()
+                elif selected_title.startswith("Bright:"):
+                    self._cycle_brightness()
+                    self.invalidate()
                 elif selected_title == "Matrix N/A":
                     pass
-            utime.sleep_ms(50)
+        elif button == 'ok' and self.state in ("PLASMA", "END_WAIT"):
+            if App._menu_buzzer_enabled and self.buzzer:
+                self.buzzer.play_tone(NOTES['E5'], 50, duty_u16=10000)
+            if self.state == "PLASMA":
+                self._end_plasma()
+            else:
+                self._back_to_menu()
 
-    def stop(self):
-        super().stop()
-        self._clear_matrix()
+    def on_tick(self, now_ms):
+        state = self.state
+        if state == "COUNTDOWN_INTRO":
+            self._countdown_value = 9
+            self._shown_frame = -1
+            if self._post(AnimationJob(self.player, COUNTDOWN_ANIMATION)):
+                self._set_state("COUNTDOWN")
+        elif state == "COUNTDOWN":
+            job = self._job
+            if job.frame != self._shown_frame:
+                self._shown_frame = job.frame
+                self._on_countdown_frame(job.frame)
+            if job.is_done():
+                self._job = None
+                self.buzzer.stop_tone()
+                self._clear_matrix()
+                if self._post(AnimationJob(self.player, BOOM_ANIMATION)):
+                    self._set_state("BOOM")
+        elif state == "BOOM":
+            if self._job.is_done():
+                self._job = None
+                self.buzzer.play_song(EXPLOSION_EFFECT)
+                self._set_state("EXPLOSION")
+        elif state == "EXPLOSION":
+            if not self.buzzer.is_busy():
+                self._clear_matrix()
+                self._set_state("END_PAUSE", 1000)
+        elif state == "PLASMA":
+            if self._job.is_done():
+                self._end_plasma()
+            elif self.plasma.fps != self._shown_fps:
+                self._shown_fps = self.plasma.fps
+                self.invalidate()
+        elif utime.ticks_diff(now_ms, self._state_deadline) < 0:
+            pass
+        elif state == "PLASMA_INTRO":
+            self._begin_plasma()
+        elif state == "END_PAUSE":
+            self._end_lines = "Press OK"
+            self._set_state("END_WAIT", self.END_WAIT_MS)
+        elif state == "END_WAIT":
+            self._back_to_menu()
+
+    def next_tick(self, last_tick_ms):
+        state = self.state
+        if state == "MENU":
+            return None
+        if state in ("COUNTDOWN", "BOOM", "EXPLOSION", "PLASMA"):
+            return utime.ticks_add(last_tick_ms, self.tick_ms)  # poll the job / the buzzer
+        return self._state_deadline
+
+    def on_exit(self):
+        super().on_exit()
+        if self._cancel_job():
+            self._clear_matrix()
+
+    def on_destroy(self):
+        if self._cancel_job():
+            self._clear_matrix()
+        self.plasma = None
+
+    def render(self):
+        state = self.state
+        if state == "MENU":
+            self.display.draw_menu(self.menu_items, self.current_selection, title="Matrix Effects")
+        elif state == "COUNTDOWN":
+            self.display.clear()
+            self.display.text(f"Countdown: {self._countdown_value}", 20, 25)
+            self.display.show()
+        elif state in ("BOOM", "EXPLOSION", "END_PAUSE"):
+            self.display.clear()
+            self.display.text("BOOM!", (OLED_WIDTH-5*8)//2, 25)
+            self.display.show()
+        elif state == "END_WAIT":
+            self.display.show_message(self._end_lines, title="Effect End")
+        elif state == "PLASMA":
+            self.display.show_message(["Plasma!", f"{self._shown_fps} fps", "OK: Stop"], title="Matrix FX")
+        else:
+            self.display.clear()
+            self.display.show()
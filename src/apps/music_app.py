@@ -1,8 +1,10 @@
 import utime
 
 from src.apps.app import App
+from src.constants import APP_TICK_MS
 
-from src.constants import BIRTHDAY_MELODY, IMPERIAL_MARCH_MELODY, PIRATES_MELODY
+from src.song_loader import iter_song_file, load_song_index
+from src.songs import BIRTHDAY_MELODY, IMPERIAL_MARCH_MELODY, PIRATES_MELODY
 
 
 class MusicApp(App):
@@ -14,17 +16,32 @@ class MusicApp(App):
             {"title": "Pirates", "data": PIRATES_MELODY},
             {"title": "Birthday", "data": BIRTHDAY_MELODY},
         ]
+        # songs on flash are listed from the index and only streamed when played
+        for title, path in load_song_index():
+            self.songs.append({"title": title, "path": path})
         self.menu_items = [song["title"] for song in self.songs] + ["Back"]
         self.current_selection = 0
+        self.state = "MENU"
+        self.shown_pos = -1
+        self.finished_ms = 0
 
-    def run(self):
-        self._active = True
-        while self._active:
-            for btn_obj in self.buttons.values():
-                btn_obj.update()
-            self.display.draw_menu(self.menu_items, self.current_selection, title="Music Menu")
-            new_selection, ok_pressed = self._handle_input_for_menu(len(self.menu_items), self.current_selection)
-            self.current_selection = new_selection
+    def _play_song(self, song):
+        """Start song in the background, progress is drawn until it ends or OK stops it"""
+        self.show_toast(f"Playing: {song['title']}", title="Music", duration_ms=100)
+        if "path" in song:
+            self.buzzer.play_stream(iter_song_file(song["path"]))
+        else:
+            self.buzzer.play_song(song["data"])
+        self.shown_pos = -1
+        self.state = "PLAYING"
+
+    def on_enter(self):
+        super().on_enter()
+        self.state = "MENU"
+
+    def on_input(self, button):
+        if self.state == "MENU":
+            self.current_selection, ok_pressed = self._handle_input_for_menu(button, len(self.menu_items), self.current_selection)
             if ok_pressed:
                 selected_item_title = self.menu_items[self.current_selection]
                 if selected_item_title == "Back":
@@ -32,13 +49,49 @@ class MusicApp(App):
                 else:
                     song_to_play = next((s for s in self.songs if s["title"] == selected_item_title), None)
                     if song_to_play:
-                        self.display.show_message(f"Playing: {song_to_play['title']}", title="Music", duration_s=0.1, clear_after=False)
-                        self.buzzer.play_song(song_to_play["data"], self.display)
-                        self.display.show_message(["Song finished!", "Press OK."], title="Music")
-                        start_wait_time = utime.ticks_ms()
-                        while utime.ticks_diff(utime.ticks_ms(), start_wait_time) < 5000:
-                            self.buttons['ok'].update()
-                            if self.buttons['ok'].is_pressed():
-                                break
-                            utime.sleep_ms(20)
-            utime.sleep_ms(50)
+                        self._play_song(song_to_play)
+        elif self.state == "PLAYING":
+            if button == 'ok':
+                self.buzzer.stop_song()
+                if App._menu_buzzer_enabled:
+                    self.buzzer.play_ok_sound()
+                self.state = "MENU"
+                self.invalidate()
+        elif self.state == "FINISHED":
+            if button == 'ok':
+                self.state = "MENU"
+                self.invalidate()
+
+    def on_tick(self, now_ms):
+        if self.state == "PLAYING":
+            pos = self.buzzer.song_position()
+            if not pos:
+                self.state = "FINISHED"
+                self.finished_ms = now_ms
+                self.invalidate()
+            elif pos != self.shown_pos:
+                self.shown_pos = pos
+                self.invalidate()
+        elif self.state == "FINISHED" and utime.ticks_diff(now_ms, self.finished_ms) >= 5000:
+            self.state = "MENU"
+            self.invalidate()
+
+    def next_tick(self, last_tick_ms):
+        if self.state == "PLAYING":
+            return utime.ticks_add(last_tick_ms, APP_TICK_MS)  # follow the song position
+        if self.state == "FINISHED":
+            return utime.ticks_add(self.finished_ms, 5000)
+        return None
+
+    def render(self):
+        if self.state == "MENU":
+            self.display.draw_menu(self.menu_items, self.current_selection, title="Music Menu")
+        elif self.state == "PLAYING":
+            self.display.clear()
+            self.display.text("Playing...", 20, 20)
+            song_len = self.buzzer.song_length()
+            self.display.text(f"Note {self.shown_pos}/{song_len}" if song_len else f"Note {self.shown_pos}", 20, 30)
+            self.display.text("OK: Stop", 20, 50)
+            self.display.show()
+        elif self.state == "FINISHED":
+            self.display.show_message(["Song finished!", "Press OK."], title="Music")
@@ -1,47 +1,96 @@
-import utime
-
 from src.apps.app import App
-from src.constants import NOTES
+from src.constants import NOTES, OLED_HEIGHT
+
+PAGE_ROWS = (OLED_HEIGHT - 12) // 10
 
 
 class SettingsApp(App):
+    """Settings menu, plus report pages for App.profiler and App.memory when they are set up.
+
+    A page source has header(), lines() and report(); the page scrolls with UP/DOWN and OK
+    prints the full report over serial.
+    """
+
     def __init__(self, display_manager, buttons, buzzer_control):
         super().__init__(display_manager, buttons, buzzer_control)
         self.menu_items = []
         self.current_selection = 0
+        self.state = "MENU"
+        self._page_source = None
+        self._page_lines = []
+        self._page_top = 0
         self._update_menu_text()  # Initial setup of menu text
 
     def _update_menu_text(self):
         sound_status = "ON" if App._menu_buzzer_enabled else "OFF"
-        self.menu_items = [f"Sounds: {sound_status}", "Back"]
+        self.menu_items = [f"Sounds: {sound_status}"]
+        if App.profiler is not None:
+            self.menu_items.append("Profiler")
+        if App.memory is not None:
+            self.menu_items.append("Memory")
+        self.menu_items.append("Back")
 
-    def run(self):
-        self._active = True
+    def on_enter(self):
+        super().on_enter()
         self.current_selection = 0  # Reset selection when app starts
+        self.state = "MENU"
         self._update_menu_text()   # Ensure menu text is current
 
-        while self._active:
-            for btn_obj in self.buttons.values():
-                btn_obj.update()
-
-            self._update_menu_text()  # Keep text updated if it could change (though it only changes on OK press here)
-            self.display.draw_menu(self.menu_items, self.current_selection, title="Settings")
-
-            # Use a local version of _handle_input_for_menu or manage sounds carefully
-            # For simplicity, we'll rely on the base _handle_input_for_menu for navigation sounds (if enabled)
-            # and add a specific sound for the toggle action.
-            new_selection, ok_pressed = self._handle_input_for_menu(len(self.menu_items), self.current_selection)
-            self.current_selection = new_selection
-
-            if ok_pressed:
-                selected_title = self.menu_items[self.current_selection]
-                if selected_title.startswith("Sounds:"):
-                    App._menu_buzzer_enabled = not App._menu_buzzer_enabled
-                    # Play a distinct confirmation sound that is NOT subject to the setting itself
-                    if self.buzzer:
-                        self.buzzer.play_tone(NOTES['A4'] if App._menu_buzzer_enabled else NOTES['G4'], 70, duty_u16=10000)
-                    self._update_menu_text()  # Update the menu item text immediately
-                elif selected_title == "Back":
-                    self.stop()
-
-            utime.sleep_ms(50)
+    def _open_page(self, source):
+        self._page_source = source
+        self._page_lines = source.lines()
+        self._page_top = 0
+        self.state = "PAGE"
+        self.invalidate()
+
+    def _input_page(self, button):
+        if button == 'ok':
+            if App._menu_buzzer_enabled and self.buzzer:
+                self.buzzer.play_tone(NOTES['E5'], 50, duty_u16=10000)
+            self._page_source.report()
+            self.state = "MENU"
+        else:
+            if App._menu_buzzer_enabled and self.buzzer:
+                self.buzzer.play_tone(NOTES['C5'], 30, duty_u16=8000)
+            last_top = max(0, len(self._page_lines) - PAGE_ROWS)
+            step = -1 if button == 'up' else 1
+            self._page_top = min(max(self._page_top + step, 0), last_top)
+        self.invalidate()
+
+    def on_input(self, button):
+        if self.state == "PAGE":
+            self._input_page(button)
+            return
+        # The base _handle_input_for_menu plays the navigation sounds (if enabled),
+        # the toggle action gets its own sound below.
+        self.current_selection, ok_pressed = self._handle_input_for_menu(button, len(self.menu_items), self.current_selection)
+        if ok_pressed:
+            selected_title = self.menu_items[self.current_selection]
+            if selected_title.startswith("Sounds:"):
+                App._menu_buzzer_enabled = not App._menu_buzzer_enabled
+                if App.settings is not None:
+                    App.settings.set("sounds", App._menu_buzzer_enabled)
+                # Play a distinct confirmation sound that is NOT subject to the setting itself
+                if self.buzzer:
+                    self.buzzer.play_tone(NOTES['A4'] if App._menu_buzzer_enabled else NOTES['G4'], 70, duty_u16=10000)
+                self._update_menu_text()  # Update the menu item text immediately
+                self.invalidate()
+            elif selected_title == "Profiler":
+                self._open_page(App.profiler)
+            elif selected_title == "Memory":
+                self._open_page(App.memory)
+            elif selected_title == "Back":
+                self.stop()
+
+    def render(self):
+        if self.state == "PAGE":
+            self.display.clear()
+            self.display.text(self._page_source.header(), 0, 0)
+            lines = self._page_lines[self._page_top:self._page_top + PAGE_ROWS]
+            for i, line in enumerate(lines):
+                self.display.text(line, 0, 12 + i * 10)
+            if not lines:
+                self.display.text("No samples yet", 0, 12)
+            self.display.show()
+            return
+        self.display.draw_menu(self.menu_items, self.current_selection, title="Settings")
@@ -1,5 +1,3 @@
-import utime
-
 from src.apps.app import App
 from src.constants import NOTES, OLED_HEIGHT, OLED_WIDTH
 
@@ -10,6 +8,9 @@ class TelephoneApp(App):
 
     def __init__(self, display_manager, buttons, buzzer_control):
         super().__init__(display_manager, buttons, buzzer_control)
+        if App.settings is not None and App.settings.get("phone.number"):
+            TelephoneApp._phone_number_str = App.settings.get("phone.number")
+            TelephoneApp._number_is_set = True
         self.state = "MENU"
         self.items = []
         self._update_menu()
@@ -60,75 +61,81 @@ class TelephoneApp(App):
         self.display.text(f"{np}No", OLED_WIDTH//2+10, 40)
         self.display.show()
 
-    def run(self):
-        self._active = True
+    def on_enter(self):
+        super().on_enter()
         self.state = "MENU"
         self._update_menu()
         self.sel = 0
-        while self._active:
-            for btn in self.buttons.values():
-                btn.update()
-            if self.state == "MENU":
-                self.display.draw_menu(self.items, self.sel, title="Telephone")
-                new_sel, ok = self._handle_input_for_menu(len(self.items), self.sel)
-                self.sel = new_sel
-                if ok:
-                    st = self.items[self.sel]
-                    if st == "View Number":
-                        self.state = "VIEW_NUMBER"
-                    elif st == "Set Number" or st == "Edit Number":
-                        self.tmp_digits = list(TelephoneApp._phone_number_str)
-                        self.edit_idx = 0
-                        self.state = "SET_DIGIT"
-                    elif st == "Back":
-                        self.stop()
-            elif self.state == "VIEW_NUMBER":
-                self._disp_num_view()
-                if self.buttons['ok'].is_pressed():
-                    if App._menu_buzzer_enabled and self.buzzer:
-                        self.buzzer.play_tone(NOTES['E5'], 50, duty_u16=10000)
-                    self.state = "MENU"
-            elif self.state == "SET_DIGIT":
-                self._disp_set_num_ui()
-                if self.buttons['up'].is_pressed():
-                    cv = int(self.tmp_digits[self.edit_idx] if self.tmp_digits[self.edit_idx] != ' ' else '0')
-                    self.tmp_digits[self.edit_idx] = str((cv+1) % 10)
-                    if App._menu_buzzer_enabled and self.buzzer:
-                        self.buzzer.play_tone(NOTES['C5'], 30, duty_u16=8000)
-                elif self.buttons['down'].is_pressed():
-                    cv = int(self.tmp_digits[self.edit_idx] if self.tmp_digits[self.edit_idx] != ' ' else '0')
-                    self.tmp_digits[self.edit_idx] = str((cv-1+10) % 10)
-                    if App._menu_buzzer_enabled and self.buzzer:
-                        self.buzzer.play_tone(NOTES['C5'], 30, duty_u16=8000)
-                elif self.buttons['ok'].is_pressed():
-                    if App._menu_buzzer_enabled and self.buzzer:
-                        self.buzzer.play_tone(NOTES['E5'], 40, duty_u16=9000)
-                    if self.tmp_digits[self.edit_idx] == ' ':
-                        self.tmp_digits[self.edit_idx] = '0'
-                    if self.edit_idx < 8:
-                        self.edit_idx += 1
-                    else:
-                        self.state = "CONFIRM_SAVE"
-                        self.confirm_choice = 0
-            elif self.state == "CONFIRM_SAVE":
-                self._disp_confirm_ui()
-                if self.buttons['up'].is_pressed() or self.buttons['down'].is_pressed():
-                    self.confirm_choice = 1 - self.confirm_choice
-                    if App._menu_buzzer_enabled and self.buzzer:
-                        self.buzzer.play_tone(NOTES['C5'], 30, duty_u16=8000)
-                elif self.buttons['ok'].is_pressed():
-                    if App._menu_buzzer_enabled and self.buzzer:
-                        self.buzzer.play_tone(NOTES['G5'], 60, duty_u16=12000)  # Save/Cancel confirm sound
-                    if self.confirm_choice == 0:
-                        for i in range(9):
-                            if self.tmp_digits[i] == ' ':
-                                self.tmp_digits[i] = '0'
-                        TelephoneApp._phone_number_str = "".join(self.tmp_digits)
-                        TelephoneApp._number_is_set = True
-                        self.display.show_message("Number Saved!", "Telephone", 1.5)
-                    else:
-                        self.display.show_message("Not Saved", "Telephone", 1.5)
-                    self.state = "MENU"
-                    self._update_menu()
-                    self.sel = 0
-            utime.sleep_ms(50)
+
+    def on_input(self, button):
+        if self.state == "MENU":
+            self.sel, ok = self._handle_input_for_menu(button, len(self.items), self.sel)
+            if ok:
+                st = self.items[self.sel]
+                if st == "View Number":
+                    self.state = "VIEW_NUMBER"
+                elif st == "Set Number" or st == "Edit Number":
+                    self.tmp_digits = list(TelephoneApp._phone_number_str)
+                    self.edit_idx = 0
+                    self.state = "SET_DIGIT"
+                elif st == "Back":
+                    self.stop()
+        elif self.state == "VIEW_NUMBER":
+            if button == 'ok':
+                if App._menu_buzzer_enabled and self.buzzer:
+                    self.buzzer.play_tone(NOTES['E5'], 50, duty_u16=10000)
+                self.state = "MENU"
+        elif self.state == "SET_DIGIT":
+            if button == 'up':
+                cv = int(self.tmp_digits[self.edit_idx] if self.tmp_digits[self.edit_idx] != ' ' else '0')
+                self.tmp_digits[self.edit_idx] = str((cv+1) % 10)
+                if App._menu_buzzer_enabled and self.buzzer:
+                    self.buzzer.play_tone(NOTES['C5'], 30, duty_u16=8000)
+            elif button == 'down':
+                cv = int(self.tmp_digits[self.edit_idx] if self.tmp_digits[self.edit_idx] != ' ' else '0')
+                self.tmp_digits[self.edit_idx] = str((cv-1+10) % 10)
+                if App._menu_buzzer_enabled and self.buzzer:
+                    self.buzzer.play_tone(NOTES['C5'], 30, duty_u16=8000)
+            elif button == 'ok':
+                if App._menu_buzzer_enabled and self.buzzer:
+                    self.buzzer.play_tone(NOTES['E5'], 40, duty_u16=9000)
+                if self.tmp_digits[self.edit_idx] == ' ':
+                    self.tmp_digits[self.edit_idx] = '0'
+                if self.edit_idx < 8:
+                    self.edit_idx += 1
+                else:
+                    self.state = "CONFIRM_SAVE"
+                    self.confirm_choice = 0
+        elif self.state == "CONFIRM_SAVE":
+            if button == 'up' or button == 'down':
+                self.confirm_choice = 1 - self.confirm_choice
+                if App._menu_buzzer_enabled and self.buzzer:
+                    self.buzzer.play_tone(NOTES['C5'], 30, duty_u16=8000)
+            elif button == 'ok':
+                if App._menu_buzzer_enabled and self.buzzer:
+                    self.buzzer.play_tone(NOTES['G5'], 60, duty_u16=12000)  # Save/Cancel confirm sound
+                if self.confirm_choice == 0:
+                    for i in range(9):
+                        if self.tmp_digits[i] == ' ':
+                            self.tmp_digits[i] = '0'
+                    TelephoneApp._phone_number_str = "".join(self.tmp_digits)
+                    TelephoneApp._number_is_set = True
+                    if App.settings is not None:
+                        App.settings.set("phone.number", TelephoneApp._phone_number_str)
+                    self.show_toast("Number Saved!", "Telephone")
+                else:
+                    self.show_toast("Not Saved", "Telephone")
+                self.state = "MENU"
+                self._update_menu()
+                self.sel = 0
+        self.invalidate()
+
+    def render(self):
+        if self.state == "MENU":
+            self.display.draw_menu(self.items, self.sel, title="Telephone")
+        elif self.state == "VIEW_NUMBER":
+            self._disp_num_view()
+        elif self.state == "SET_DIGIT":
+            self._disp_set_num_ui()
+        elif self.state == "CONFIRM_SAVE":
+            self._disp_confirm_ui()
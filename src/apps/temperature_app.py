@@ -1,116 +1,108 @@
+from src.apps.app import App
+from src.constants import NOTES, OLED_HEIGHT, OLED_WIDTH
+from src.temp_sampler import centi_c_to_f
 
-import utime
-import machine
+GRAPH_TOP = 12
+GRAPH_BOTTOM = OLED_HEIGHT - 1
+MIN_GRAPH_SPAN = 100  # 1.00 C, keeps sensor noise from filling the whole graph
 
-from src.apps.app import App
-from src.constants import NOTES, OLED_WIDTH, TEMP_SENSOR_ADC_CHANNEL, TEMPERATURE_OFFSET
+
+def _fmt(centi):
+    return f"{centi / 100:.1f}"
 
 
 class TemperatureApp(App):
+    """Shows the background TemperatureSampler's latest value, its stats and a history graph.
+
+    Nothing is read here: the sampler runs from a TimeService alarm and on_sample only
+    invalidates the screen, so the readout is up to date the moment the app opens.
+    """
     def __init__(self, display_manager, buttons, buzzer_control):
         super().__init__(display_manager, buttons, buzzer_control)
-        self.state = "IDLE"
-        self.temp_c = 0.0
-        self.temp_f = 0.0
-        try:
-            self.sensor_temp = machine.ADC(TEMP_SENSOR_ADC_CHANNEL)
-        except Exception as e:
-            print(f"Error initializing temperature sensor: {e}")
-            self.sensor_temp = None
+        self.sampler = App.temp_sampler
+        self.state = "READOUT"
+        self._on_sample_cb = self.invalidate
+        if self.sampler is None or self.sampler.adc is None:
             self.state = "ERROR"
 
-    def _read_temperature(self):
-        if self.sensor_temp is None:
-            return False, 0.0, 0.0
-        try:
-            adc_value = self.sensor_temp.read_u16()
-            adc_voltage = adc_value * (3.3 / 65535)
-            temp_c_raw = 27.0 - (adc_voltage - 0.706) / 0.001721
-            self.temp_c = round(temp_c_raw - TEMPERATURE_OFFSET, 1)
-            self.temp_f = round(self.temp_c * 9/5 + 32, 1)
-            return True, self.temp_c, self.temp_f
-        except Exception as e:
-            print(f"Error reading temperature: {e}")
-            return False, 0.0, 0.0
+    def on_enter(self):
+        super().on_enter()
+        if self.state == "ERROR":
+            return
+        self.state = "READOUT"
+        self.sampler.on_sample = self._on_sample_cb
+
+    def on_exit(self):
+        super().on_exit()
+        if self.sampler is not None and self.sampler.on_sample is self._on_sample_cb:
+            self.sampler.on_sample = None
+
+    def _beep_ok(self):
+        if App._menu_buzzer_enabled and self.buzzer:
+            self.buzzer.play_tone(NOTES['E5'], 50, duty_u16=10000)
 
-    def run(self):
-        self._active = True
+    def _beep_nav(self):
+        if App._menu_buzzer_enabled and self.buzzer:
+            self.buzzer.play_tone(NOTES['C5'], 30, duty_u16=8000)
+
+    def on_input(self, button):
+        if button == 'ok':
+            self._beep_ok()
+            self.stop()
+            return
         if self.state == "ERROR":
-            self.display.show_message(["Temp Sensor", "Error!", "Press OK"], title="ERROR")
-            while self._active:
-                self.buttons['ok'].update()
-                if self.buttons['ok'].is_pressed():
-                    if App._menu_buzzer_enabled and self.buzzer:
-                        self.buzzer.play_tone(NOTES['E5'], 50, duty_u16=10000)
-                    self.stop()
-                utime.sleep_ms(50)
             return
+        self._beep_nav()
+        if self.state == "READOUT" and button == 'down':
+            if not self.sampler.sample():  # invalidates through on_sample when it works
+                self.show_toast(["Read Error"], title="Temp", duration_ms=2000)
+            return
+        self.state = "GRAPH" if self.state == "READOUT" else "READOUT"
+        self.invalidate()
+
+    def render(self):
+        if self.state == "ERROR":
+            self.display.show_message(["Temp Sensor", "Error!", "Press OK"], title="ERROR")
+        elif self.sampler.count == 0:
+            self.display.show_message(["No samples", "OK: Exit"], title="Temp")
+        elif self.state == "READOUT":
+            self._render_readout()
+        else:
+            self._render_graph()
+
+    def _render_readout(self):
+        s = self.sampler
+        temp_str_c = f"{_fmt(s.latest)}C"
+        temp_str_f = f"{_fmt(centi_c_to_f(s.latest))}F"
+        combined_str = f"{temp_str_c} / {temp_str_f}"
+        self.display.clear()
+        self.display.text("Temperature:", (OLED_WIDTH - 12*8)//2, 0)
+        self.display.text(combined_str, (OLED_WIDTH - len(combined_str)*8)//2, 14)
+        self.display.text(f"min {_fmt(s.min)} max {_fmt(s.max)}", 0, 28)
+        self.display.text(f"avg {_fmt(s.mean())} n={s.count}", 0, 38)
+        self.display.text("UP:Graph DN:Read", 0, 54)
+        self.display.show()
 
-        self.state = "IDLE"
-        while self._active:
-            for btn_obj in self.buttons.values():
-                btn_obj.update()
-            if self.state == "IDLE":
-                self.display.clear()
-                self.display.text("Temperature", (OLED_WIDTH - 11*8)//2, 5)
-                self.display.text("OK: Read", (OLED_WIDTH - 8*8)//2, 25)
-                self.display.text("UP/DOWN: Exit", (OLED_WIDTH - 13*8)//2, 45)
-                self.display.show()
-                if self.buttons['ok'].is_pressed():
-                    if App._menu_buzzer_enabled and self.buzzer:
-                        self.buzzer.play_tone(NOTES['E5'], 50, duty_u16=10000)
-                    self.state = "READING"
-                    self.display.clear()
-                    self.display.text("Reading temp...", (OLED_WIDTH - 15*8)//2, 25)
-                    self.display.show()
-                    utime.sleep_ms(100)
-                    success, self.temp_c, self.temp_f = self._read_temperature()
-                    if success:
-                        self.state = "RESULT"
-                    else:
-                        self.state = "READ_ERROR"
-                elif self.buttons['up'].is_pressed() or self.buttons['down'].is_pressed():
-                    if App._menu_buzzer_enabled and self.buzzer:
-                        self.buzzer.play_tone(NOTES['C5'], 30, duty_u16=8000)
-                    self.stop()
-            elif self.state == "READING":
-                pass
-            elif self.state == "RESULT":
-                temp_str_c = f"{self.temp_c:.1f}C"
-                temp_str_f = f"{self.temp_f:.1f}F"
-                combined_str = f"{temp_str_c} / {temp_str_f}"
-                self.display.clear()
-                self.display.text("Temperature:", (OLED_WIDTH - 12*8)//2, 5)
-                if len(combined_str) * 8 > OLED_WIDTH - 10:
-                    self.display.text(temp_str_c, (OLED_WIDTH - len(temp_str_c)*8)//2, 20)
-                    self.display.text(temp_str_f, (OLED_WIDTH - len(temp_str_f)*8)//2, 35)
-                else:
-                    self.display.text(combined_str, (OLED_WIDTH - len(combined_str)*8)//2, 25)
-                self.display.text("OK:Exit UP:Read", 0, 50)
-                self.display.show()
-                if self.buttons['ok'].is_pressed():
-                    if App._menu_buzzer_enabled and self.buzzer:
-                        self.buzzer.play_tone(NOTES['E5'], 50, duty_u16=10000)
-                    self.stop()
-                elif self.buttons['up'].is_pressed():
-                    if App._menu_buzzer_enabled and self.buzzer:
-                        self.buzzer.play_tone(NOTES['C5'], 30, duty_u16=8000)
-                    self.state = "IDLE"
-                    self.display.clear()
-                    self.display.text("Reading Temp...", (OLED_WIDTH - 15*8)//2, 25)
-                    self.display.show()  # Corrected message
-                    utime.sleep_ms(200)
-            elif self.state == "READ_ERROR":
-                self.display.show_message(["Read Error", "Press OK"], title="Temp")
-                read_error_start_time = utime.ticks_ms()
-                while self._active and utime.ticks_diff(utime.ticks_ms(), read_error_start_time) < 5000:
-                    self.buttons['ok'].update()
-                    if self.buttons['ok'].is_pressed():
-                        if App._menu_buzzer_enabled and self.buzzer:
-                            self.buzzer.play_tone(NOTES['E5'], 50, duty_u16=10000)
-                        self.state = "IDLE"
-                        break
-                    utime.sleep_ms(50)
-                if self.state == "READ_ERROR":
-                    self.state = "IDLE"
-            utime.sleep_ms(50)
+    def _render_graph(self):
+        s = self.sampler
+        oled = self.display.oled
+        self.display.clear()
+        self.display.text(f"{_fmt(s.min)}-{_fmt(s.max)}C", 0, 0)
+        low = s.min
+        span = s.max - s.min
+        if span < MIN_GRAPH_SPAN:
+            low -= (MIN_GRAPH_SPAN - span) // 2
+            span = MIN_GRAPH_SPAN
+        height = GRAPH_BOTTOM - GRAPH_TOP
+        step = OLED_WIDTH // s.size or 1
+        x0 = OLED_WIDTH - s.count * step  # newest sample at the right edge
+        prev_x = prev_y = None
+        for i in range(s.count):
+            x = x0 + i * step
+            y = GRAPH_BOTTOM - (s.value(i) - low) * height // span
+            if prev_x is None:
+                oled.pixel(x, y, 1)
+            else:
+                oled.line(prev_x, prev_y, x, y, 1)
+            prev_x, prev_y = x, y
+        self.display.show()
@@ -1,30 +1,117 @@
+from array import array
 import machine
-from src.constants import DEBOUNCE_MS
+from src.constants import BUTTON_EVENT_BUFFER_SIZE, DEBOUNCE_MS
 import utime
 
 
 class Button:
 
-    def __init__(self, pin_id, pull=machine.Pin.PULL_UP):
+    def __init__(self, pin_id, pull=machine.Pin.PULL_UP, use_irq=False):
         self.pin = machine.Pin(pin_id, machine.Pin.IN, pull)
         self.debounce_ms = DEBOUNCE_MS
         self.last_press_time = 0
         self.initial_state = self.pin.value()
         self.last_state = self.initial_state
         self._pressed_event = False
+        self.use_irq = use_irq
+        self._wake_handler = None
+        self._recorder = None
+        self._trace_id = 0
+        if use_irq:
+            # ring buffer of raw edges filled by _on_edge, preallocated so the ISR never allocates
+            self._ring_size = BUTTON_EVENT_BUFFER_SIZE
+            self._edge_times = array('i', [0] * self._ring_size)
+            self._edge_levels = bytearray(self._ring_size)
+            self._head = 0  # next slot written by the ISR
+            self._tail = 0  # next slot read by _drain_edges
+            self._pending_presses = 0
+            self.dropped_edges = 0
+            self.set_irq(True)
 
-    def update(self):
-        self._pressed_event = False
-        current_state = self.pin.value()
-        now = utime.ticks_ms()
+    def _on_edge(self, pin):
+        self._push_edge(pin.value())
+
+    def _push_edge(self, level):
+        head = self._head
+        next_head = (head + 1) % self._ring_size
+        if next_head == self._tail:
+            self.dropped_edges += 1
+            return
+        self._edge_times[head] = utime.ticks_ms()
+        self._edge_levels[head] = level
+        self._head = next_head
+        if self._wake_handler is not None:
+            self._wake_handler(self.pin)
+
+    def set_irq(self, enabled):
+        """Attach or detach the pin IRQ, e.g. so real presses stay out of a replayed trace"""
+        if enabled:
+            self.pin.irq(handler=self._on_edge, trigger=machine.Pin.IRQ_FALLING | machine.Pin.IRQ_RISING, hard=True)
+        else:
+            self.pin.irq(handler=None)
+
+    def inject(self, level):
+        """Feed an edge as if the pin changed to level now, used to replay input traces"""
+        if not self.use_irq:
+            raise ValueError("inject needs an IRQ button")
+        state = machine.disable_irq()  # the ring's head is shared with _on_edge
+        try:
+            self._push_edge(level)
+        finally:
+            machine.enable_irq(state)
+
+    def set_wake_handler(self, handler):
+        """handler(pin) is called from the IRQ after each recorded edge, it must not allocate"""
+        self._wake_handler = handler
+
+    def set_recorder(self, recorder, trace_id):
+        """recorder.record(trace_id, level, ticks_ms) is called for every raw level change"""
+        self._recorder = recorder
+        self._trace_id = trace_id
+
+    def _apply_state(self, current_state, now):
+        """Debounce one level sample, return True on an accepted press (1 -> 0)"""
+        pressed = False
         if current_state != self.last_state:
+            if self._recorder is not None:
+                self._recorder.record(self._trace_id, current_state, now)
             if utime.ticks_diff(now, self.last_press_time) > self.debounce_ms:
                 if self.last_state == 1 and current_state == 0:
-                    self._pressed_event = True
+                    pressed = True
                 self.last_press_time = now
         self.last_state = current_state
+        return pressed
+
+    def _drain_edges(self):
+        tail = self._tail
+        while tail != self._head:
+            if self._apply_state(self._edge_levels[tail], self._edge_times[tail]):
+                self._pending_presses += 1
+            tail = (tail + 1) % self._ring_size
+        self._tail = tail
+        if self._pending_presses:
+            self._pending_presses -= 1
+            self._pressed_event = True
+
+    def update(self):
+        self._pressed_event = False
+        if self.use_irq:
+            self._drain_edges()
+            return
+        self._pressed_event = self._apply_state(self.pin.value(), utime.ticks_ms())
+
+    def clear(self):
+        """Drop presses recorded so far, e.g. while the watch was asleep"""
+        if self.use_irq:
+            self._drain_edges()
+            self._pending_presses = 0
+        else:
+            self.last_state = self.pin.value()
+        self._pressed_event = False
 
     def is_pressed(self):
+        if self.use_irq and not self._pressed_event and (self._pending_presses or self._tail != self._head):
+            self._drain_edges()
         return self._pressed_event
 
     def value(self):
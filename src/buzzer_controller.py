@@ -1,15 +1,53 @@
+from array import array
 import machine
-from src.constants import NOTES
+import micropython
+from src.constants import BUZZER_QUEUE_SIZE, BUZZER_STREAM_SIZE, NOTES
+from src.song_compiler import compile_song
 import utime
 
+PRIORITY_SONG = 0
+PRIORITY_UI = 1
+
 
 class BuzzerController:
-    """Handles passive buzzer basic sounds"""
+    """Handles passive buzzer basic sounds
+
+    Sounds are queued and played from a machine.Timer callback, so every play_* call returns
+    immediately. UI sounds go through a small preallocated (freq, duration, gap, duty) queue that
+    preempts the song channel; the song carries on with its next note once the queue drains.
+    Streamed songs (play_stream) are pulled from an iterator into a small ring that is refilled
+    via micropython.schedule, so their memory use does not depend on the song length.
+    Preempting a note bumps a generation counter that selects one of two timers; a callback
+    that was already scheduled on the old timer sees it is stale and does nothing, so the
+    sequencer never advances twice for one deadline.
+    """
 
     def __init__(self, pin_num, button_sounds):
         self.pwm_pin_num = pin_num
         self.button_sounds = button_sounds
         self.buzzer = None
+        self._timers = None
+        self._gen = 0
+        self._advance_cb = self._advance  # bound once, the timer callback must not allocate
+        self._queue = array('H', [0] * (BUZZER_QUEUE_SIZE * 4))
+        self._q_head = 0
+        self._q_tail = 0
+        self._song = None
+        self._song_pos = 0
+        self._song_len = 0
+        self._song_duty = 32768
+        self._stream = None
+        self._stream_buf = array('H', [0] * (BUZZER_STREAM_SIZE * 3))
+        self._s_head = 0
+        self._s_tail = 0
+        self._refill_pending = False
+        self._refill_cb = self._refill
+        self._gap_ms = 0
+        self._playing = False
+        self._playing_priority = PRIORITY_SONG
+        self._hold_freq = 0
+        self._hold_duty = 0
+        self._paused = False
 
     # TODO CLEAN INITIALIZATION AND NAMING
     def _init_pwm(self):
@@ -23,24 +61,144 @@ class BuzzerController:
             self.buzzer.deinit()
             self.buzzer = None
 
-    def play_tone(self, freq, duration_ms, duty_u16=32768):
-        if not self.button_sounds:
-            return
+    def _output(self, freq, duty_u16):
         if freq <= 0:
-            self.rest(duration_ms)
+            if self.buzzer:
+                self.buzzer.duty_u16(0)
             return
         self._init_pwm()
         self.buzzer.freq(freq)
         self.buzzer.duty_u16(duty_u16)
-        utime.sleep_ms(duration_ms)
-        self.buzzer.duty_u16(0)
+
+    def _arm(self, delay_ms):
+        if self._timers is None:
+            self._timers = (machine.Timer(), machine.Timer())
+        self._timers[self._gen & 1].init(mode=machine.Timer.ONE_SHOT, period=delay_ms if delay_ms > 0 else 1,
+                                         callback=self._advance_cb)
+
+    def _disarm(self):
+        if self._timers:
+            self._timers[self._gen & 1].deinit()
+
+    def _advance(self, _timer=None):
+        """Timer callback: finish the current note's gap or start the next queued event"""
+        if _timer is not None and _timer is not self._timers[self._gen & 1]:
+            return  # scheduled before a preemption, that note was already replaced
+        if self._gap_ms:
+            gap_ms = self._gap_ms
+            self._gap_ms = 0
+            self._output(0, 0)
+            self._arm(gap_ms)
+            return
+        q = self._queue
+        if self._q_tail != self._q_head:
+            i = self._q_tail * 4
+            freq, duration, gap, duty = q[i], q[i + 1], q[i + 2], q[i + 3]
+            self._q_tail = (self._q_tail + 1) % BUZZER_QUEUE_SIZE
+            self._playing_priority = PRIORITY_UI
+        elif self._song is not None and self._song_pos < self._song_len:
+            song = self._song
+            i = self._song_pos * 3
+            freq, duration, gap = song[i], song[i + 1], song[i + 2]
+            self._song_pos += 1
+            duty = self._song_duty
+            self._playing_priority = PRIORITY_SONG
+        elif self._s_tail != self._s_head:
+            ring = self._stream_buf
+            i = self._s_tail * 3
+            freq, duration, gap = ring[i], ring[i + 1], ring[i + 2]
+            self._s_tail = (self._s_tail + 1) % BUZZER_STREAM_SIZE
+            self._song_pos += 1
+            duty = self._song_duty
+            self._playing_priority = PRIORITY_SONG
+            self._request_refill()
+        elif self._stream is not None:
+            # stream underrun, stay silent until the scheduled refill catches up
+            self._request_refill()
+            self._playing = True
+            self._output(0, 0)
+            self._arm(5)
+            return
+        else:
+            self._playing = False
+            self._song = None
+            if self._hold_freq:
+                self._output(self._hold_freq, self._hold_duty)
+            else:
+                self._deinit_pwm()
+            return
+        self._playing = True
+        self._output(freq, duty)
+        self._gap_ms = gap
+        self._arm(duration)
+
+    def _request_refill(self):
+        if self._stream is None or self._refill_pending:
+            return
+        self._refill_pending = True
+        try:
+            micropython.schedule(self._refill_cb, None)
+        except RuntimeError:
+            self._refill_pending = False  # schedule queue full, try again on the next note
+
+    def _refill(self, _arg=None):
+        """Top up the stream ring from the note iterator, runs in thread context"""
+        self._refill_pending = False
+        ring = self._stream_buf
+        while self._stream is not None:
+            next_head = (self._s_head + 1) % BUZZER_STREAM_SIZE
+            if next_head == self._s_tail:
+                break
+            try:
+                freq, duration, gap = next(self._stream)
+            except StopIteration:
+                self._stream = None
+                break
+            except Exception as e:
+                print(f"Song stream error: {e}")
+                self._stream = None
+                break
+            i = self._s_head * 3
+            ring[i] = freq
+            ring[i + 1] = duration
+            ring[i + 2] = gap
+            self._s_head = next_head
+
+    def _kick(self, priority):
+        """Start the sequencer, or preempt a lower priority note that is playing"""
+        if self._paused:
+            return
+        if not self._playing:
+            self._advance()
+        elif priority > self._playing_priority:
+            self._disarm()
+            self._gen += 1
+            self._gap_ms = 0
+            self._advance()
+
+    def play_tone(self, freq, duration_ms, duty_u16=32768, gap_ms=0, priority=PRIORITY_UI):
+        """Queue a tone and return immediately, freq <= 0 queues a rest"""
+        if not self.button_sounds:
+            return False
+        return self._queue_tone(freq, duration_ms, duty_u16, gap_ms, priority)
+
+    def _queue_tone(self, freq, duration_ms, duty_u16, gap_ms, priority):
+        next_head = (self._q_head + 1) % BUZZER_QUEUE_SIZE
+        if next_head == self._q_tail:
+            return False  # queue full, drop the sound rather than block
+        i = self._q_head * 4
+        self._queue[i] = freq if freq > 0 else 0
+        self._queue[i + 1] = duration_ms
+        self._queue[i + 2] = gap_ms
+        self._queue[i + 3] = duty_u16
+        self._q_head = next_head
+        self._kick(priority)
+        return True
 
     def play_flip_sound(self):
         self.play_tone(NOTES['C5'], 50)
         self.play_tone(NOTES['E5'], 50)
         self.play_tone(NOTES['G5'], 80)
-        # TODO incpect deinit
-        # self._deinit_pwm()
 
     def play_ok_sound(self):
         self.play_tone(NOTES['E5'], 50, duty_u16=10000)
@@ -49,35 +207,108 @@ class BuzzerController:
         self.play_tone(NOTES['C5'], 30, duty_u16=8000)
 
     def start_tone(self, freq, duty_u16=32768):
-        if freq <= 0:
-            if self.buzzer:
-                self.buzzer.duty_u16(0)
-            return
-        self._init_pwm()
-        self.buzzer.freq(freq)
-        self.buzzer.duty_u16(duty_u16)
+        """Hold a continuous tone, queued sounds play over it and then it resumes"""
+        self._hold_freq = freq if freq > 0 else 0
+        self._hold_duty = duty_u16
+        if not self._playing and not self._paused:
+            self._output(freq, duty_u16)
 
     def stop_tone(self):
-        if self.buzzer:
-            self.buzzer.duty_u16(0)
-        self._deinit_pwm()
+        """Stop the continuous tone, sounds that are already queued still play"""
+        self._hold_freq = 0
+        if not self._playing:
+            self._deinit_pwm()
 
     def rest(self, duration_ms):
-        if self.buzzer:
-            self.buzzer.duty_u16(0)
-        utime.sleep_ms(duration_ms)
-
-    def play_song(self, song_data, display_manager=None):
-        for i, item in enumerate(song_data):
-            note_val, duration = item[0], item[1]
-            delay_after = item[2] if len(item) > 2 else 50
-            freq = NOTES.get(note_val, 0) if isinstance(note_val, str) else note_val
-            if display_manager:
-                display_manager.clear()
-                display_manager.text("Playing...", 20, 20)
-                display_manager.text(f"Note {i+1}/{len(song_data)}", 20, 30)
-                display_manager.show()
-            self.play_tone(freq, duration)
-            if delay_after > 0 and freq > 0:
-                utime.sleep_ms(delay_after)
+        """Queue a silence, it takes its time whether or not button sounds are on"""
+        self._queue_tone(0, duration_ms, 0, 0, PRIORITY_UI)
+
+    def play_song(self, song_data, duty_u16=32768):
+        """Start playing song_data in the background, replacing any song already playing.
+
+        song_data is a packed array from compile_song; tuple lists are compiled on the fly.
+        """
+        if not self.button_sounds:
+            return
+        if not isinstance(song_data, array):
+            song_data = compile_song(song_data)
+        self.stop_song()
+        self._song = song_data
+        self._song_len = len(song_data) // 3
+        self._song_pos = 0
+        self._song_duty = duty_u16
+        self._kick(PRIORITY_SONG)
+
+    def play_stream(self, notes, duty_u16=32768):
+        """Start playing an iterator of (freq, duration, gap) triples, e.g. from song_loader"""
+        if not self.button_sounds:
+            return
+        self.stop_song()
+        self._song_pos = 0
+        self._song_len = 0
+        self._song_duty = duty_u16
+        self._stream = notes
+        self._refill()
+        self._kick(PRIORITY_SONG)
+
+    def stop_song(self):
+        self._song = None
+        stream = self._stream
+        self._stream = None
+        self._s_tail = self._s_head
+        if stream is not None and hasattr(stream, "close"):
+            stream.close()  # lets a generator close its file
+
+    def _song_active(self):
+        return self._song is not None or self._stream is not None or self._s_tail != self._s_head
+
+    def song_position(self):
+        """1-based index of the song note playing (or last played), 0 when no song is active"""
+        return self._song_pos if self._song_active() else 0
+
+    def song_length(self):
+        """Number of notes in the song, 0 if unknown (streams) or no song is active"""
+        return self._song_len if self._song is not None else 0
+
+    def is_busy(self):
+        return self._playing
+
+    def is_silent(self):
+        """True when nothing is playing or held, the PWM and timer may be stopped"""
+        return self._paused or (not self._playing and not self._hold_freq)
+
+    def wait(self):
+        """Block until everything queued so far has played"""
+        while self._playing:
+            utime.sleep_ms(5)
+
+    def pause(self):
+        """Silence and freeze the song and held tone, queued UI sounds are dropped"""
+        if self._paused:
+            return
+        self._paused = True
+        self._disarm()
+        self._gen += 1
+        self._q_tail = self._q_head
+        self._gap_ms = 0
+        self._deinit_pwm()
+
+    def resume(self):
+        """Carry on after pause() with the next song note or the held tone"""
+        if not self._paused:
+            return
+        self._paused = False
+        self._playing = False
+        self._advance()
+
+    def cancel(self):
+        """Silence immediately and drop the queue, the song and any held tone"""
+        self._disarm()
+        self._gen += 1
+        self._q_tail = self._q_head
+        self.stop_song()
+        self._gap_ms = 0
+        self._hold_freq = 0
+        self._playing = False
+        self._paused = False
         self._deinit_pwm()
@@ -0,0 +1,55 @@
+_ZERO = 48  # ord('0')
+_COLON = 58  # ord(':')
+
+
+class ClockFace:
+    """Draws "HH:MM:SS" with scaled glyphs, redrawing only the cells that changed.
+
+    Digits are written into a preallocated bytearray and compared with what is on screen;
+    the glyphs and cell offsets are looked up once in __init__, so draw() does not allocate.
+    """
+
+    def __init__(self, display_manager, x, y, scale=2):
+        self.display = display_manager
+        self.oled = display_manager.oled
+        self.scale = scale
+        self.cell_w = display_manager.text_height * scale
+        self.y = y
+        self._digits = bytearray(b"00:00:00")
+        self._shown = bytearray(8)  # 0 = cell not drawn yet
+        self._cell_x = bytearray(8)
+        for i in range(8):
+            self._cell_x[i] = x + i * self.cell_w
+        glyphs = display_manager.glyphs
+        self._digit_glyphs = [glyphs.get(chr(_ZERO + d), scale) for d in range(10)]
+        self._colon_glyph = glyphs.get(':', scale)
+
+    def reset(self):
+        """Forget what is on screen, the next draw() paints every cell"""
+        for i in range(8):
+            self._shown[i] = 0
+
+    def _set_pair(self, i, value):
+        self._digits[i] = _ZERO + value // 10
+        self._digits[i + 1] = _ZERO + value % 10
+
+    def draw(self, h, m, s):
+        """Update the frame buffer, returns the number of cells redrawn"""
+        self._set_pair(0, h)
+        self._set_pair(3, m)
+        self._set_pair(6, s)
+        digits = self._digits
+        shown = self._shown
+        oled = self.oled
+        changed = 0
+        for i in range(8):
+            c = digits[i]
+            if c == shown[i]:
+                continue
+            glyph = self._colon_glyph if c == _COLON else self._digit_glyphs[c - _ZERO]
+            oled.blit(glyph, self._cell_x[i], self.y)  # opaque, overwrites the old digit
+            shown[i] = c
+            changed += 1
+        if changed:
+            self.display.invalidate()
+        return changed
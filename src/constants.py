@@ -5,62 +5,74 @@ OLED_WIDTH = 128
 OLED_HEIGHT = 64
 OLED_I2C_ADDR = 0x3C
 OLED_I2C_ID = 0
+OLED_USE_VIPER = True  # diff frames with the viper emitter (src/ssd1306_viper.py), False on firmware without it
+GLYPH_CACHE_SIZE = 16  # scaled glyphs kept by DisplayManager.text_scaled
 
 # --- BUZZER ---
 BUZZER_PIN_NUM = 15
+BUZZER_QUEUE_SIZE = 8  # UI sounds that can be queued ahead of the song channel
+BUZZER_STREAM_SIZE = 16  # notes buffered ahead when streaming a song file
+SONGS_DIR = "/songs"
+SONG_INDEX_FILE = "index.txt"  # "<file>\t<title>" per line, rebuilt when missing
+SONG_READ_CHUNK = 32  # bytes read from a song file at a time
+RTTTL_NOTE_GAP_MS = 10  # silence cut from the end of each RTTTL note
 NOTES = {
     'REST': 0,
     'C3': 131, 'D3': 147, 'E3': 165, 'F3': 175,
-    'G3': 196, 'DS3': 155, 'AS3': 233,
+    'G3': 196, 'DS3': 155, 'A3': 220, 'AS3': 233,
     'C4': 262, 'CS4': 277, 'D4': 294, 'DS4': 311, 'E4': 330, 'F4': 349, 'FS4': 370, 'G4': 392, 'GS4': 415, 'A4': 440, 'AS4': 466, 'B4': 494,
     'C5': 523, 'CS5': 554, 'D5': 587, 'DS5': 622, 'E5': 659, 'F5': 698, 'FS5': 740, 'G5': 784, 'GS5': 831, 'A5': 880, 'AS5': 932, 'B5': 988,
 }
-IMPERIAL_MARCH_MELODY = [
-    ('G3', 350), ('G3', 350), ('G3', 350), ('DS3', 250, 50), ('AS3', 100),
-    ('G3', 350), ('DS3', 250, 50), ('AS3', 100), ('G3', 700),
-    ('D4', 350), ('D4', 350), ('D4', 350), ('DS4', 250, 50), ('AS3', 100),
-    ('G3', 350), ('DS3', 250, 50), ('AS3', 100), ('G3', 700),
-]
-PIRATES_MELODY = [
-    ('D4', 120), ('D4', 120), ('D4', 120), ('D4', 240), ('D4', 120), ('E4', 120), ('F4', 240), ('F4', 240),
-    ('F4', 120), ('G4', 120), ('E4', 240), ('E4', 240), ('D4', 120), ('C4', 120), ('C4', 120), ('D4', 360),
-    ('D4', 120), ('D4', 120), ('D4', 120), ('D4', 240), ('D4', 120), ('E4', 120), ('F4', 240), ('F4', 240),
-    ('F4', 120), ('G4', 120), ('E4', 240), ('E4', 240), ('D4', 120), ('C4', 120), ('C4', 120), ('D4', 360),
-    ('A3', 120), ('C4', 120), ('D4', 120), ('D4', 120), ('D4', 120), ('E4', 120), ('F4', 240), ('F4', 120),
-    ('F4', 120), ('G4', 120), ('E4', 240), ('E4', 120), ('D4', 120), ('C4', 120), ('C4', 120), ('D4', 360),
-]
-BIRTHDAY_MELODY = [
-    ('C4', 175), ('C4', 175, 50), ('D4', 525, 50), ('C4', 175, 50), ('F4', 350, 50), ('E4', 700),
-    ('C4', 175, 50), ('C4', 175, 50), ('D4', 525, 50), ('C4', 175, 50), ('G4', 350, 50), ('F4', 700),
-    ('C4', 175), ('C4', 175, 50), ('C5', 525, 50), ('A4', 175, 50), ('F4', 350, 50), ('E4', 350, 50), ('D4', 700),
-    ('AS4', 175, 50), ('AS4', 175, 50), ('A4', 525, 50), ('F4', 175, 50), ('G4', 350, 50), ('F4', 700),
-]
-EXPLOSION_EFFECT = [
-    ('C4', 100, 20), ('D#4', 100, 20), ('F4', 100, 20), ('G4', 80, 20),
-    ('A#4', 80, 20), ('C5', 60, 20), ('D5', 60, 20), ('E5', 50, 20),
-    ('F5', 40, 10), ('G5', 30), ('C3', 300)
-]
 
-# EXPLOSION_EFFECT = [
-#     (NOTES['C7'], 30),
-#     (NOTES['E6'], 50),
-#     (NOTES['G5'], 40),
-#     (NOTES['C5'], 30),
-#     (NOTES['A4'], 20),
-#     (NOTES['F4'], 30),
-#     (NOTES['D3'], 200),
-#     (NOTES['C3'], 300),
-# ]
+# --- CLOCK ---
+CLOCK_ALLOC_PROBE = False  # measure heap growth of every clock tick, redraw and show() included
+TIME_RESYNC_MS = 60_000  # TimeService re-reads the RTC this often
+TIME_MAX_WAIT_MS = 3_600_000  # longest sleep towards an alarm, keeps ticks_diff in range
 
 # --- BUTTONS ---
 BUTTON_UP_PIN_NUM = 6
 BUTTON_DOWN_PIN_NUM = 7
 BUTTON_OK_PIN_NUM = 3
 DEBOUNCE_MS = 40
+BUTTON_USE_IRQ = True  # timestamp edges from Pin.irq instead of polling pin.value()
+BUTTON_EVENT_BUFFER_SIZE = 16  # edges buffered per button between update() calls
+INPUT_TRACE_MODE = None  # "record", "replay" (original timing) or "replay_fast", see input_trace.py
+INPUT_TRACE_FILE = "/input.trace"
+INPUT_TRACE_MAX_EDGES = 512  # edges a recording can hold, 3 bytes each
+INPUT_TRACE_SAVE_MS = 2000  # the recording is saved once no edge came for this long
+INPUT_TRACE_REPLAY_DELAY_MS = 2000  # replay starts this long after the runtime
+INPUT_TRACE_PENDING_PRESSES = 8  # replayed presses waiting for a frame, older ones are counted as overrun
 
 # --- TEMPERATURE SENSOR ---
 TEMP_SENSOR_ADC_CHANNEL = 4
 TEMPERATURE_OFFSET = 14
+TEMP_SAMPLE_PERIOD_MS = 5000  # background sampling period
+TEMP_BURST_SHIFT = 4  # each sample averages 2**TEMP_BURST_SHIFT ADC reads
+TEMP_HISTORY_SIZE = 64  # samples kept for the min/max/mean and the graph
+TEMP_LOG_EVERY = 12  # every n-th sample goes to the sensor log, once a minute
+
+# --- SENSOR LOG ---
+LOG_DIR = "/log"
+LOG_BLOCK_SIZE = 512  # bytes buffered in RAM per flash write, 64 records
+LOG_FILE_BLOCKS = 16  # blocks per file before a new file is started
+LOG_MAX_FILES = 4  # oldest file is deleted beyond this, the log stays under 32 KiB
+LOG_CH_TEMPERATURE = 0  # value in 1/100 C
+LOG_CH_APP_BASE = 16  # + registry index, value is seconds spent in the app
+
+# --- SETTINGS ---
+SETTINGS_FILE = "/settings.bin"
+SETTINGS_QUIET_MS = 3000  # changes are written together once nothing changed for this long
+
+# --- PROFILER ---
+PROFILE_ENABLED = False  # time display, I2C, buzzer and runtime calls, see Settings > Profiler
+PROFILE_BUCKETS = 24  # power-of-two histogram buckets, the last one takes everything >= 8 s
+PROFILE_MAX_LABELS = 20
+
+# --- MEMORY ---
+MEM_SAMPLE_FRAMES = 10  # heap sampled every n rendered frames, plus on app enter/exit and idle
+MEM_IDLE_COLLECT = True  # gc.collect() before sleeping instead of letting the GC run mid-frame
+MEM_IDLE_COLLECT_BYTES = 16 * 1024  # ...once this much was allocated since the last collect
+MEM_IDLE_COLLECT_MIN_MS = 20  # ...and the loop is about to sleep at least this long
 
 # --- LED MATRIX ---
 MATRIX_PIN_NUM = 16
@@ -68,13 +80,10 @@ MATRIX_NUM_PIXELS = 25
 MATRIX_WIDTH = 5
 MATRIX_HEIGHT = 5
 MATRIX_DEFAULT_BRIGHTNESS = 0.05
-MATRIX_DIGIT_PATTERNS = {
-    0: [[0, 1, 1, 1, 0], [0, 1, 0, 1, 0], [0, 1, 0, 1, 0], [0, 1, 0, 1, 0], [0, 1, 1, 1, 0]], 1: [[0, 0, 1, 0, 0], [0, 1, 1, 0, 0], [0, 0, 1, 0, 0], [0, 0, 1, 0, 0], [0, 1, 1, 1, 0]],
-    2: [[0, 1, 1, 1, 0], [0, 0, 0, 1, 0], [0, 1, 1, 1, 0], [0, 1, 0, 0, 0], [0, 1, 1, 1, 0]], 3: [[0, 1, 1, 1, 0], [0, 0, 0, 1, 0], [0, 0, 1, 1, 0], [0, 0, 0, 1, 0], [0, 1, 1, 1, 0]],
-    4: [[0, 1, 0, 1, 0], [0, 1, 0, 1, 0], [0, 1, 1, 1, 0], [0, 0, 0, 1, 0], [0, 0, 0, 1, 0]], 5: [[0, 1, 1, 1, 0], [0, 1, 0, 0, 0], [0, 1, 1, 1, 0], [0, 0, 0, 1, 0], [0, 1, 1, 1, 0]],
-    6: [[0, 0, 1, 1, 0], [0, 1, 0, 0, 0], [0, 1, 1, 1, 0], [0, 1, 0, 1, 0], [0, 1, 1, 1, 0]], 7: [[0, 1, 1, 1, 0], [0, 0, 0, 1, 0], [0, 0, 1, 0, 0], [0, 0, 1, 0, 0], [0, 0, 1, 0, 0]],
-    8: [[0, 1, 1, 1, 0], [0, 1, 0, 1, 0], [0, 1, 1, 1, 0], [0, 1, 0, 1, 0], [0, 1, 1, 1, 0]], 9: [[0, 1, 1, 1, 0], [0, 1, 0, 1, 0], [0, 1, 1, 1, 0], [0, 0, 0, 1, 0], [0, 1, 1, 1, 0]]
-}
+MATRIX_BRIGHTNESS_LEVELS = (0.02, 0.05, 0.1, 0.2, 0.4)
+MATRIX_GAMMA = 2.2
+PLASMA_FRAME_MS = 20  # target frame time of the plasma effect
+PLASMA_SPEED_MS = 40  # PlasmaEngine's speed is the phase step per this much time, the original frame period
 COLOR_RED = (255, 0, 0)
 COLOR_GREEN = (0, 255, 0)
 COLOR_BLUE = (0, 0, 255)
@@ -83,5 +92,23 @@ COLOR_ORANGE = (255, 120, 0)
 COLOR_WHITE = (220, 220, 220)
 COLOR_BLACK = (0, 0, 0)
 
+# --- RUNTIME ---
+INPUT_PERIOD_MS = 20  # button poll period, only used when buttons are not IRQ driven
+RENDER_PERIOD_MS = 50  # minimum frame period, apps only redraw after invalidate()
+APP_TICK_MS = 50  # tick period of apps that poll something while active
+SLEEP_CHECK_MS = 200  # sleep switch poll period when its pin IRQ is unavailable
+IDLE_USE_LIGHTSLEEP = False  # idle in machine.lightsleep, stops USB serial and PWM so only used while silent
+IDLE_MIN_LIGHTSLEEP_MS = 5  # shorter waits stay in the event loop
+IDLE_MAX_LIGHTSLEEP_MS = 1000  # lightsleep slice when no deadline is pending
+APP_REGISTRY_MIN_FREE = 32 * 1024  # free heap under which unused app modules are dropped
+APP_MANAGER_MAX_LIVE = 3  # closed apps kept alive to reopen instantly
+WORKER_USE_THREAD = True  # run CoreWorker jobs on core 1, falls back to a uasyncio task without _thread
+WORKER_QUEUE_SIZE = 4  # jobs that can be posted before the worker picks them up
+WORKER_MAX_JOBS = 2  # jobs running at the same time
+WORKER_WAIT_SLICE_MS = 5  # the worker thread sleeps in slices this long so post()/cancel() wake it early
+
 # --- DIP SWITCH ---
 SLEEP_SWITCH_PIN_NUM = 2
+SLEEP_CPU_FREQ = 48_000_000  # CPU clock while asleep, restored on wake
+SLEEP_USE_LIGHTSLEEP = True  # lightsleep until the switch IRQ, stops USB serial while asleep
+SLEEP_LIGHTSLEEP_MS = 1000  # longest lightsleep while asleep before the switch is checked again
@@ -0,0 +1,221 @@
+import uasyncio as asyncio
+import utime
+
+from src.constants import WORKER_MAX_JOBS, WORKER_QUEUE_SIZE, WORKER_USE_THREAD, WORKER_WAIT_SLICE_MS
+
+try:
+    import _thread
+except ImportError:
+    _thread = None
+
+
+class Job:
+    """Unit of work run by CoreWorker.
+
+    step(now_ms) does one slice of work and returns the ms until it wants to run again, or
+    None once it is finished. finish() runs after the last step or on cancel, on the same
+    core as the steps, so it can release whatever the job was drawing to.
+    """
+
+    def __init__(self):
+        self.cancel_requested = False
+        self.cancelled = False
+        self.done = False
+
+    def step(self, now_ms):
+        return None
+
+    def finish(self):
+        pass
+
+    def is_done(self):
+        return self.done
+
+
+class CoreWorker:
+    """Runs Jobs away from the UI loop, on core 1 when _thread is available.
+
+    post() puts a job in a lock-protected, preallocated queue and returns at once. The worker
+    steps every active job when it is due and blocks on a lock when it has nothing to do;
+    between due jobs it sleeps in WORKER_WAIT_SLICE_MS slices, checking that lock, since
+    lock.acquire() has no timeout on the rp2 port.
+    Without _thread (or with use_thread=False) the same loop runs as a uasyncio task next to
+    the UI. Objects a job draws to belong to the job until it is_done().
+    """
+
+    def __init__(self, use_thread=WORKER_USE_THREAD):
+        self.threaded = use_thread and _thread is not None
+        self._queue = [None] * WORKER_QUEUE_SIZE
+        self._q_head = 0
+        self._q_tail = 0
+        self._jobs = [None] * WORKER_MAX_JOBS
+        self._due = [0] * WORKER_MAX_JOBS
+        self._suspended = False
+        if self.threaded:
+            self._lock = _thread.allocate_lock()
+            self._signal = _thread.allocate_lock()
+            self._signal.acquire()
+            _thread.start_new_thread(self._thread_main, ())
+        else:
+            self._lock = None
+            self._event = asyncio.Event()
+
+    def _wake(self):
+        if self.threaded:
+            try:
+                self._signal.release()
+            except RuntimeError:
+                pass  # already signalled
+        else:
+            self._event.set()
+
+    def post(self, job):
+        """Queue job to start on the worker, False if the queue is full"""
+        if self._lock:
+            self._lock.acquire()
+        try:
+            next_head = (self._q_head + 1) % WORKER_QUEUE_SIZE
+            if next_head == self._q_tail:
+                return False
+            self._queue[self._q_head] = job
+            self._q_head = next_head
+        finally:
+            if self._lock:
+                self._lock.release()
+        self._wake()
+        return True
+
+    def cancel(self, job):
+        """Ask job to stop and return at once.
+
+        Without a thread the job is retired right here. On core 1 it is retired on the
+        worker's next pass, so whatever it draws to stays the job's until job.is_done().
+        """
+        if job is None or job.done:
+            return
+        job.cancel_requested = True
+        if not self.threaded:
+            self._retire(job, True)
+            return
+        self._wake()
+
+    def suspend(self):
+        """Stop stepping jobs until resume(), e.g. while the watch sleeps"""
+        self._suspended = True
+
+    def resume(self):
+        self._suspended = False
+        now = utime.ticks_ms()
+        for i in range(WORKER_MAX_JOBS):
+            self._due[i] = now  # deadlines that passed while suspended are not caught up
+        self._wake()
+
+    def is_idle(self):
+        if self._lock:
+            self._lock.acquire()
+        try:
+            return self._q_tail == self._q_head and not any(self._jobs)
+        finally:
+            if self._lock:
+                self._lock.release()
+
+    def _take_posted(self, now):
+        if self._lock:
+            self._lock.acquire()
+        try:
+            while self._q_tail != self._q_head:
+                job = self._queue[self._q_tail]
+                self._queue[self._q_tail] = None
+                self._q_tail = (self._q_tail + 1) % WORKER_QUEUE_SIZE
+                if job.done:
+                    continue  # cancelled before it started
+                for i in range(WORKER_MAX_JOBS):
+                    if self._jobs[i] is None:
+                        self._jobs[i] = job
+                        self._due[i] = now
+                        break
+                else:
+                    print("CoreWorker: too many jobs, dropped one")
+                    job.cancelled = True
+                    job.done = True
+        finally:
+            if self._lock:
+                self._lock.release()
+
+    def _retire(self, job, cancelled):
+        if self._lock:
+            self._lock.acquire()
+        for i in range(WORKER_MAX_JOBS):
+            if self._jobs[i] is job:
+                self._jobs[i] = None
+        if self._lock:
+            self._lock.release()
+        try:
+            job.finish()
+        except Exception as e:
+            print(f"CoreWorker job finish error: {e}")
+        job.cancelled = cancelled
+        job.done = True
+
+    def _run_due(self, now):
+        """Step the jobs that are due, returns ms until the next one or None if there are none"""
+        wait_ms = None
+        for i in range(WORKER_MAX_JOBS):
+            job = self._jobs[i]
+            if job is None:
+                continue
+            if job.cancel_requested:
+                self._retire(job, True)
+                continue
+            if self._suspended:
+                continue
+            if utime.ticks_diff(now, self._due[i]) >= 0:
+                try:
+                    delay = job.step(now)
+                except Exception as e:
+                    print(f"CoreWorker job error: {e}")
+                    delay = None
+                if delay is None:
+                    self._retire(job, False)
+                    continue
+                self._due[i] = utime.ticks_add(now, delay)
+            left = utime.ticks_diff(self._due[i], now)
+            if wait_ms is None or left < wait_ms:
+                wait_ms = left
+        return wait_ms
+
+    def _thread_main(self):
+        while True:
+            now = utime.ticks_ms()
+            self._take_posted(now)
+            wait_ms = self._run_due(now)
+            if wait_ms is None:
+                self._signal.acquire()  # until post(), cancel() or resume()
+            elif wait_ms > 0:
+                self._nap(wait_ms)
+
+    def _nap(self, wait_ms):
+        """Sleep up to wait_ms on the worker thread, returning early once _wake() was called"""
+        end = utime.ticks_add(utime.ticks_ms(), wait_ms)
+        while not self._signal.acquire(0):
+            left = utime.ticks_diff(end, utime.ticks_ms())
+            if left <= 0:
+                return
+            utime.sleep_ms(left if left < WORKER_WAIT_SLICE_MS else WORKER_WAIT_SLICE_MS)
+
+    async def run_async(self):
+        """Single core fallback, run as a uasyncio task"""
+        while True:
+            now = utime.ticks_ms()
+            self._take_posted(now)
+            wait_ms = self._run_due(now)
+            self._event.clear()
+            if wait_ms is None:
+                await self._event.wait()
+            elif wait_ms > 0:
+                try:
+                    await asyncio.wait_for_ms(self._event.wait(), wait_ms)
+                except asyncio.TimeoutError:
+                    pass
+            else:
+                await asyncio.sleep_ms(0)
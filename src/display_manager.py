@@ -1,7 +1,8 @@
 
-import framebuf
 import utime
 
+from src.glyph_cache import GlyphCache
+
 
 class DisplayManager:
     """Handles display functionality for monochromatic OLED"""
@@ -10,13 +11,66 @@ class DisplayManager:
         self.oled = oled
         self.text_height = 8
         self.line_padding = 2
-        self._char_fbuf_data = bytearray(self.text_height * (self.text_height // 8))
-        self._char_fbuf = framebuf.FrameBuffer(self._char_fbuf_data, self.text_height, self.text_height, framebuf.MONO_HLSB)
+        self.glyphs = GlyphCache(char_size=self.text_height)
+        # signature of the last menu/message on screen, see _is_cached()
+        self._cached_kind = None
+        self._cached_lines = None
+        self._cached_selected = -1
+        self._cached_title = None
+        self._cached_max_visible = 0
+        self.render_hits = 0
+        self.render_misses = 0
+        self._saved_frame = None
+
+    def invalidate(self):
+        """Forget the cached menu/message, call after drawing on self.oled directly"""
+        self._cached_kind = None
+
+    def _same_lines(self, lines):
+        """Compare with the cached lines as a list, whether lines is a str, list or tuple"""
+        cached = self._cached_lines
+        if isinstance(lines, str):
+            return len(cached) == 1 and cached[0] == lines
+        if len(cached) != len(lines):
+            return False
+        for i in range(len(cached)):
+            if cached[i] != lines[i]:
+                return False
+        return True
+
+    def _is_cached(self, kind, lines, selected, title, max_visible):
+        if (self._cached_kind == kind and self._cached_selected == selected and self._cached_max_visible == max_visible
+                and self._cached_title == title and self._same_lines(lines)):
+            self.render_hits += 1
+            return True
+        self.render_misses += 1
+        self._cached_kind = kind
+        self._cached_lines = [lines] if isinstance(lines, str) else list(lines)
+        self._cached_selected = selected
+        self._cached_title = title
+        self._cached_max_visible = max_visible
+        return False
+
+    def save_frame(self):
+        """Keep a copy of the frame buffer, restore_frame() puts it back"""
+        if self._saved_frame is None:
+            self._saved_frame = bytearray(len(self.oled.buffer))
+        self._saved_frame[:] = self.oled.buffer
+
+    def restore_frame(self):
+        """Put the saved frame back, show() only sends what differs from the panel's RAM"""
+        if self._saved_frame is None:
+            return
+        self._cached_kind = None
+        self.oled.buffer[:] = self._saved_frame
+        self.oled.show()
 
     def clear(self):
+        self._cached_kind = None
         self.oled.fill(0)
 
     def text(self, s, x, y, color=1):
+        self._cached_kind = None
         self.oled.text(s, x, y, color)
 
     # TODO implement this method
@@ -29,25 +83,21 @@ class DisplayManager:
         self.oled.show()
 
     def text_scaled(self, text_string, x_start, y_start, scale, color=1):
+        self._cached_kind = None
         char_width_scaled = self.text_height * scale
         current_x = x_start
         for char_val in text_string:
-            self._char_fbuf.fill(0)
-            self._char_fbuf.text(char_val, 0, 0, color)
-            for y_char_pix in range(self.text_height):
-                for x_char_pix in range(self.text_height):
-                    if self._char_fbuf.pixel(x_char_pix, y_char_pix):
-                        self.oled.fill_rect(current_x + x_char_pix * scale,
-                                            y_start + y_char_pix * scale,
-                                            scale, scale, color)
+            self.oled.blit(self.glyphs.get(char_val, scale, color), current_x, y_start, 1 - color)
             current_x += char_width_scaled
 
     def draw_menu(self, menu_item_titles, selected_index, title="", max_visible_items=5):
-        self.clear()
+        if self._is_cached("menu", menu_item_titles, selected_index, title, max_visible_items):
+            return
+        self.oled.fill(0)
         current_y = 0
         if title:
             title_x = (self.oled.width - len(title) * self.text_height) // 2
-            self.text(title, title_x if title_x > 0 else 0, current_y)
+            self.oled.text(title, title_x if title_x > 0 else 0, current_y)
             current_y += self.text_height + self.line_padding * 2
 
         num_items = len(menu_item_titles)
@@ -66,16 +116,19 @@ class DisplayManager:
         for i in range(window_start, window_end):
             item_title = menu_item_titles[i]
             prefix = "> " if i == selected_index else "  "
-            self.text(prefix + item_title, 5, current_y)
+            self.oled.text(prefix + item_title, 5, current_y)
             current_y += self.text_height + self.line_padding
         self.show()
 
     def show_message(self, message_lines, title="", duration_s=0, clear_after=True):
-        self.clear()
+        if self._is_cached("message", message_lines, 0, title, 0):
+            self._finish_message(duration_s, clear_after)
+            return
+        self.oled.fill(0)
         current_y = 0
         if title:
             title_x = (self.oled.width - len(title) * self.text_height) // 2
-            self.text(title, title_x if title_x > 0 else 0, current_y)
+            self.oled.text(title, title_x if title_x > 0 else 0, current_y)
             current_y += self.text_height + self.line_padding
 
         if isinstance(message_lines, str):
@@ -92,16 +145,19 @@ class DisplayManager:
                             current_line_text += " "
                         current_line_text += word
                     else:
-                        self.text(current_line_text, 0, current_y)
+                        self.oled.text(current_line_text, 0, current_y)
                         current_y += self.text_height + self.line_padding
                         current_line_text = word
                     if word_idx == len(words) - 1 and current_line_text:
-                        self.text(current_line_text, 0, current_y)
+                        self.oled.text(current_line_text, 0, current_y)
                         current_y += self.text_height + self.line_padding
             else:
-                self.text(line, 0, current_y)
+                self.oled.text(line, 0, current_y)
                 current_y += self.text_height + self.line_padding
         self.show()
+        self._finish_message(duration_s, clear_after)
+
+    def _finish_message(self, duration_s, clear_after):
         if duration_s > 0:
             utime.sleep(duration_s)
             if clear_after:
@@ -0,0 +1,46 @@
+from collections import OrderedDict
+import framebuf
+
+from src.constants import GLYPH_CACHE_SIZE
+
+
+class GlyphCache:
+    """Bounded LRU cache of pre-scaled 8x8 font glyphs ready to blit"""
+
+    def __init__(self, max_glyphs=GLYPH_CACHE_SIZE, char_size=8):
+        self.max_glyphs = max_glyphs
+        self.char_size = char_size
+        self._glyphs = OrderedDict()
+        self._src_data = bytearray(char_size * ((char_size + 7) // 8))
+        self._src = framebuf.FrameBuffer(self._src_data, char_size, char_size, framebuf.MONO_HLSB)
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, char_val, scale, color=1):
+        """Return a FrameBuffer with char_val drawn in color, background set to the blit key (1 - color)"""
+        key = (ord(char_val) << 8) | (scale << 1) | (color & 1)
+        glyph = self._glyphs.pop(key, None)
+        if glyph is None:
+            self.misses += 1
+            glyph = self._render(char_val, scale, color)
+            if len(self._glyphs) >= self.max_glyphs:
+                self._glyphs.pop(next(iter(self._glyphs)))
+        else:
+            self.hits += 1
+        self._glyphs[key] = glyph  # (re)insert as most recently used
+        return glyph
+
+    def clear(self):
+        self._glyphs = OrderedDict()
+
+    def _render(self, char_val, scale, color):
+        size = self.char_size * scale
+        glyph = framebuf.FrameBuffer(bytearray(size * ((size + 7) // 8)), size, size, framebuf.MONO_HLSB)
+        glyph.fill(1 - color)
+        self._src.fill(0)
+        self._src.text(char_val, 0, 0, 1)
+        for y_char_pix in range(self.char_size):
+            for x_char_pix in range(self.char_size):
+                if self._src.pixel(x_char_pix, y_char_pix):
+                    glyph.fill_rect(x_char_pix * scale, y_char_pix * scale, scale, scale, color)
+        return glyph
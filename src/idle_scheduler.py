@@ -0,0 +1,71 @@
+import machine
+import uasyncio as asyncio
+import utime
+
+from src.constants import IDLE_MAX_LIGHTSLEEP_MS, IDLE_MIN_LIGHTSLEEP_MS, IDLE_USE_LIGHTSLEEP
+
+
+class IdleScheduler:
+    """Waits until the next deadline or a pin interrupt, whichever comes first.
+
+    Pin IRQ handlers call wake(), which only sets a ThreadSafeFlag, so it is safe from hard
+    interrupts. While waiting, uasyncio parks the CPU in its own WFE based idle; with
+    use_lightsleep the wait is done in machine.lightsleep instead whenever can_lightsleep()
+    allows it, and wait(..., lightsleep=True) asks for it regardless, as the runtime does
+    while the watch sleeps. Time spent waiting and time spent running are accumulated for duty_cycle().
+    """
+
+    def __init__(self, use_lightsleep=IDLE_USE_LIGHTSLEEP, can_lightsleep=None):
+        self.flag = asyncio.ThreadSafeFlag()
+        self.use_lightsleep = use_lightsleep
+        self.can_lightsleep = can_lightsleep
+        self.idle_us = 0
+        self.awake_us = 0
+        self.wakeups = 0
+        self.lightsleeps = 0
+        self._mark_us = utime.ticks_us()
+
+    def wake(self, _arg=None):
+        """IRQ safe, ends the current wait"""
+        self.flag.set()
+
+    def _lightsleep_ok(self, timeout_ms, forced):
+        if not (self.use_lightsleep or forced):
+            return False
+        if timeout_ms is not None and timeout_ms < IDLE_MIN_LIGHTSLEEP_MS:
+            return False
+        return forced or self.can_lightsleep is None or self.can_lightsleep()
+
+    async def wait(self, timeout_ms, lightsleep=False):
+        """Sleep for up to timeout_ms (None = until woken), returns early on wake()"""
+        start = utime.ticks_us()
+        self.awake_us += utime.ticks_diff(start, self._mark_us)
+        if timeout_ms is not None and timeout_ms <= 0:
+            await asyncio.sleep_ms(0)
+        elif self._lightsleep_ok(timeout_ms, lightsleep):
+            # pin interrupts end the lightsleep early as well
+            machine.lightsleep(IDLE_MAX_LIGHTSLEEP_MS if timeout_ms is None else min(timeout_ms, IDLE_MAX_LIGHTSLEEP_MS))
+            self.lightsleeps += 1
+            await asyncio.sleep_ms(0)  # let the IRQ's flag and other tasks run
+        elif timeout_ms is None:
+            await self.flag.wait()
+        else:
+            try:
+                await asyncio.wait_for_ms(self.flag.wait(), timeout_ms)
+            except asyncio.TimeoutError:
+                pass
+        self._mark_us = utime.ticks_us()
+        self.idle_us += utime.ticks_diff(self._mark_us, start)
+        self.wakeups += 1
+
+    def duty_cycle(self):
+        """Percentage of time spent awake since the last reset_stats()"""
+        total = self.idle_us + self.awake_us
+        return 100 * self.awake_us // total if total else 0
+
+    def reset_stats(self):
+        self.idle_us = 0
+        self.awake_us = 0
+        self.wakeups = 0
+        self.lightsleeps = 0
+        self._mark_us = utime.ticks_us()
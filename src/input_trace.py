@@ -0,0 +1,214 @@
+from array import array
+import os
+import uasyncio as asyncio
+import utime
+
+from src.constants import (DEBOUNCE_MS, INPUT_TRACE_FILE, INPUT_TRACE_MAX_EDGES, INPUT_TRACE_PENDING_PRESSES,
+                           INPUT_TRACE_REPLAY_DELAY_MS, INPUT_TRACE_SAVE_MS)
+
+TRACE_MAGIC = b"CWT1"
+RECORD_SIZE = 3  # u8 button | level << 7, u16 ms since the previous record
+WAIT_ID = 0x7F  # record that only carries time, for gaps over 65535 ms
+MAX_DELTA = 0xFFFF
+FAST_GAP_MS = DEBOUNCE_MS + 1  # replay_fast keeps edges just far enough apart to pass debounce
+
+
+def _write_header(f, names):
+    f.write(TRACE_MAGIC)
+    f.write(bytes([len(names)]))
+    for name in names:
+        f.write(bytes([len(name)]))
+        f.write(name.encode())
+
+
+def read_trace(path=INPUT_TRACE_FILE):
+    """Return (names, records) where records is a list of (delta_ms, button, level)"""
+    with open(path, "rb") as f:
+        data = f.read()
+    if data[:4] != TRACE_MAGIC:
+        raise ValueError("Not an input trace: {}".format(path))
+    names = []
+    pos = 5
+    for _ in range(data[4]):
+        n = data[pos]
+        names.append(data[pos + 1:pos + 1 + n].decode())
+        pos += 1 + n
+    records = []
+    wait = 0
+    while pos + RECORD_SIZE <= len(data):
+        flags = data[pos]
+        delta = wait + (data[pos + 1] | data[pos + 2] << 8)
+        pos += RECORD_SIZE
+        if flags & 0x7F == WAIT_ID:
+            wait = delta
+            continue
+        wait = 0
+        records.append((delta, flags & 0x7F, flags >> 7))
+    return names, records
+
+
+class TraceRecorder:
+    """Records every raw button edge as (ms since the previous edge, button, level).
+
+    The Buttons call record() from their debounce step, with the edge's own timestamp, so a
+    trace keeps the timing of the original presses including bounce. Records go into a
+    preallocated buffer; the file is rewritten once input has been quiet for
+    INPUT_TRACE_SAVE_MS, so a recording survives pulling the power a moment later.
+    """
+
+    def __init__(self, buttons, time_service, path=INPUT_TRACE_FILE):
+        self.names = list(buttons.keys())
+        self.buttons = buttons
+        self.time_service = time_service
+        self.path = path
+        self._buf = bytearray(INPUT_TRACE_MAX_EDGES * RECORD_SIZE)
+        self._len = 0
+        self._last_ms = 0
+        self.dropped = 0
+        self._alarm = None
+        self._save_cb = self._on_quiet
+
+    def start(self):
+        self._len = 0
+        self._last_ms = utime.ticks_ms()
+        for i, name in enumerate(self.names):
+            self.buttons[name].set_recorder(self, i)
+
+    def stop(self):
+        for btn in self.buttons.values():
+            btn.set_recorder(None, 0)
+        self.save()
+
+    def _put(self, flags, delta):
+        if self._len + RECORD_SIZE > len(self._buf):
+            self.dropped += 1
+            return False
+        buf = self._buf
+        buf[self._len] = flags
+        buf[self._len + 1] = delta & 0xFF
+        buf[self._len + 2] = delta >> 8
+        self._len += RECORD_SIZE
+        return True
+
+    def record(self, trace_id, level, ticks):
+        delta = utime.ticks_diff(ticks, self._last_ms)
+        if delta < 0:
+            delta = 0
+        while delta > MAX_DELTA:
+            if not self._put(WAIT_ID, MAX_DELTA):
+                return
+            delta -= MAX_DELTA
+        if self._put(trace_id | (level << 7), delta):
+            self._last_ms = ticks
+        if self._alarm is not None:
+            self._alarm.cancel()
+        self._alarm = self.time_service.add_alarm(INPUT_TRACE_SAVE_MS, self._save_cb)
+
+    def _on_quiet(self, _alarm):
+        self._alarm = None
+        self.save()
+
+    def save(self):
+        tmp_path = self.path + ".tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                _write_header(f, self.names)
+                f.write(memoryview(self._buf)[:self._len])
+            os.rename(tmp_path, self.path)
+        except OSError as e:
+            print(f"Input trace write error: {e}")
+
+
+class TraceReplayer:
+    """Feeds a recorded trace back into the Buttons and reports how the UI kept up.
+
+    run() is a uasyncio task next to the runtime. It injects each edge into its Button's
+    edge ring, as the IRQ would, either at the recorded timing or with gaps cut down to
+    FAST_GAP_MS. Every frame sent to the OLED is timestamped, so the report has, per press,
+    the latency from the edge to the next frame, plus frames and the loop's idle share.
+    Presses still waiting for a frame are kept in a small FIFO; when it is full the oldest is
+    counted in overrun instead. The pin IRQs are detached while the trace plays, so a real
+    press cannot slip in between the replayed ones.
+    """
+
+    def __init__(self, buttons, display, idle=None, path=INPUT_TRACE_FILE):
+        self.buttons = buttons
+        self.display = display
+        self.idle = idle
+        self.path = path
+        self.frames = 0
+        self._press_us = array('I', [0] * INPUT_TRACE_PENDING_PRESSES)
+        self._pending = 0  # presses in _press_us, oldest first
+        self.overrun = 0
+        self.presses = 0
+        self.duration_ms = 0
+        self.latency = None
+        self.done = False
+
+    def _wrap_show(self):
+        oled = self.display.oled
+        show = oled.show
+
+        def timed_show():
+            show()
+            self.frames += 1
+            if self._pending:
+                now = utime.ticks_us()
+                for i in range(self._pending):
+                    self.latency.add(utime.ticks_diff(now, self._press_us[i]))
+                self._pending = 0
+        oled.show = timed_show
+        return show
+
+    async def run(self, fast=False):
+        from src.profiler import Histogram
+        names, records = read_trace(self.path)
+        targets = [self.buttons.get(name) for name in names]
+        self.latency = Histogram("latency")
+        await asyncio.sleep_ms(INPUT_TRACE_REPLAY_DELAY_MS)
+        show = self._wrap_show()
+        if self.idle is not None:
+            self.idle.reset_stats()
+        for btn in self.buttons.values():
+            if btn.use_irq:
+                btn.set_irq(False)
+        start = utime.ticks_ms()
+        for delta, button, level in records:
+            await asyncio.sleep_ms(min(delta, FAST_GAP_MS) if fast else delta)
+            btn = targets[button] if button < len(targets) else None
+            if btn is None:
+                continue  # the trace has a button this watch does not
+            if level == 0:
+                self.presses += 1
+                self._add_press(utime.ticks_us())
+            btn.inject(level)
+        await asyncio.sleep_ms(INPUT_TRACE_SAVE_MS)  # let the last press render
+        self.duration_ms = utime.ticks_diff(utime.ticks_ms(), start)
+        for btn in self.buttons.values():
+            if btn.use_irq:
+                btn.set_irq(True)
+        self.display.oled.show = show
+        self.done = True
+        self.report(fast)
+
+    def _add_press(self, t_us):
+        pending = self._press_us
+        if self._pending == len(pending):
+            self.overrun += 1  # no frame for the oldest press yet, drop it from the latency
+            for i in range(1, self._pending):
+                pending[i - 1] = pending[i]
+            self._pending -= 1
+        pending[self._pending] = t_us
+        self._pending += 1
+
+    def report(self, fast=False):
+        lat = self.latency
+        print("trace {} ({}): {} presses in {} ms, {} frames".format(
+            self.path, "fast" if fast else "recorded timing", self.presses, self.duration_ms, self.frames))
+        if lat.count:
+            print("press to frame us: min {} avg {} p95 {} max {} ({} of {} presses drew)".format(
+                lat.min, lat.avg(), lat.percentile(95), lat.max, lat.count, self.presses))
+        if self.overrun:
+            print("{} presses got no frame before {} later ones".format(self.overrun, INPUT_TRACE_PENDING_PRESSES))
+        if self.idle is not None:
+            print("loop awake {}%, {} wakeups".format(self.idle.duty_cycle(), self.idle.wakeups))
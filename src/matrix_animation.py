@@ -0,0 +1,117 @@
+from array import array
+import utime
+
+
+def compile_mask(rows):
+    """Pack a list of 0/1 rows into an integer, bit y * width + x set for lit pixels"""
+    mask = 0
+    width = len(rows[0])
+    for y, row in enumerate(rows):
+        for x, pixel_on in enumerate(row):
+            if pixel_on:
+                mask |= 1 << (y * width + x)
+    return mask
+
+
+class Animation:
+    """A sequence of (mask, (r, g, b), duration_ms) frames, optionally looped.
+
+    Frames are stored packed and rendered once into RGB byte frames for a MatrixRenderer;
+    they are only re-rendered when the renderer's brightness LUT changes.
+    """
+
+    def __init__(self, frames, loops=1):
+        self.masks = array('L', [f[0] for f in frames])
+        self.colors = bytearray(len(frames) * 3)
+        for i, f in enumerate(frames):
+            self.colors[i * 3:i * 3 + 3] = bytes(f[1])
+        self.durations = array('H', [f[2] for f in frames])
+        self.loops = loops
+        self._rendered = None
+        self._rendered_version = -1
+
+    def __len__(self):
+        return len(self.masks)
+
+    def total_ms(self):
+        return sum(self.durations) * self.loops
+
+    def rendered(self, renderer):
+        if self._rendered is None or self._rendered_version != renderer.version:
+            size = renderer.num_pixels * 3
+            frames = []
+            for i in range(len(self.masks)):
+                frame = bytearray(size)
+                mask = self.masks[i]
+                r, g, b = self.colors[i * 3], self.colors[i * 3 + 1], self.colors[i * 3 + 2]
+                for px in range(renderer.num_pixels):
+                    if mask >> px & 1:
+                        renderer.render_color(r, g, b, frame, px * 3)
+                frames.append(frame)
+            self._rendered = frames
+            self._rendered_version = renderer.version
+        return self._rendered
+
+
+class AnimationPlayer:
+    """Steps an Animation on a MatrixRenderer, each frame is one buffer copy and a write"""
+
+    def __init__(self, renderer):
+        self.renderer = renderer
+        self.animation = None
+        self._frames = None
+        self._index = 0
+        self._loop = 0
+        self._next_ms = 0
+        self._on_frame = None
+
+    def start(self, animation, on_frame=None):
+        """Show the first frame now; on_frame(index) is called as each frame is shown"""
+        self.animation = animation
+        self._frames = animation.rendered(self.renderer)
+        self._index = -1
+        self._loop = 0
+        self._next_ms = utime.ticks_ms()
+        self._on_frame = on_frame
+        self.update()
+
+    def stop(self):
+        self.animation = None
+        self._frames = None
+        self._on_frame = None
+
+    def is_playing(self):
+        return self.animation is not None
+
+    def next_deadline(self):
+        """ticks_ms value at which the next frame is due"""
+        return self._next_ms
+
+    def update(self):
+        """Advance to the next frame if it is due, returns False once the animation has ended"""
+        animation = self.animation
+        if animation is None:
+            return False
+        if utime.ticks_diff(utime.ticks_ms(), self._next_ms) < 0:
+            return True
+        self._index += 1
+        if self._index >= len(animation):
+            self._loop += 1
+            if self._loop >= animation.loops:
+                self.stop()
+                return False
+            self._index = 0
+        self.renderer.blit(self._frames[self._index])
+        self.renderer.show()
+        self._next_ms = utime.ticks_add(self._next_ms, animation.durations[self._index])
+        if self._on_frame:
+            self._on_frame(self._index)
+        return True
+
+    def play(self, animation, on_frame=None):
+        """Blocking helper: play animation to the end"""
+        self.start(animation, on_frame)
+        while self.update():
+            wait_ms = utime.ticks_diff(self._next_ms, utime.ticks_ms())
+            if wait_ms > 0:
+                utime.sleep_ms(wait_ms)
@@ -0,0 +1,25 @@
+from src.constants import COLOR_BLACK, COLOR_ORANGE, COLOR_RED, COLOR_YELLOW, MATRIX_NUM_PIXELS
+from src.matrix_animation import Animation, compile_mask
+
+# Compiled at import, the nested pattern lists are garbage once compile_mask returns
+MATRIX_DIGIT_MASKS = [compile_mask(rows) for rows in (
+    [[0, 1, 1, 1, 0], [0, 1, 0, 1, 0], [0, 1, 0, 1, 0], [0, 1, 0, 1, 0], [0, 1, 1, 1, 0]],  # 0
+    [[0, 0, 1, 0, 0], [0, 1, 1, 0, 0], [0, 0, 1, 0, 0], [0, 0, 1, 0, 0], [0, 1, 1, 1, 0]],  # 1
+    [[0, 1, 1, 1, 0], [0, 0, 0, 1, 0], [0, 1, 1, 1, 0], [0, 1, 0, 0, 0], [0, 1, 1, 1, 0]],  # 2
+    [[0, 1, 1, 1, 0], [0, 0, 0, 1, 0], [0, 0, 1, 1, 0], [0, 0, 0, 1, 0], [0, 1, 1, 1, 0]],  # 3
+    [[0, 1, 0, 1, 0], [0, 1, 0, 1, 0], [0, 1, 1, 1, 0], [0, 0, 0, 1, 0], [0, 0, 0, 1, 0]],  # 4
+    [[0, 1, 1, 1, 0], [0, 1, 0, 0, 0], [0, 1, 1, 1, 0], [0, 0, 0, 1, 0], [0, 1, 1, 1, 0]],  # 5
+    [[0, 0, 1, 1, 0], [0, 1, 0, 0, 0], [0, 1, 1, 1, 0], [0, 1, 0, 1, 0], [0, 1, 1, 1, 0]],  # 6
+    [[0, 1, 1, 1, 0], [0, 0, 0, 1, 0], [0, 0, 1, 0, 0], [0, 0, 1, 0, 0], [0, 0, 1, 0, 0]],  # 7
+    [[0, 1, 1, 1, 0], [0, 1, 0, 1, 0], [0, 1, 1, 1, 0], [0, 1, 0, 1, 0], [0, 1, 1, 1, 0]],  # 8
+    [[0, 1, 1, 1, 0], [0, 1, 0, 1, 0], [0, 1, 1, 1, 0], [0, 0, 0, 1, 0], [0, 1, 1, 1, 0]],  # 9
+)]
+MATRIX_FULL_MASK = (1 << MATRIX_NUM_PIXELS) - 1
+
+COUNTDOWN_ANIMATION = Animation([(MATRIX_DIGIT_MASKS[d], COLOR_RED, 1000) for d in range(9, -1, -1)])
+BOOM_ANIMATION = Animation([
+    (MATRIX_FULL_MASK, COLOR_RED, 100),
+    (MATRIX_FULL_MASK, COLOR_ORANGE, 100),
+    (MATRIX_FULL_MASK, COLOR_YELLOW, 100),
+    (MATRIX_FULL_MASK, COLOR_BLACK, 70),
+], loops=3)
@@ -0,0 +1,60 @@
+import utime
+
+from src.constants import PLASMA_FRAME_MS
+from src.core_worker import Job
+
+
+class PlasmaJob(Job):
+    """Renders plasma frames to the matrix for duration_ms"""
+
+    def __init__(self, plasma, renderer, duration_ms):
+        super().__init__()
+        self.plasma = plasma
+        self.renderer = renderer
+        self.duration_ms = duration_ms
+        self._end_ms = None
+
+    def step(self, now_ms):
+        if self._end_ms is None:
+            self._end_ms = utime.ticks_add(now_ms, self.duration_ms)
+        elif utime.ticks_diff(now_ms, self._end_ms) >= 0:
+            return None
+        self.plasma.render(self.renderer.buf)
+        self.renderer.show()
+        spare_ms = PLASMA_FRAME_MS - utime.ticks_diff(utime.ticks_ms(), now_ms)
+        return spare_ms if spare_ms > 0 else 0
+
+    def finish(self):
+        if self.cancel_requested:
+            self.renderer.clear()  # the app may already be gone, leave the matrix dark
+            self.renderer.show()
+
+
+class AnimationJob(Job):
+    """Plays an Animation with an AnimationPlayer, frame is the index of the frame shown"""
+
+    def __init__(self, player, animation):
+        super().__init__()
+        self.player = player
+        self.animation = animation
+        self.frame = -1
+        self._on_frame_cb = self._on_frame
+        self._started = False
+
+    def _on_frame(self, index):
+        self.frame = index
+
+    def step(self, now_ms):
+        if not self._started:
+            self._started = True
+            self.player.start(self.animation, self._on_frame_cb)
+        elif not self.player.update():
+            return None
+        wait_ms = utime.ticks_diff(self.player.next_deadline(), utime.ticks_ms())
+        return wait_ms if wait_ms > 0 else 0
+
+    def finish(self):
+        self.player.stop()
+        if self.cancel_requested:
+            self.player.renderer.clear()
+            self.player.renderer.show()
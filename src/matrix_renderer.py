@@ -0,0 +1,65 @@
+from src.constants import MATRIX_DEFAULT_BRIGHTNESS, MATRIX_GAMMA
+
+
+class MatrixRenderer:
+    """Writes colours straight into a NeoPixel byte buffer through a gamma/brightness LUT.
+
+    The bytes go in the order this matrix expects on the wire, R, G, B: the same bytes the
+    original (g, r, b) tuple writes produced through NeoPixel's ORDER remap.
+    """
+
+    def __init__(self, neopixel, brightness=MATRIX_DEFAULT_BRIGHTNESS, gamma=MATRIX_GAMMA):
+        self.neopixel = neopixel
+        self.buf = neopixel.buf
+        self._buf_mv = memoryview(self.buf)
+        self.num_pixels = len(self.buf) // 3
+        self.lut = bytearray(256)
+        self.brightness = brightness
+        self.gamma = gamma
+        self.version = 0  # bumped on every LUT rebuild so users can refresh derived tables
+        self.set_brightness(brightness, gamma)
+
+    def set_brightness(self, brightness, gamma=None):
+        """Rebuild the 256-entry LUT, after this every write uses the new brightness for free"""
+        if gamma is not None:
+            self.gamma = gamma
+        self.brightness = brightness
+        scale = 255 * brightness
+        for i in range(256):
+            self.lut[i] = min(255, int((i / 255) ** self.gamma * scale + 0.5))
+        self.version += 1
+
+    def set_pixel(self, index, r, g, b):
+        lut = self.lut
+        o = index * 3
+        self.buf[o] = lut[r]
+        self.buf[o + 1] = lut[g]
+        self.buf[o + 2] = lut[b]
+
+    def fill(self, r, g, b):
+        """Set every pixel with one LUT lookup per channel and doubling memoryview copies"""
+        self.set_pixel(0, r, g, b)
+        mv = self._buf_mv
+        total = len(self.buf)
+        n = 3
+        while n < total:
+            m = n if n < total - n else total - n
+            mv[n:n + m] = mv[0:m]
+            n += m
+
+    def clear(self):
+        self.fill(0, 0, 0)
+
+    def render_color(self, r, g, b, out, offset=0):
+        """Write the corrected RGB bytes of a colour into out[offset:offset + 3]"""
+        lut = self.lut
+        out[offset] = lut[r]
+        out[offset + 1] = lut[g]
+        out[offset + 2] = lut[b]
+
+    def blit(self, frame):
+        """Copy a pre-rendered RGB frame (len(buf) bytes) into the pixel buffer"""
+        self._buf_mv[:] = frame
+
+    def show(self):
+        self.neopixel.write()
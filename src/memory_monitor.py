@@ -0,0 +1,115 @@
+import gc
+
+from src.constants import MEM_IDLE_COLLECT, MEM_IDLE_COLLECT_BYTES, MEM_IDLE_COLLECT_MIN_MS, MEM_SAMPLE_FRAMES
+
+PAGE_FORMAT = "{:<6}{:>5}{:>5}"  # 16 characters, one OLED line
+
+
+class AppMemory:
+    """Heap figures of one app since boot, in bytes"""
+
+    def __init__(self, name):
+        self.name = name
+        self.peak_alloc = 0  # high-water mark of gc.mem_alloc() while the app was current
+        self.min_free = 0
+        self.enter_alloc = 0
+        self.exit_alloc = 0
+        self.gcs = 0  # collections that happened on their own, i.e. mid-frame
+        self.frames = 0
+
+
+class MemoryMonitor:
+    """Samples gc.mem_alloc()/mem_free() per app to find allocation peaks and GC pauses.
+
+    The runtime calls enter()/exit() around every app, frame() after each render and idle()
+    just before it sleeps. Every MEM_SAMPLE_FRAMES frames (and at the other hooks) the heap
+    is sampled; mem_alloc going down between samples without a collect we know of (idle() or
+    rebase()) means the GC ran on its own, most likely in the middle of a frame. With MEM_IDLE_COLLECT, idle()
+    collects once MEM_IDLE_COLLECT_BYTES have been allocated and the loop is about to sleep
+    for at least MEM_IDLE_COLLECT_MIN_MS, so the pause falls where nothing is waiting.
+    """
+
+    def __init__(self, idle_collect=MEM_IDLE_COLLECT):
+        self.idle_collect = idle_collect
+        self.apps = {}
+        self.current = None
+        self.idle_collects = 0
+        self._frame_count = 0
+        self._last_alloc = gc.mem_alloc()
+        self._collected_alloc = self._last_alloc
+
+    def _stats(self, name):
+        stats = self.apps.get(name)
+        if stats is None:
+            stats = AppMemory(name)
+            stats.min_free = gc.mem_free()
+            self.apps[name] = stats
+        return stats
+
+    def sample(self):
+        alloc = gc.mem_alloc()
+        stats = self.current
+        if stats is not None:
+            if alloc < self._last_alloc:
+                stats.gcs += 1
+            if alloc > stats.peak_alloc:
+                stats.peak_alloc = alloc
+            free = gc.mem_free()
+            if free < stats.min_free:
+                stats.min_free = free
+        if alloc < self._last_alloc:
+            self._collected_alloc = alloc
+        self._last_alloc = alloc
+        return alloc
+
+    def rebase(self):
+        """Take the heap as it is now, after a gc.collect() done on purpose elsewhere"""
+        self._last_alloc = self._collected_alloc = gc.mem_alloc()
+
+    def enter(self, name):
+        self.current = self._stats(name)
+        self.current.enter_alloc = self.sample()
+
+    def exit(self):
+        if self.current is not None:
+            self.current.exit_alloc = self.sample()
+            self.current = None
+
+    def frame(self):
+        if self.current is None:
+            return
+        self.current.frames += 1
+        self._frame_count += 1
+        if self._frame_count >= MEM_SAMPLE_FRAMES:
+            self._frame_count = 0
+            self.sample()
+
+    def idle(self, timeout_ms):
+        """Called before the loop sleeps for timeout_ms (None: until an interrupt)"""
+        alloc = self.sample()
+        if not self.idle_collect or alloc - self._collected_alloc < MEM_IDLE_COLLECT_BYTES:
+            return
+        if timeout_ms is not None and timeout_ms < MEM_IDLE_COLLECT_MIN_MS:
+            return
+        gc.collect()
+        self.idle_collects += 1
+        self.rebase()
+
+    def header(self):
+        return PAGE_FORMAT.format("app", "peak", "gc")
+
+    def lines(self):
+        """Per app: peak allocation in KiB and GC runs outside idle(), then the heap now"""
+        out = []
+        for stats in self.apps.values():
+            out.append(PAGE_FORMAT.format(stats.name[:6], "{}k".format(stats.peak_alloc // 1024), stats.gcs))
+        out.append(PAGE_FORMAT.format("free", "{}k".format(gc.mem_free() // 1024), ""))
+        out.append(PAGE_FORMAT.format("idlegc", self.idle_collects, ""))
+        return out
+
+    def report(self):
+        print("app             peak  min free  enter   exit  gcs frames")
+        for s in self.apps.values():
+            print("{:<14}{:>7}{:>10}{:>7}{:>7}{:>5}{:>7}".format(
+                s.name[:14], s.peak_alloc, s.min_free, s.enter_alloc, s.exit_alloc, s.gcs, s.frames))
+        print("heap free {} alloc {}, {} idle collects".format(gc.mem_free(), gc.mem_alloc(), self.idle_collects))
@@ -0,0 +1,99 @@
+import math
+import micropython
+import utime
+
+from src.constants import PLASMA_SPEED_MS
+
+# phases are 8.8 fixed point in units of 1/256 of a sine period
+_PHASE_PER_RAD = 256 * 256 / (2 * math.pi)
+
+
+class PlasmaEngine:
+    """Integer plasma effect rendered from sine and palette lookup tables.
+
+    Writes straight into an RGB byte buffer (NeoPixel.buf, in the matrix's wire order), one pixel per 3 bytes in row-major
+    order. Per frame it does w + h + (w + h - 1) sine lookups; every pixel is then one add
+    and a palette copy. The phase moves by speed radians per PLASMA_SPEED_MS of ticks_ms,
+    so the animation runs at the same pace whatever the frame rate.
+    """
+
+    def __init__(self, width, height, lut, sx=0.9, sy=0.9, sd=0.7, speed=0.15):
+        self.width = width
+        self.height = height
+        self._sin = bytearray(256)
+        for i in range(256):
+            self._sin[i] = int((math.sin(i * 2 * math.pi / 256) + 1) * 127.5)
+        self._x_phase = [int(x * sx * _PHASE_PER_RAD) >> 8 for x in range(width)]
+        self._y_phase = [int(y * sy * _PHASE_PER_RAD) >> 8 for y in range(height)]
+        self._d_phase = [int(d * sd * _PHASE_PER_RAD) >> 8 for d in range(width + height - 1)]
+        self._col = bytearray(width)
+        self._row = bytearray(height)
+        self._diag = bytearray(width + height - 1)
+        self._speed = int(speed * _PHASE_PER_RAD)
+        self._t = 0
+        self._t_ms = None  # ticks_ms of the last render
+        self._raw_palette = bytearray(256 * 3)
+        self._palette = bytearray(256 * 3)
+        self._build_raw_palette()
+        self.set_lut(lut)
+        self.frames = 0
+        self.fps = 0
+        self._fps_frames = 0
+        self._fps_start = utime.ticks_ms()
+
+    def _build_raw_palette(self):
+        """Full-range RGB palette; index i stands for the sum of the three sines, i * 3"""
+        pal = self._raw_palette
+        for i in range(256):
+            v = (i * 3) / 127.5 - 3  # back to the -3..3 range of the float version
+            pal[i * 3] = int((math.sin(v * math.pi) + 1) * 127.5)
+            pal[i * 3 + 1] = int((math.sin(v * math.pi + 2 * math.pi / 3) + 1) * 127.5)
+            pal[i * 3 + 2] = int((math.sin(v * math.pi + 4 * math.pi / 3) + 1) * 127.5)
+
+    def set_lut(self, lut):
+        """Map the raw palette through a brightness/gamma LUT (see MatrixRenderer.lut)"""
+        raw = self._raw_palette
+        pal = self._palette
+        for i in range(len(pal)):
+            pal[i] = lut[raw[i]]
+
+    @micropython.native
+    def render(self, buf):
+        """Draw the next frame into buf (at least width * height * 3 bytes)"""
+        sin = self._sin
+        t = self._t >> 8
+        col = self._col
+        row = self._row
+        diag = self._diag
+        x_phase = self._x_phase
+        for x in range(self.width):
+            col[x] = sin[(x_phase[x] + t) & 0xFF]
+        y_phase = self._y_phase
+        for y in range(self.height):
+            row[y] = sin[(y_phase[y] + t) & 0xFF]
+        d_phase = self._d_phase
+        for d in range(len(diag)):
+            diag[d] = sin[(d_phase[d] + t) & 0xFF]
+        pal = self._palette
+        width = self.width
+        o = 0
+        for y in range(self.height):
+            ry = row[y]
+            for x in range(width):
+                p = ((col[x] + ry + diag[x + y]) // 3) * 3
+                buf[o] = pal[p]
+                buf[o + 1] = pal[p + 1]
+                buf[o + 2] = pal[p + 2]
+                o += 3
+        now = utime.ticks_ms()
+        if self._t_ms is not None:
+            # one period is 0x10000, masking keeps _t a small int on long runs
+            self._t = (self._t + self._speed * utime.ticks_diff(now, self._t_ms) // PLASMA_SPEED_MS) & 0xFFFF
+        self._t_ms = now
+        self.frames += 1
+        self._fps_frames += 1
+        elapsed = utime.ticks_diff(now, self._fps_start)
+        if elapsed >= 1000:
+            self.fps = self._fps_frames * 1000 // elapsed
+            self._fps_frames = 0
+            self._fps_start = now
@@ -0,0 +1,150 @@
+from array import array
+import utime
+
+from src.constants import PROFILE_BUCKETS, PROFILE_MAX_LABELS
+
+PAGE_FORMAT = "{:<6}{:>5}{:>5}"  # 16 characters, one OLED line
+
+
+class Histogram:
+    """Durations in us: count, sum, min, max and power-of-two buckets for the p95.
+
+    Bucket i holds durations below 2**i us, so percentile() is exact to a factor of two,
+    which is enough to tell a 300 us draw from a 5 ms one without storing samples.
+    """
+
+    def __init__(self, label):
+        self.label = label
+        self.buckets = array('I', [0] * PROFILE_BUCKETS)
+        self.reset()
+
+    def reset(self):
+        for i in range(PROFILE_BUCKETS):
+            self.buckets[i] = 0
+        self.count = 0
+        self.total = 0
+        self.min = 0
+        self.max = 0
+
+    def add(self, us):
+        if not self.count or us < self.min:
+            self.min = us
+        if us > self.max:
+            self.max = us
+        self.count += 1
+        self.total += us
+        i = 0
+        while us and i < PROFILE_BUCKETS - 1:
+            us >>= 1
+            i += 1
+        self.buckets[i] += 1
+
+    def avg(self):
+        return self.total // self.count if self.count else 0
+
+    def percentile(self, pct):
+        """Upper bound, in us, of the bucket holding the pct-th percentile"""
+        need = (self.count * pct + 99) // 100
+        seen = 0
+        for i in range(PROFILE_BUCKETS):
+            seen += self.buckets[i]
+            if seen >= need and seen:
+                return min(1 << i, self.max)
+        return self.max
+
+
+def fmt_us(us):
+    """Four characters at most: 812u, 1.2m, 35m, 1.5s"""
+    if us < 1000:
+        return "{}u".format(us)
+    if us < 10000:
+        return "{}.{}m".format(us // 1000, us // 100 % 10)
+    if us < 1000000:
+        return "{}m".format(us // 1000)
+    return "{}.{}s".format(us // 1000000, us // 100000 % 10)
+
+
+class Profiler:
+    """Opt-in timing of display, I2C, buzzer and runtime calls with utime.ticks_us.
+
+    wrap() replaces a method on one instance with a timed version, so nothing is measured
+    (or slowed down) unless main.py sets PROFILE_ENABLED. Histograms are created up front
+    and only updated afterwards; report() prints them over serial and the Settings app
+    shows them as an OLED page. Nested calls are timed separately, e.g. "oled" (the SSD1306
+    show) is also part of "dshow", and both contain the "i2ccmd"/"i2cdat" writes.
+    """
+
+    def __init__(self):
+        self.histograms = []
+        self.idle = None  # IdleScheduler, for the idle/awake split in report()
+
+    def histogram(self, label):
+        for h in self.histograms:
+            if h.label == label:
+                return h
+        if len(self.histograms) >= PROFILE_MAX_LABELS:
+            raise ValueError("too many profiler labels")
+        h = Histogram(label)
+        self.histograms.append(h)
+        return h
+
+    def wrap(self, obj, name, label):
+        """Time every call of obj.name under label, at most 6 characters to fit the OLED page"""
+        method = getattr(obj, name)
+        h = self.histogram(label)
+        ticks_us = utime.ticks_us
+        ticks_diff = utime.ticks_diff
+
+        def timed(*args, **kwargs):
+            start = ticks_us()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                h.add(ticks_diff(ticks_us(), start))
+
+        setattr(obj, name, timed)
+
+    def instrument_display(self, display):
+        for name, label in (("draw_menu", "menu"), ("show_message", "msg"), ("text_scaled", "scaled"), ("show", "dshow")):
+            self.wrap(display, name, label)
+        for name, label in (("show", "oled"), ("write_cmd", "i2ccmd"), ("write_data", "i2cdat")):
+            self.wrap(display.oled, name, label)
+
+    def instrument_buzzer(self, buzzer):
+        for name, label in (("play_tone", "tone"), ("play_song", "song"), ("play_stream", "stream"),
+                            ("start_tone", "hold"), ("stop_tone", "stop")):
+            self.wrap(buzzer, name, label)
+
+    def instrument_runtime(self, runtime):
+        self.idle = runtime.idle
+        for name, label in (("_dispatch_input", "input"), ("_run_tick", "tick"), ("_render", "render")):
+            self.wrap(runtime, name, label)
+        if runtime.time_service is not None:
+            self.wrap(runtime.time_service, "run_due", "alarms")
+
+    def reset(self):
+        for h in self.histograms:
+            h.reset()
+        if self.idle is not None:
+            self.idle.reset_stats()
+
+    def header(self):
+        return PAGE_FORMAT.format("name", "avg", "p95")
+
+    def lines(self):
+        """One 16 character line per histogram that has samples: label, avg, p95"""
+        out = []
+        for h in self.histograms:
+            if h.count:
+                out.append(PAGE_FORMAT.format(h.label[:6], fmt_us(h.avg()), fmt_us(h.percentile(95))))
+        return out
+
+    def report(self):
+        print("label   count    min    avg    p95    max (us)")
+        for h in self.histograms:
+            if h.count:
+                print("{:<6}{:>7}{:>7}{:>7}{:>7}{:>7}".format(h.label, h.count, h.min, h.avg(), h.percentile(95), h.max))
+        idle = self.idle
+        if idle is not None:
+            print("idle {} ms, awake {} ms, {} wakeups, awake {}%".format(
+                idle.idle_us // 1000, idle.awake_us // 1000, idle.wakeups, idle.duty_cycle()))
@@ -0,0 +1,240 @@
+import uasyncio as asyncio
+import utime
+
+from src.app_manager import AppManager
+from src.constants import INPUT_PERIOD_MS, LOG_CH_APP_BASE, RENDER_PERIOD_MS, SLEEP_CHECK_MS, SLEEP_LIGHTSLEEP_MS
+from src.idle_scheduler import IdleScheduler
+
+
+class AppRuntime:
+    """Single event loop driving the current app.
+
+    Each pass drains the buttons, runs the app's tick when it is due, renders if the app
+    was invalidated and checks the sleep switch. It then sleeps in IdleScheduler until the
+    earliest deadline (next tick, alarm, toast end, frame limit) or a button/switch interrupt,
+    so a static screen costs no wakeups at all. Pins without IRQs are polled instead.
+    While the watch sleeps only TimeService alarms keep running, and the wait between them
+    is a lightsleep when the SleepManager allows it.
+    Audio needs no deadline: BuzzerController already plays from a machine.Timer, and LED
+    effects run on the CoreWorker (core 1, or a uasyncio task next to this loop).
+    With a SensorLog, the seconds spent in each app are logged when it is left. The log and
+    pending settings are flushed before sleeping. A MemoryMonitor is told about app switches,
+    frames and idle points, where it may run the GC.
+    """
+
+    def __init__(self, display_manager, buttons, buzzer_control, sleep_manager, registry, worker=None,
+                 time_service=None, log=None, settings=None, memory=None):
+        self.display = display_manager
+        self.buttons = buttons
+        self.buzzer = buzzer_control
+        self.sleep_manager = sleep_manager
+        self.apps = AppManager(registry, display_manager, buttons, buzzer_control)
+        self.worker = worker
+        self.time_service = time_service
+        self.log = log
+        self.settings = settings
+        self.memory = memory
+        self.idle = IdleScheduler(can_lightsleep=self._can_lightsleep)
+        self.launcher = None
+        self.current = None
+        self._current_cfg = None
+        self._entered_ms = 0
+        self.paused = False
+        self._pending_launch = None
+        self._tasks = []
+        self._names = list(buttons.keys())
+        self._last_tick = 0
+        self._last_render = 0
+        self._poll_buttons = False
+        for btn in buttons.values():
+            if btn.use_irq:
+                btn.set_wake_handler(self.idle.wake)
+            else:
+                self._poll_buttons = True
+        self._poll_switch = False
+        try:
+            sleep_manager.set_wake_handler(self.idle.wake)
+        except Exception as e:
+            print(f"Sleep switch IRQ unavailable, polling: {e}")
+            self._poll_switch = True
+
+    def set_launcher(self, launcher_app):
+        self.launcher = launcher_app
+        self.current = launcher_app
+
+    def add_task(self, coro):
+        """Run coro as a uasyncio task next to the loop once run() starts"""
+        self._tasks.append(coro)
+
+    def launch(self, app_cfg):
+        """Open app_cfg, a registry entry, once the current input has been handled"""
+        self._pending_launch = app_cfg
+
+    def _can_lightsleep(self):
+        if self.worker is not None and not self.worker.is_idle():
+            return False
+        return self.buzzer is None or self.buzzer.is_silent()
+
+    async def _start_pending_app(self):
+        app_cfg = self._pending_launch
+        self._pending_launch = None
+        if self.apps.get_live(app_cfg) is None:
+            self.display.show_message("Loading...", title=app_cfg['name'])
+            await asyncio.sleep_ms(200)
+        try:
+            app = self.apps.open(app_cfg)
+        except Exception as e:
+            print(f"Cannot load {app_cfg['name']}: {e}")
+            self.display.clear()
+            self.launcher.show_toast(["Load error", app_cfg['name']], title="ERROR")
+            return
+        finally:
+            if self.memory is not None:
+                self.memory.rebase()  # open() collects, that is not a mid-frame GC
+        self._switch_to(app, app_cfg)
+
+    def _log_usage(self):
+        if self.log is None or self._current_cfg is None:
+            return
+        seconds = utime.ticks_diff(utime.ticks_ms(), self._entered_ms) // 1000
+        self.log.append(LOG_CH_APP_BASE + self.apps.registry.entries.index(self._current_cfg), seconds)
+
+    def _switch_to(self, app, app_cfg=None):
+        if self.current is not None:
+            self.current.on_exit()
+            self._log_usage()
+            if self.memory is not None:
+                self.memory.exit()
+        self._current_cfg = app_cfg
+        self._entered_ms = utime.ticks_ms()
+        self.display.clear()
+        self.display.show()
+        self.current = app
+        self._last_tick = utime.ticks_ms()
+        if self.memory is not None:
+            self.memory.enter(app_cfg['name'] if app_cfg else "Launcher")
+        app.on_enter()
+
+    def _check_app_exit(self):
+        if self.current is not self.launcher and not self.current.is_active():
+            self._switch_to(self.launcher)
+            self.apps.trim()
+            if self.memory is not None:
+                self.memory.rebase()
+
+    def _check_sleep_switch(self):
+        if self.sleep_manager.should_sleep():
+            if not self.sleep_manager.is_sleeping:
+                self.paused = True
+                if self.worker is not None:
+                    self.worker.suspend()
+                if self.log is not None:
+                    self.log.flush()  # the battery may be pulled while asleep
+                if self.settings is not None:
+                    self.settings.flush()
+                self.sleep_manager.try_enter_sleep_mode(self.display, self.buzzer)
+        if self.sleep_manager.is_sleeping and not self.sleep_manager.should_sleep():
+            # the saved frame is put back as it was, the app is not asked to redraw
+            self.sleep_manager.try_exit_sleep_mode(self.display, self.buzzer)
+            for btn in self.buttons.values():
+                btn.clear()
+            if self.worker is not None:
+                self.worker.resume()
+            self.paused = False
+            self._last_tick = utime.ticks_ms()
+
+    def _dispatch_input(self, now):
+        for btn in self.buttons.values():
+            btn.update()
+        app = self.current
+        if app.toast_active(now):
+            return  # presses during a toast are dropped, as the blocking messages did
+        for name in self._names:
+            if self.buttons[name].is_pressed():
+                app.on_input(name)
+                if not app.is_active() or self._pending_launch:
+                    break
+        self._check_app_exit()
+
+    def _run_tick(self, now):
+        app = self.current
+        if app.toast_active(now):
+            return
+        due = app.next_tick(self._last_tick)
+        if due is not None and utime.ticks_diff(now, due) >= 0:
+            self._last_tick = now
+            app.on_tick(now)
+            self._check_app_exit()
+
+    def _render(self, now):
+        app = self.current
+        if app.needs_render() or app.toast_active(now):
+            if utime.ticks_diff(now, self._last_render) >= RENDER_PERIOD_MS:
+                self._last_render = now
+                app.render_frame(now)
+                if self.memory is not None:
+                    self.memory.frame()
+
+    def _next_timeout(self, now):
+        """ms until the earliest deadline, None when only an interrupt can change anything"""
+        deadlines = []
+        if self._poll_switch:
+            deadlines.append(utime.ticks_add(now, SLEEP_CHECK_MS))
+        if not self.paused:
+            app = self.current
+            if self._poll_buttons:
+                deadlines.append(utime.ticks_add(now, INPUT_PERIOD_MS))
+            toast_end = app.toast_deadline()
+            if toast_end is not None:
+                deadlines.append(toast_end)
+            else:
+                due = app.next_tick(self._last_tick)
+                if due is not None:
+                    deadlines.append(due)
+            if app.needs_render():
+                deadlines.append(utime.ticks_add(self._last_render, RENDER_PERIOD_MS))
+        timeout = None
+        if self.time_service is not None:
+            timeout = self.time_service.next_deadline_ms()
+        for deadline in deadlines:
+            wait_ms = utime.ticks_diff(deadline, now)
+            if timeout is None or wait_ms < timeout:
+                timeout = wait_ms
+        if timeout is not None and timeout < 0:
+            timeout = 0
+        return timeout
+
+    async def _main(self):
+        self._last_tick = utime.ticks_ms()
+        if self.worker is not None and not self.worker.threaded:
+            asyncio.create_task(self.worker.run_async())
+        for coro in self._tasks:
+            asyncio.create_task(coro)
+        if self.memory is not None:
+            self.memory.enter("Launcher")
+        self.current.on_enter()
+        while True:
+            self._check_sleep_switch()
+            now = utime.ticks_ms()
+            if not self.paused:
+                self._dispatch_input(now)
+                if self._pending_launch:
+                    await self._start_pending_app()
+                    now = utime.ticks_ms()
+            if self.time_service is not None:
+                self.time_service.run_due()  # also while asleep, the sampler and log keep going
+            if not self.paused:
+                self._run_tick(now)
+                self._render(now)
+            if self.memory is not None:
+                self.memory.idle(self._next_timeout(utime.ticks_ms()))
+            timeout = self._next_timeout(utime.ticks_ms())
+            if self.paused and self.sleep_manager.use_lightsleep:
+                if timeout is None or timeout > SLEEP_LIGHTSLEEP_MS:
+                    timeout = SLEEP_LIGHTSLEEP_MS
+                await self.idle.wait(timeout, lightsleep=True)
+            else:
+                await self.idle.wait(timeout)
+
+    def run(self):
+        asyncio.run(self._main())
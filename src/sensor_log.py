@@ -0,0 +1,164 @@
+import os
+import struct
+import utime
+
+from src.constants import LOG_BLOCK_SIZE, LOG_DIR, LOG_FILE_BLOCKS, LOG_MAX_FILES
+
+LOG_MAGIC = b"CWL1"
+HEADER_SIZE = 8  # magic, u16 record size, u16 block size
+RECORD_FORMAT = "<IHh"  # utime.time() seconds, channel, value
+RECORD_SIZE = 8
+EMPTY_TIME = 0xFFFFFFFF  # padding record at the end of a block flushed early
+
+
+class SensorLog:
+    """Append-only log of (time, channel, value) records in a rotating set of flash files.
+
+    Records are packed into a RAM block of LOG_BLOCK_SIZE bytes and written only once the
+    block is full (or on flush()), so flash sees whole-block appends and never a rewrite.
+    A file holds LOG_FILE_BLOCKS blocks; when LOG_MAX_FILES are full the oldest is deleted,
+    which bounds the log to LOG_MAX_FILES * LOG_FILE_BLOCKS * LOG_BLOCK_SIZE bytes.
+    utime.time() can step backwards (RTC set, or reset to 2000 after a power loss), so a
+    record older than the one before it starts a new file. Times then only grow within a
+    file and read() binary searches the blocks of each file, but it visits every file since
+    the files are not ordered among themselves.
+    """
+
+    def __init__(self, log_dir=LOG_DIR):
+        self.log_dir = log_dir
+        self._block = bytearray(LOG_BLOCK_SIZE)
+        self._count = 0  # records in _block
+        self._per_block = LOG_BLOCK_SIZE // RECORD_SIZE
+        self._header = bytearray(HEADER_SIZE)
+        self._header[0:4] = LOG_MAGIC
+        struct.pack_into("<HH", self._header, 4, RECORD_SIZE, LOG_BLOCK_SIZE)
+        self.writes = 0
+        self.available = True
+        try:
+            os.mkdir(log_dir)
+        except OSError:
+            pass  # already there
+        try:
+            self._files = self._list_files()
+        except OSError as e:
+            print(f"Sensor log unavailable: {e}")
+            self._files = []
+            self.available = False
+        self._file_blocks = self._blocks_in(self._files[-1]) if self._files else LOG_FILE_BLOCKS
+        self._last_time = self._stored_last_time()
+
+    def _path(self, number):
+        return "{}/{:04d}.bin".format(self.log_dir, number)
+
+    def _list_files(self):
+        numbers = []
+        for name in os.listdir(self.log_dir):
+            if name.endswith(".bin") and name[:-4].isdigit():
+                numbers.append(int(name[:-4]))
+        numbers.sort()
+        return numbers
+
+    def _blocks_in(self, number):
+        return (os.stat(self._path(number))[6] - HEADER_SIZE) // LOG_BLOCK_SIZE
+
+    def _stored_last_time(self):
+        """Time of the newest record on flash, 0 if there is none"""
+        if not self._files or not self._file_blocks:
+            return 0
+        record = bytearray(RECORD_SIZE)
+        with open(self._path(self._files[-1]), "rb") as f:
+            block_pos = HEADER_SIZE + (self._file_blocks - 1) * LOG_BLOCK_SIZE
+            for i in range(self._per_block - 1, -1, -1):
+                f.seek(block_pos + i * RECORD_SIZE)
+                f.readinto(record)
+                t = struct.unpack_from("<I", record)[0]
+                if t != EMPTY_TIME:
+                    return t
+        return 0
+
+    def append(self, channel, value, t=None):
+        """Buffer one record, value is clamped to a signed 16 bit int"""
+        if not self.available:
+            return  # no log directory, nothing will ever be written
+        if value > 32767:
+            value = 32767
+        elif value < -32768:
+            value = -32768
+        if t is None:
+            t = utime.time()
+        if t < self._last_time:
+            self.flush()
+            self._file_blocks = LOG_FILE_BLOCKS  # the clock went back, keep each file sorted
+        self._last_time = t
+        struct.pack_into(RECORD_FORMAT, self._block, self._count * RECORD_SIZE, t, channel, value)
+        self._count += 1
+        if self._count == self._per_block:
+            self.flush()
+
+    def flush(self):
+        """Write the buffered block, padding it if it is not full, e.g. before sleeping"""
+        if not self.available:
+            self._count = 0
+            return
+        if not self._count:
+            return
+        block = self._block
+        for i in range(self._count, self._per_block):
+            struct.pack_into(RECORD_FORMAT, block, i * RECORD_SIZE, EMPTY_TIME, 0, 0)
+        try:
+            if self._file_blocks >= LOG_FILE_BLOCKS:
+                self._start_file()
+            with open(self._path(self._files[-1]), "ab") as f:
+                f.write(block)
+            self._file_blocks += 1
+            self.writes += 1
+        except OSError as e:
+            print(f"Sensor log write error: {e}")
+        self._count = 0
+
+    def _start_file(self):
+        number = self._files[-1] + 1 if self._files else 0
+        with open(self._path(number), "wb") as f:
+            f.write(self._header)
+        self._files.append(number)
+        self._file_blocks = 0
+        while len(self._files) > LOG_MAX_FILES:
+            os.remove(self._path(self._files.pop(0)))
+
+    def _first_time(self, f, block):
+        f.seek(HEADER_SIZE + block * LOG_BLOCK_SIZE)
+        data = f.read(4)
+        return struct.unpack("<I", data)[0] if len(data) == 4 else EMPTY_TIME
+
+    def _find_block(self, f, blocks, start):
+        """Index of the last block whose first record is before start, 0 if there is none"""
+        lo, hi = 0, blocks - 1
+        while lo < hi:
+            mid = (lo + hi + 1) // 2
+            if self._first_time(f, mid) < start:
+                lo = mid
+            else:
+                hi = mid - 1
+        return lo
+
+    def read(self, start=0, end=EMPTY_TIME - 1, channel=None):
+        """Yield (time, channel, value) for records with start <= time <= end, in the order
+        they were written"""
+        record = bytearray(RECORD_SIZE)
+        for number in self._files[:]:
+            with open(self._path(number), "rb") as f:
+                blocks = self._blocks_in(number)
+                if not blocks or self._first_time(f, 0) > end:
+                    continue
+                f.seek(HEADER_SIZE + self._find_block(f, blocks, start) * LOG_BLOCK_SIZE)
+                while f.readinto(record) == RECORD_SIZE:
+                    t, ch, value = struct.unpack(RECORD_FORMAT, record)
+                    if t == EMPTY_TIME or t < start or (channel is not None and ch != channel):
+                        continue
+                    if t > end:
+                        break  # sorted within the file, the next file may go back in time
+                    yield t, ch, value
+        for i in range(self._count):
+            t, ch, value = struct.unpack_from(RECORD_FORMAT, self._block, i * RECORD_SIZE)
+            if start <= t <= end and (channel is None or ch == channel):
+                yield t, ch, value
@@ -0,0 +1,176 @@
+import os
+import struct
+
+from src.constants import SETTINGS_FILE, SETTINGS_QUIET_MS
+
+SETTINGS_MAGIC = b"CWK"
+SETTINGS_VERSION = 1
+# value types, each record is: u8 key length, key, u8 type, value
+_T_BOOL = 0  # u8
+_T_INT = 1  # i32
+_T_FLOAT = 2  # f32
+_T_STR = 3  # u8 length, utf-8
+MAX_KEYS = 0xFFFF
+INT_MIN = -0x80000000
+INT_MAX = 0x7FFFFFFF
+FLOAT_MAX = 3.4028234e38
+
+
+class SettingsStore:
+    """Small persistent key-value store for settings and app state.
+
+    The file is read on the first get() or set(), not in the constructor; main.py reads the
+    sounds setting during boot, so in practice that is when it happens. set() only updates RAM
+    and marks the key dirty; all dirty keys are written together SETTINGS_QUIET_MS after the
+    last change (with a TimeService), or on flush(). A write goes to a temporary file that is then
+    renamed over the old one, so a reset mid-write leaves the previous settings intact.
+
+    Layout: b"CWK", u8 version, u16 record count, then the records. A file that is short or
+    malformed anywhere is ignored as a whole and the defaults apply. Keys are up to 255
+    bytes; values are bool, int (32 bit), float (32 bit) or str (up to 255 bytes), set()
+    raises ValueError/TypeError for anything else so a flush can always encode.
+    """
+
+    def __init__(self, path=SETTINGS_FILE, time_service=None):
+        self.path = path
+        self.time_service = time_service
+        self._values = None  # loaded on first access
+        self._dirty = set()
+        self._alarm = None
+        self._flush_cb = self._on_quiet
+        self.writes = 0
+
+    def _loaded(self):
+        if self._values is None:
+            try:
+                with open(self.path, "rb") as f:
+                    self._values = self._decode(f.read())
+            except OSError:
+                self._values = {}  # first boot
+            except ValueError as e:
+                print(f"Settings file ignored: {e}")
+                self._values = {}
+        return self._values
+
+    def _decode(self, data):
+        """Parse a settings file, raises ValueError for anything that is not a whole one"""
+        if len(data) < 6 or data[:3] != SETTINGS_MAGIC:
+            raise ValueError("bad header")
+        if data[3] != SETTINGS_VERSION:
+            raise ValueError("version {}".format(data[3]))
+        size = len(data)
+        count = data[4] | data[5] << 8
+        pos = 6
+        values = {}
+        for _ in range(count):
+            if pos + 2 > size or pos + 2 + data[pos] > size:
+                raise ValueError("truncated at {}".format(pos))
+            n = data[pos]
+            key = data[pos + 1:pos + 1 + n].decode()
+            pos += 1 + n
+            kind = data[pos]
+            pos += 1
+            if kind == _T_BOOL:
+                if pos + 1 > size:
+                    raise ValueError("truncated at {}".format(pos))
+                value = bool(data[pos])
+                pos += 1
+            elif kind == _T_INT or kind == _T_FLOAT:
+                if pos + 4 > size:
+                    raise ValueError("truncated at {}".format(pos))
+                value = struct.unpack_from("<i" if kind == _T_INT else "<f", data, pos)[0]
+                pos += 4
+            elif kind == _T_STR:
+                if pos + 1 > size or pos + 1 + data[pos] > size:
+                    raise ValueError("truncated at {}".format(pos))
+                n = data[pos]
+                value = data[pos + 1:pos + 1 + n].decode()
+                pos += 1 + n
+            else:
+                raise ValueError("type {}".format(kind))
+            values[key] = value
+        return values
+
+    def _encode(self):
+        out = bytearray(SETTINGS_MAGIC)
+        out.append(SETTINGS_VERSION)
+        out += struct.pack("<H", len(self._values))
+        for key, value in self._values.items():
+            key_bytes = key.encode()
+            out.append(len(key_bytes))
+            out += key_bytes
+            if isinstance(value, bool):
+                out.append(_T_BOOL)
+                out.append(1 if value else 0)
+            elif isinstance(value, int):
+                out.append(_T_INT)
+                out += struct.pack("<i", value)
+            elif isinstance(value, float):
+                out.append(_T_FLOAT)
+                out += struct.pack("<f", value)
+            else:
+                value_bytes = value.encode()
+                out.append(_T_STR)
+                out.append(len(value_bytes))
+                out += value_bytes
+        return out
+
+    def get(self, key, default=None):
+        return self._loaded().get(key, default)
+
+    def _check(self, key, value):
+        if len(key.encode()) > 255:
+            raise ValueError("key too long: {}".format(key))
+        if isinstance(value, bool):
+            return
+        if isinstance(value, int):
+            if not INT_MIN <= value <= INT_MAX:
+                raise ValueError("{} out of the 32 bit range".format(key))
+        elif isinstance(value, float):
+            if not -FLOAT_MAX <= value <= FLOAT_MAX:
+                raise ValueError("{} out of the float range".format(key))
+        elif isinstance(value, str):
+            if len(value.encode()) > 255:
+                raise ValueError("{} longer than 255 bytes".format(key))
+        else:
+            raise TypeError("{}: cannot store {}".format(key, type(value)))
+
+    def set(self, key, value):
+        """Change key in RAM, it reaches flash after the quiet period or flush()"""
+        values = self._loaded()
+        if key in values and values[key] == value and type(values[key]) is type(value):
+            return
+        self._check(key, value)
+        if key not in values and len(values) >= MAX_KEYS:
+            raise ValueError("settings full")
+        values[key] = value
+        self._dirty.add(key)
+        if self.time_service is not None:
+            if self._alarm is not None:
+                self._alarm.cancel()  # restart the quiet period
+            self._alarm = self.time_service.add_alarm(SETTINGS_QUIET_MS, self._flush_cb)
+
+    def is_dirty(self):
+        return bool(self._dirty)
+
+    def _on_quiet(self, _alarm):
+        self._alarm = None
+        self.flush()
+
+    def flush(self):
+        """Write pending changes now, e.g. before sleeping"""
+        if self._alarm is not None:
+            self._alarm.cancel()
+            self._alarm = None
+        if not self._dirty:
+            return
+        tmp_path = self.path + ".tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(self._encode())
+            os.rename(tmp_path, self.path)
+        except OSError as e:
+            print(f"Settings write error: {e}")
+            return
+        self.writes += 1
+        self._dirty.clear()
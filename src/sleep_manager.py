@@ -1,40 +1,63 @@
 import machine
-import utime
+
+from src.constants import SLEEP_CPU_FREQ, SLEEP_USE_LIGHTSLEEP
 
 
 class SleepManager:
-    """Handles RP2040-Matrix sleep mode functionality"""
+    """Handles RP2040-Matrix sleep mode functionality
+
+    Entering sleep saves the frame on screen, pauses the buzzer, turns the OLED off and drops
+    the CPU clock; the runtime stops rendering and dispatching to the app meanwhile but keeps
+    firing TimeService alarms, idling in machine.lightsleep (use_lightsleep) between them and
+    the switch pin IRQ. deepsleep is not used because it resets RAM, so neither the frame nor
+    the app state would survive it.
+    """
 
-    def __init__(self, sleep_pin_num):
+    def __init__(self, sleep_pin_num, use_lightsleep=SLEEP_USE_LIGHTSLEEP):
         self.sleep_pin = machine.Pin(sleep_pin_num, machine.Pin.IN, machine.Pin.PULL_UP)
         self.is_sleeping = False
+        self.use_lightsleep = use_lightsleep
+        self._awake_freq = 0
 
     def should_sleep(self):
         """Check if device should enter sleep mode (pin LOW = switch closed = sleep)"""
         return self.sleep_pin.value() == 0
 
+    def set_wake_handler(self, handler):
+        """Call handler(pin) from the pin IRQ whenever the sleep switch moves"""
+        self.sleep_pin.irq(handler=handler, trigger=machine.Pin.IRQ_FALLING | machine.Pin.IRQ_RISING, hard=True)
+
+    def _set_freq(self, freq):
+        try:
+            machine.freq(freq)
+        except Exception as e:
+            print(f"Cannot set CPU freq {freq}: {e}")
+
     def try_enter_sleep_mode(self, display_manager, buzzer_control):
         """Enter sleep mode improving battery life"""
         if self.is_sleeping:
             return
 
         print("Entering sleep mode...")
-        display_manager.clear_and_draw("Sleep mode..", 20, 25)
-        utime.sleep_ms(500)
+        if buzzer_control:
+            buzzer_control.pause()
+        display_manager.save_frame()
 
         self.is_sleeping = True
         display_manager.oled.poweroff()
+        self._awake_freq = machine.freq()
+        self._set_freq(SLEEP_CPU_FREQ)
 
-        if buzzer_control:
-            buzzer_control.stop_tone()
-
-    def try_exit_sleep_mode(self, display_manager):
+    def try_exit_sleep_mode(self, display_manager, buzzer_control=None):
         """Exit sleep mode"""
         if not self.is_sleeping:
             return
 
         print("Exiting sleep mode..")
         self.is_sleeping = False
+        if self._awake_freq:
+            self._set_freq(self._awake_freq)
         display_manager.oled.poweron()
-        display_manager.clear_and_draw("Waking up...", 20, 25)
-        utime.sleep_ms(500)
+        display_manager.restore_frame()
+        if buzzer_control:
+            buzzer_control.resume()
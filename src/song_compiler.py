@@ -0,0 +1,27 @@
+from array import array
+
+from src.constants import NOTES
+
+DEFAULT_NOTE_GAP_MS = 50
+
+
+def compile_song(song_data):
+    """Pack (note, duration_ms[, gap_ms]) tuples into a flat array('H') of (freq, duration, gap) triples.
+
+    Notes may be names from NOTES or raw frequencies; unknown names raise ValueError instead of
+    silently turning into rests. Rests never get a gap, matching the old play_song behaviour.
+    """
+    packed = array('H', [0] * (len(song_data) * 3))
+    for i, item in enumerate(song_data):
+        note_val, duration = item[0], item[1]
+        if isinstance(note_val, str):
+            if note_val not in NOTES:
+                raise ValueError("Unknown note {!r} at position {}".format(note_val, i))
+            freq = NOTES[note_val]
+        else:
+            freq = note_val
+        gap = item[2] if len(item) > 2 else DEFAULT_NOTE_GAP_MS
+        packed[i * 3] = freq
+        packed[i * 3 + 1] = duration
+        packed[i * 3 + 2] = gap if freq > 0 else 0
+    return packed
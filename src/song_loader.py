@@ -0,0 +1,177 @@
+from array import array
+import os
+
+from src.constants import RTTTL_NOTE_GAP_MS, SONG_INDEX_FILE, SONG_READ_CHUNK, SONGS_DIR
+
+BINARY_SONG_MAGIC = b"CWS1"
+RTTTL_MAX_FIELD = 16
+
+# octave 4 frequencies, other octaves are shifted from these
+_OCTAVE4_FREQS = array('H', [262, 277, 294, 311, 330, 349, 370, 392, 415, 440, 466, 494])
+# semitone of note letters a..h (h is the German b)
+_LETTER_SEMITONES = b"\x09\x0b\x00\x02\x04\x05\x07\x0b"
+
+
+def _note_freq(semitone, octave):
+    if semitone >= 12:
+        semitone -= 12
+        octave += 1
+    base = _OCTAVE4_FREQS[semitone]
+    return base << (octave - 4) if octave >= 4 else base >> (4 - octave)
+
+
+def _iter_fields(f):
+    """Yield (section, field, length) for each ','-separated RTTTL field, reusing one buffer.
+    The section number goes up at every ':' (0 name, 1 defaults, 2 notes)."""
+    chunk = bytearray(SONG_READ_CHUNK)
+    field = bytearray(RTTTL_MAX_FIELD)
+    length = 0
+    section = 0
+    while True:
+        n = f.readinto(chunk)
+        if not n:
+            break
+        for i in range(n):
+            c = chunk[i]
+            if c == 58 or c == 44:  # ':' or ','
+                yield section, field, length
+                length = 0
+                if c == 58:
+                    section += 1
+            elif c > 32 and length < RTTTL_MAX_FIELD:
+                field[length] = c
+                length += 1
+    if length:
+        yield section, field, length
+
+
+def _parse_rtttl_note(field, length, default_dur, default_octave, whole_ms):
+    i = 0
+    dur = 0
+    while i < length and 48 <= field[i] <= 57:
+        dur = dur * 10 + field[i] - 48
+        i += 1
+    if i >= length:
+        raise ValueError("Bad RTTTL note {!r}".format(bytes(field[:length])))
+    letter = field[i] | 0x20
+    i += 1
+    if i < length and field[i] == 35:  # '#'
+        sharp = 1
+        i += 1
+    else:
+        sharp = 0
+    dotted = False
+    if i < length and field[i] == 46:  # '.' before the octave
+        dotted = True
+        i += 1
+    octave = default_octave
+    if i < length and 48 <= field[i] <= 57:
+        octave = field[i] - 48
+        i += 1
+    if i < length and field[i] == 46:  # '.' after the octave
+        dotted = True
+    duration_ms = whole_ms // (dur or default_dur)
+    if dotted:
+        duration_ms += duration_ms // 2
+    if letter == 112:  # 'p' pause
+        return 0, duration_ms, 0
+    if not 97 <= letter <= 104:
+        raise ValueError("Bad RTTTL note {!r}".format(bytes(field[:length])))
+    freq = _note_freq(_LETTER_SEMITONES[letter - 97] + sharp, octave)
+    gap = RTTTL_NOTE_GAP_MS if duration_ms > RTTTL_NOTE_GAP_MS else 0
+    return freq, duration_ms - gap, gap
+
+
+def iter_rtttl(path):
+    """Stream (freq, duration, gap) triples from an RTTTL file without loading it"""
+    default_dur, default_octave, bpm = 4, 6, 63  # RTTTL spec defaults
+    whole_ms = 0
+    with open(path, "rb") as f:
+        for section, field, length in _iter_fields(f):
+            if section == 1 and length > 2 and field[1] == 61:  # 'x=value'
+                value = int(bytes(field[2:length]))
+                key = field[0] | 0x20
+                if key == 100:
+                    default_dur = value
+                elif key == 111:
+                    default_octave = value
+                elif key == 98:
+                    bpm = value
+            elif section >= 2 and length:
+                if not whole_ms:
+                    whole_ms = 240000 // bpm  # a whole note lasts four beats
+                yield _parse_rtttl_note(field, length, default_dur, default_octave, whole_ms)
+
+
+def iter_binary_song(path):
+    """Stream (freq, duration, gap) triples from a file written by write_binary_song"""
+    record = bytearray(6)
+    with open(path, "rb") as f:
+        if f.read(4) != BINARY_SONG_MAGIC:
+            raise ValueError("Not a binary song: {}".format(path))
+        f.read(f.read(1)[0])  # skip the title
+        while f.readinto(record) == 6:
+            yield record[0] | record[1] << 8, record[2] | record[3] << 8, record[4] | record[5] << 8
+
+
+def iter_song_file(path):
+    if path.endswith(".bin"):
+        return iter_binary_song(path)
+    return iter_rtttl(path)
+
+
+def write_binary_song(path, title, packed):
+    """Store a compile_song() array as a binary song file (little-endian u16 triples)"""
+    title_bytes = title.encode()[:255]
+    record = bytearray(2)
+    with open(path, "wb") as f:
+        f.write(BINARY_SONG_MAGIC)
+        f.write(bytes([len(title_bytes)]))
+        f.write(title_bytes)
+        for value in packed:
+            record[0] = value & 0xFF
+            record[1] = value >> 8
+            f.write(record)
+
+
+def read_song_title(path):
+    """Read only the title of a song file: the RTTTL name field or the binary header"""
+    with open(path, "rb") as f:
+        if path.endswith(".bin"):
+            f.read(4)
+            return f.read(f.read(1)[0]).decode()
+        head = f.read(SONG_READ_CHUNK)
+    end = head.find(b":")
+    return head[:end if end >= 0 else len(head)].decode().strip()
+
+
+def build_song_index(songs_dir=SONGS_DIR):
+    entries = []
+    for name in sorted(os.listdir(songs_dir)):
+        if name.endswith(".rtttl") or name.endswith(".bin"):
+            try:
+                entries.append((read_song_title(songs_dir + "/" + name), songs_dir + "/" + name))
+            except (OSError, ValueError, UnicodeError) as e:
+                print(f"Skipping song {name}: {e}")
+    with open(songs_dir + "/" + SONG_INDEX_FILE, "w") as f:
+        for title, path in entries:
+            f.write("{}\t{}\n".format(path[len(songs_dir) + 1:], title))
+    return entries
+
+
+def load_song_index(songs_dir=SONGS_DIR):
+    """Return [(title, path)] from the song index, building it if missing. No song is parsed."""
+    try:
+        entries = []
+        with open(songs_dir + "/" + SONG_INDEX_FILE) as f:
+            for line in f:
+                name, _, title = line.rstrip("\n").partition("\t")
+                if name:
+                    entries.append((title or name, songs_dir + "/" + name))
+        return entries
+    except OSError:
+        pass
+    try:
+        return build_song_index(songs_dir)
+    except OSError:
+        return []  # no songs directory on this device
@@ -0,0 +1,39 @@
+from src.song_compiler import compile_song
+
+# Melodies are packed at import time, the tuple lists are garbage once compile_song returns
+IMPERIAL_MARCH_MELODY = compile_song([
+    ('G3', 350), ('G3', 350), ('G3', 350), ('DS3', 250, 50), ('AS3', 100),
+    ('G3', 350), ('DS3', 250, 50), ('AS3', 100), ('G3', 700),
+    ('D4', 350), ('D4', 350), ('D4', 350), ('DS4', 250, 50), ('AS3', 100),
+    ('G3', 350), ('DS3', 250, 50), ('AS3', 100), ('G3', 700),
+])
+PIRATES_MELODY = compile_song([
+    ('D4', 120), ('D4', 120), ('D4', 120), ('D4', 240), ('D4', 120), ('E4', 120), ('F4', 240), ('F4', 240),
+    ('F4', 120), ('G4', 120), ('E4', 240), ('E4', 240), ('D4', 120), ('C4', 120), ('C4', 120), ('D4', 360),
+    ('D4', 120), ('D4', 120), ('D4', 120), ('D4', 240), ('D4', 120), ('E4', 120), ('F4', 240), ('F4', 240),
+    ('F4', 120), ('G4', 120), ('E4', 240), ('E4', 240), ('D4', 120), ('C4', 120), ('C4', 120), ('D4', 360),
+    ('A3', 120), ('C4', 120), ('D4', 120), ('D4', 120), ('D4', 120), ('E4', 120), ('F4', 240), ('F4', 120),
+    ('F4', 120), ('G4', 120), ('E4', 240), ('E4', 120), ('D4', 120), ('C4', 120), ('C4', 120), ('D4', 360),
+])
+BIRTHDAY_MELODY = compile_song([
+    ('C4', 175), ('C4', 175, 50), ('D4', 525, 50), ('C4', 175, 50), ('F4', 350, 50), ('E4', 700),
+    ('C4', 175, 50), ('C4', 175, 50), ('D4', 525, 50), ('C4', 175, 50), ('G4', 350, 50), ('F4', 700),
+    ('C4', 175), ('C4', 175, 50), ('C5', 525, 50), ('A4', 175, 50), ('F4', 350, 50), ('E4', 350, 50), ('D4', 700),
+    ('AS4', 175, 50), ('AS4', 175, 50), ('A4', 525, 50), ('F4', 175, 50), ('G4', 350, 50), ('F4', 700),
+])
+EXPLOSION_EFFECT = compile_song([
+    ('C4', 100, 20), ('DS4', 100, 20), ('F4', 100, 20), ('G4', 80, 20),
+    ('AS4', 80, 20), ('C5', 60, 20), ('D5', 60, 20), ('E5', 50, 20),
+    ('F5', 40, 10), ('G5', 30), ('C3', 300)
+])
+
+# EXPLOSION_EFFECT = [
+#     (NOTES['C7'], 30),
+#     (NOTES['E6'], 50),
+#     (NOTES['G5'], 40),
+#     (NOTES['C5'], 30),
+#     (NOTES['A4'], 20),
+#     (NOTES['F4'], 30),
+#     (NOTES['D3'], 200),
+#     (NOTES['C3'], 300),
+# ]
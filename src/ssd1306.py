@@ -3,6 +3,8 @@
 from micropython import const
 import framebuf
 
+from src.constants import OLED_USE_VIPER
+
 
 # register definitions
 SET_CONTRAST = const(0x81)
@@ -24,16 +26,52 @@ SET_PRECHARGE = const(0xD9)
 SET_VCOM_DESEL = const(0xDB)
 SET_CHARGE_PUMP = const(0x8D)
 
+# bytes-on-the-wire cost of the six commands that open a column/page window
+_WINDOW_COST = const(24)
+
+
+# Copies the changed bytes of buf[start:end] into sent and returns the changed
+# column span relative to start packed as (first << 8) | last, or -1 if clean.
+# The viper version lives in its own module: on firmware built without the viper
+# emitter the decorator is a compile error for the whole file, not a NameError.
+if OLED_USE_VIPER:
+    from src.ssd1306_viper import _sync_span
+else:
+
+    def _sync_span(buf, sent, start, end):
+        first = -1
+        last = -1
+        for i in range(start, end):
+            if buf[i] != sent[i]:
+                if first < 0:
+                    first = i
+                last = i
+                sent[i] = buf[i]
+        if first < 0:
+            return -1
+        return ((first - start) << 8) | (last - start)
+
 
 # Subclassing FrameBuffer provides support for graphics primitives
 # http://docs.micropython.org/en/latest/pyboard/library/framebuf.html
 class SSD1306(framebuf.FrameBuffer):
     def __init__(self, width, height, external_vcc):
+        assert width <= 256, "show() packs column spans into 8 bits"
         self.width = width
         self.height = height
         self.external_vcc = external_vcc
         self.pages = self.height // 8
         self.buffer = bytearray(self.pages * self.width)
+        self._buffer_mv = memoryview(self.buffer)
+        # copy of what the panel's GDDRAM currently holds, used to skip unchanged bytes
+        self._sent = bytearray(len(self.buffer))
+        self._sent_valid = False
+        self._spans = [-1] * self.pages
+        # memoryview of the span each page sent last, reused while the same columns change
+        self._mv_spans = [-1] * self.pages
+        self._span_mvs = [None] * self.pages
+        self.bytes_sent = 0
+        self.bytes_skipped = 0
         super().__init__(self.buffer, self.width, self.height, framebuf.MONO_VLSB)
         self.init_display()
 
@@ -88,14 +126,18 @@ class SSD1306(framebuf.FrameBuffer):
 
     def invert(self, invert):
         self.write_cmd(SET_NORM_INV | (invert & 1))
+        self.invalidate()
 
     def rotate(self, rotate):
         self.write_cmd(SET_COM_OUT_DIR | ((rotate & 1) << 3))
         self.write_cmd(SET_SEG_REMAP | (rotate & 1))
+        self.invalidate()
 
-    def show(self):
-        x0 = 0
-        x1 = self.width - 1
+    def invalidate(self):
+        """Force the next show() to push the whole buffer"""
+        self._sent_valid = False
+
+    def _set_window(self, x0, x1, page0, page1):
         if self.width != 128:
             # narrow displays use centred columns
             col_offset = (128 - self.width) // 2
@@ -105,9 +147,52 @@ class SSD1306(framebuf.FrameBuffer):
         self.write_cmd(x0)
         self.write_cmd(x1)
         self.write_cmd(SET_PAGE_ADDR)
-        self.write_cmd(0)
-        self.write_cmd(self.pages - 1)
+        self.write_cmd(page0)
+        self.write_cmd(page1)
+
+    def show_full(self):
+        self._set_window(0, self.width - 1, 0, self.pages - 1)
         self.write_data(self.buffer)
+        self._sent[:] = self.buffer
+        self._sent_valid = True
+        self.bytes_sent += len(self.buffer)
+
+    def show(self):
+        """Send only the column spans of each page that changed since the last frame"""
+        if not self._sent_valid:
+            self.show_full()
+            return
+        width = self.width
+        spans = self._spans
+        dirty = 0
+        cost = 0
+        for page in range(self.pages):
+            span = _sync_span(self.buffer, self._sent, page * width, (page + 1) * width)
+            spans[page] = span
+            if span >= 0:
+                dirty += (span & 0xFF) - (span >> 8) + 1
+                cost += _WINDOW_COST
+        if not dirty:
+            self.bytes_skipped += len(self.buffer)
+            return
+        if dirty + cost >= len(self.buffer) + _WINDOW_COST:
+            # most of the screen changed, one big window is cheaper
+            self.show_full()
+            return
+        for page in range(self.pages):
+            span = spans[page]
+            if span < 0:
+                continue
+            x0 = span >> 8
+            x1 = span & 0xFF
+            self._set_window(x0, x1, page, page)
+            if span != self._mv_spans[page]:
+                start = page * width
+                self._mv_spans[page] = span
+                self._span_mvs[page] = self._buffer_mv[start + x0:start + x1 + 1]
+            self.write_data(self._span_mvs[page])
+        self.bytes_sent += dirty
+        self.bytes_skipped += len(self.buffer) - dirty
 
 
 class SSD1306_I2C(SSD1306):
@@ -0,0 +1,19 @@
+# Viper build of ssd1306._sync_span, only imported when OLED_USE_VIPER is set
+import micropython
+
+
+@micropython.viper
+def _sync_span(buf: ptr8, sent: ptr8, start: int, end: int) -> int:
+    first = -1
+    last = -1
+    i = start
+    while i < end:
+        if buf[i] != sent[i]:
+            if first < 0:
+                first = i
+            last = i
+            sent[i] = buf[i]
+        i += 1
+    if first < 0:
+        return -1
+    return ((first - start) << 8) | (last - start)
@@ -0,0 +1,124 @@
+from array import array
+import machine
+
+from src.constants import (LOG_CH_TEMPERATURE, TEMP_BURST_SHIFT, TEMP_HISTORY_SIZE, TEMP_LOG_EVERY, TEMP_SAMPLE_PERIOD_MS,
+                           TEMP_SENSOR_ADC_CHANNEL, TEMPERATURE_OFFSET)
+
+# RP2040 sensor: T = 27 - (V - 0.706) / 0.001721 with V = raw * 3.3 / 65535, in 1/100 C.
+# T100 = _T100_AT_ZERO - (raw * _T100_PER_RAW_Q20 >> 20), so a sample needs no floats
+_T100_PER_RAW_Q20 = int(3.3 / 65535 / 0.001721 * 100 * (1 << 20) + 0.5)
+_T100_AT_ZERO = int((27 + 0.706 / 0.001721 - TEMPERATURE_OFFSET) * 100 + 0.5)
+
+
+def raw_to_centi_c(raw):
+    return _T100_AT_ZERO - ((raw * _T100_PER_RAW_Q20) >> 20)
+
+
+def centi_c_to_f(centi_c):
+    return centi_c * 9 // 5 + 3200
+
+
+class TemperatureSampler:
+    """Background temperature sampling into a fixed size history.
+
+    Every TEMP_SAMPLE_PERIOD_MS a TimeService alarm reads a burst of 2**TEMP_BURST_SHIFT ADC
+    values, averages them with a shift and stores the result, in 1/100 C, in a preallocated
+    ring. The window's sum, min and max are kept up to date as samples come and go, so the
+    stats are ready whenever an app asks. With a SensorLog in log, every TEMP_LOG_EVERY-th
+    sample is also kept on flash.
+    """
+
+    def __init__(self, adc_channel=TEMP_SENSOR_ADC_CHANNEL, size=TEMP_HISTORY_SIZE):
+        try:
+            self.adc = machine.ADC(adc_channel)
+        except Exception as e:
+            print(f"Error initializing temperature sensor: {e}")
+            self.adc = None
+        self.size = size
+        self._ring = array('h', [0] * size)
+        self._head = 0  # next slot written
+        self.count = 0
+        self._sum = 0
+        self.min = 0
+        self.max = 0
+        self.latest = 0
+        self.errors = 0
+        self.on_sample = None  # called with no arguments after each new sample
+        self.log = None
+        self._log_skip = 0
+        self._alarm = None
+        self._sample_cb = self._on_alarm
+
+    def start(self, time_service, period_ms=TEMP_SAMPLE_PERIOD_MS):
+        if self.adc is None or self._alarm is not None:
+            return
+        self.sample()
+        self._alarm = time_service.add_alarm(period_ms, self._sample_cb, period_ms)
+
+    def stop(self):
+        if self._alarm is not None:
+            self._alarm.cancel()
+            self._alarm = None
+
+    def _on_alarm(self, _alarm):
+        self.sample()
+
+    def _read_burst(self):
+        read = self.adc.read_u16
+        total = 0
+        for _ in range(1 << TEMP_BURST_SHIFT):
+            total += read()
+        return total >> TEMP_BURST_SHIFT
+
+    def sample(self):
+        """Take one averaged sample now, returns False if the ADC could not be read"""
+        if self.adc is None:
+            return False
+        try:
+            value = raw_to_centi_c(self._read_burst())
+        except Exception as e:
+            print(f"Error reading temperature: {e}")
+            self.errors += 1
+            return False
+        self._push(value)
+        if self.log is not None:
+            self._log_skip -= 1
+            if self._log_skip <= 0:
+                self._log_skip = TEMP_LOG_EVERY
+                self.log.append(LOG_CH_TEMPERATURE, value)
+        if self.on_sample is not None:
+            self.on_sample()
+        return True
+
+    def _push(self, value):
+        ring = self._ring
+        head = self._head
+        evicted = ring[head] if self.count == self.size else None
+        ring[head] = value
+        self._head = (head + 1) % self.size
+        self.latest = value
+        if evicted is None:
+            self.count += 1
+            self._sum += value
+            if self.count == 1 or value < self.min:
+                self.min = value
+            if self.count == 1 or value > self.max:
+                self.max = value
+            return
+        self._sum += value - evicted
+        if value <= self.min:
+            self.min = value
+        elif evicted == self.min:
+            self.min = min(ring)
+        if value >= self.max:
+            self.max = value
+        elif evicted == self.max:
+            self.max = max(ring)
+
+    def mean(self):
+        return self._sum // self.count if self.count else 0
+
+    def value(self, i):
+        """i-th sample of the window, 0 is the oldest"""
+        start = self._head - self.count
+        return self._ring[(start + i) % self.size]
@@ -0,0 +1,154 @@
+import heapq
+import machine
+import utime
+
+from src.constants import TIME_MAX_WAIT_MS, TIME_RESYNC_MS
+
+
+class Alarm:
+    """Handle returned by TimeService.add_alarm, callback(alarm) runs from the main loop"""
+
+    def __init__(self, callback, period_ms=0):
+        self.callback = callback
+        self.period_ms = period_ms
+        self.active = True
+        self.due = 0
+
+    def cancel(self):
+        self.active = False
+
+
+class TimeService:
+    """Wall clock kept in machine.RTC, plus alarms on a min-heap of deadlines.
+
+    seconds() is O(1): it counts ticks_ms from the start of a known second and only reads the
+    RTC again every TIME_RESYNC_MS, so ticks_diff never has to span more than that. hms()
+    returns the same time split into a preallocated [h, m, s] bytearray. The RTC
+    outlives every app, so the time is not lost when the clock app is closed.
+    Alarm deadlines are kept on a monotonic ms counter so they sort correctly across the
+    ticks_ms wrap; the runtime sleeps until next_deadline_ms() and then calls run_due().
+    With a SettingsStore, the utime.time() of the last set_time() is kept, so after a soft
+    reset (the RTC keeps running) the time still counts as set, unlike after a power cut.
+    """
+
+    def __init__(self, settings=None):
+        self.rtc = machine.RTC()
+        self.settings = settings
+        set_at = settings.get("clock.set_at") if settings is not None else None
+        self.is_set = set_at is not None and utime.time() >= set_at
+        self._anchor_ms = utime.ticks_ms()  # ticks_ms at which second _anchor_s began
+        self._anchor_s = self._read_rtc_seconds()
+        self._mono = 0
+        self._mono_ticks = self._anchor_ms
+        self._alarms = []  # heap of (due, seq, alarm)
+        self._seq = 0
+        self._hms = bytearray(3)
+        self._hms_secs = -1  # seconds() that _hms was split from
+
+    def _read_rtc_seconds(self):
+        dt = self.rtc.datetime()  # (year, month, day, weekday, hours, minutes, seconds, subseconds)
+        return dt[4] * 3600 + dt[5] * 60 + dt[6]
+
+    def set_time(self, h, m, s):
+        dt = self.rtc.datetime()
+        self.rtc.datetime((dt[0], dt[1], dt[2], dt[3], h, m, s, 0))
+        self._anchor_ms = utime.ticks_ms()
+        self._anchor_s = h * 3600 + m * 60 + s
+        self.is_set = True
+        if self.settings is not None:
+            self.settings.set("clock.set_at", utime.time())
+
+    def _resync(self):
+        el_s = utime.ticks_diff(utime.ticks_ms(), self._anchor_ms) // 1000
+        self._anchor_ms = utime.ticks_add(self._anchor_ms, el_s * 1000)
+        ours = (self._anchor_s + el_s) % 86400
+        rtc_s = self._read_rtc_seconds()
+        diff = (rtc_s - ours) % 86400
+        if 1 < diff < 86399:
+            ours = rtc_s  # drifted by more than the phase uncertainty, trust the RTC
+        self._anchor_s = ours
+
+    def seconds(self):
+        """Seconds since midnight"""
+        el_ms = utime.ticks_diff(utime.ticks_ms(), self._anchor_ms)
+        if el_ms >= TIME_RESYNC_MS:
+            self._resync()
+            el_ms = utime.ticks_diff(utime.ticks_ms(), self._anchor_ms)
+        return (self._anchor_s + el_ms // 1000) % 86400
+
+    def hms(self):
+        """[h, m, s] as a bytearray that is reused on every call, copy it to keep it"""
+        secs = self.seconds()
+        hms = self._hms
+        if secs == self._hms_secs:
+            return hms
+        if secs == self._hms_secs + 1 and hms[2] < 59:
+            hms[2] += 1  # the usual case on a running clock, no divisions
+        else:
+            hms[0] = secs // 3600
+            hms[1] = (secs // 60) % 60
+            hms[2] = secs % 60
+        self._hms_secs = secs
+        return hms
+
+    def next_second(self, after_ms):
+        """ticks_ms of the first second boundary after after_ms"""
+        el_ms = utime.ticks_diff(after_ms, self._anchor_ms)
+        return utime.ticks_add(self._anchor_ms, (el_ms // 1000 + 1) * 1000)
+
+    def _mono_now(self):
+        now = utime.ticks_ms()
+        self._mono += utime.ticks_diff(now, self._mono_ticks)
+        self._mono_ticks = now
+        return self._mono
+
+    def _push(self, alarm, due):
+        alarm.due = due
+        self._seq += 1
+        heapq.heappush(self._alarms, (due, self._seq, alarm))
+
+    def add_alarm(self, delay_ms, callback, period_ms=0):
+        """Call callback(alarm) after delay_ms, then every period_ms if it is not 0"""
+        alarm = Alarm(callback, period_ms)
+        self._push(alarm, self._mono_now() + delay_ms)
+        return alarm
+
+    def add_alarm_at(self, seconds_of_day, callback):
+        """Call callback(alarm) when seconds() next reaches seconds_of_day"""
+        now = utime.ticks_ms()
+        wait_s = (seconds_of_day - self.seconds() - 1) % 86400
+        delay_ms = utime.ticks_diff(self.next_second(now), now) + wait_s * 1000
+        return self.add_alarm(delay_ms, callback)
+
+    def next_deadline_ms(self):
+        """ms until the next alarm, None if there is none"""
+        alarms = self._alarms
+        while alarms and not alarms[0][2].active:
+            heapq.heappop(alarms)
+        if not alarms:
+            return None
+        wait_ms = alarms[0][0] - self._mono_now()
+        if wait_ms < 0:
+            return 0
+        return wait_ms if wait_ms < TIME_MAX_WAIT_MS else TIME_MAX_WAIT_MS
+
+    def run_due(self):
+        """Fire every alarm that is due, returns how many ran"""
+        alarms = self._alarms
+        now = self._mono_now()
+        fired = 0
+        while alarms and alarms[0][0] <= now:
+            alarm = heapq.heappop(alarms)[2]
+            if not alarm.active:
+                continue
+            if alarm.period_ms:
+                due = alarm.due + alarm.period_ms
+                self._push(alarm, due if due > now else now + alarm.period_ms)
+            else:
+                alarm.active = False
+            fired += 1
+            try:
+                alarm.callback(alarm)
+            except Exception as e:
+                print(f"Alarm callback error: {e}")
+        return fired
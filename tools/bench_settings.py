@@ -0,0 +1,60 @@
+"""Compare loading the binary SettingsStore file with loading the same values from JSON.
+
+Run on the watch with `mpremote run tools/bench_settings.py`. It writes two scratch files
+to the device filesystem and removes them afterwards.
+"""
+import gc
+import json
+import os
+import utime
+
+from src.settings_store import SettingsStore
+
+BIN_PATH = "/bench_settings.bin"
+JSON_PATH = "/bench_settings.json"
+ROUNDS = 50
+
+VALUES = {
+    "sounds": True,
+    "matrix.level": 2,
+    "phone.number": "123456789",
+    "clock.set_at": 815000000,
+}
+for i in range(12):  # room for the settings of apps to come
+    VALUES["app{}.value".format(i)] = i * 1000
+
+
+def bench(label, load):
+    gc.collect()
+    before = gc.mem_free()
+    start = utime.ticks_us()
+    for _ in range(ROUNDS):
+        load()
+    total_us = utime.ticks_diff(utime.ticks_us(), start)
+    print("{:<6} {:>6} us/load  heap {:>6} B".format(label, total_us // ROUNDS, before - gc.mem_free()))
+
+
+def load_bin():
+    return SettingsStore(BIN_PATH).get("sounds")
+
+
+def load_json():
+    with open(JSON_PATH) as f:
+        return json.load(f).get("sounds")
+
+
+def main():
+    store = SettingsStore(BIN_PATH)
+    for key, value in VALUES.items():
+        store.set(key, value)
+    store.flush()
+    with open(JSON_PATH, "w") as f:
+        json.dump(VALUES, f)
+    print("binary {} B, json {} B, {} keys".format(os.stat(BIN_PATH)[6], os.stat(JSON_PATH)[6], len(VALUES)))
+    bench("binary", load_bin)
+    bench("json", load_json)
+    os.remove(BIN_PATH)
+    os.remove(JSON_PATH)
+
+
+main()
@@ -0,0 +1,81 @@
+"""Decode a sensor log copied from the watch, e.g. with `mpremote cp -r :/log .`
+
+    python tools/decode_log.py log/ [--from 2026-10-01T00:00] [--to ...] [--channel 0]
+
+Prints one CSV line per record: ISO time, channel, value. Temperature (channel 0) is shown
+in C, app usage channels (16 + launcher index) in seconds. Runs on the host, not the watch.
+"""
+import argparse
+import datetime
+import os
+import struct
+import sys
+
+LOG_MAGIC = b"CWL1"
+HEADER_FORMAT = "<4sHH"
+RECORD_FORMAT = "<IHh"
+EMPTY_TIME = 0xFFFFFFFF
+LOG_CH_TEMPERATURE = 0
+LOG_CH_APP_BASE = 16
+EPOCHS = {"2000": datetime.datetime(2000, 1, 1), "1970": datetime.datetime(1970, 1, 1)}
+
+
+def log_files(paths):
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files += sorted(os.path.join(path, n) for n in os.listdir(path) if n.endswith(".bin"))
+        else:
+            files.append(path)
+    return files
+
+
+def iter_records(path):
+    with open(path, "rb") as f:
+        header = f.read(struct.calcsize(HEADER_FORMAT))
+        magic, record_size, _block_size = struct.unpack(HEADER_FORMAT, header)
+        if magic != LOG_MAGIC:
+            raise ValueError(f"{path}: not a sensor log")
+        while True:
+            record = f.read(record_size)
+            if len(record) < record_size:
+                return
+            t, channel, value = struct.unpack_from(RECORD_FORMAT, record)
+            if t != EMPTY_TIME:
+                yield t, channel, value
+
+
+def parse_time(text, epoch):
+    return int((datetime.datetime.fromisoformat(text) - epoch).total_seconds())
+
+
+def format_value(channel, value):
+    if channel == LOG_CH_TEMPERATURE:
+        return f"{value / 100:.2f}"
+    return str(value)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("paths", nargs="+", help="log directory or .bin files")
+    parser.add_argument("--from", dest="start", help="ISO time of the first record to print")
+    parser.add_argument("--to", dest="end", help="ISO time of the last record to print")
+    parser.add_argument("--channel", type=int)
+    parser.add_argument("--epoch", choices=EPOCHS, default="2000",
+                        help="epoch of the watch's utime.time(), 2000 on most MicroPython ports")
+    args = parser.parse_args(argv)
+    epoch = EPOCHS[args.epoch]
+    start = parse_time(args.start, epoch) if args.start else 0
+    end = parse_time(args.end, epoch) if args.end else EMPTY_TIME
+    out = sys.stdout
+    out.write("time,channel,value\n")
+    for path in log_files(args.paths):
+        for t, channel, value in iter_records(path):
+            if t < start or t > end or (args.channel is not None and channel != args.channel):
+                continue
+            when = (epoch + datetime.timedelta(seconds=t)).isoformat()
+            out.write(f"{when},{channel},{format_value(channel, value)}\n")
+
+
+if __name__ == "__main__":
+    main()